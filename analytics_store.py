@@ -0,0 +1,303 @@
+"""
+제출 결과 분석용 컬럼형 스냅샷
+readfit_submissions를 timestamp 워터마크 기준으로 증분 내보내기하여
+월별 파티션 Parquet 파일(month=YYYY-MM/part-NNNNN.parquet)에 추가합니다.
+학교 전체 질문(단원/난이도별 평균, 학기 추이)은 이 스냅샷을 NumPy로 집계해 Firestore 전체 조회 없이 계산합니다.
+
+스냅샷 경로: READFIT_ANALYTICS_DIR (기본 data/analytics)
+
+실행 예:
+    python analytics_store.py export    # 새 제출만 추가
+    python analytics_store.py compact   # 월별 조각 파일 병합
+    python analytics_store.py rebuild   # 전체 다시 내보내기 (재채점 후)
+    python analytics_store.py summary   # 단원/난이도/월별 요약 출력
+"""
+
+import glob
+import json
+import os
+import shutil
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+SNAPSHOT_DIR = os.getenv(
+    "READFIT_ANALYTICS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "analytics"),
+)
+STATE_FILE = "_state.json"
+EXPORT_PAGE_SIZE = 500
+# 제출 timestamp는 클라이언트가 리포트 생성 전에 찍으므로 커밋 순서와 다를 수 있음.
+# 워터마크보다 이만큼 앞에서부터 다시 조회하고, 그 구간에서 내보낸 문서 ID로 중복을 거름
+WATERMARK_LAG = timedelta(minutes=5)
+
+SCHEMA = pa.schema([
+    ("doc_id", pa.string()),
+    ("access_code", pa.string()),
+    ("student_name", pa.string()),
+    ("timestamp", pa.timestamp("us", tz="UTC")),
+    ("unit", pa.string()),
+    ("difficulty", pa.string()),
+    ("mission_id", pa.string()),
+    ("quiz_score", pa.int16()),
+    ("activity_score", pa.int16()),
+    ("total_score", pa.int16()),
+    ("quiz_correct", pa.int16()),
+    ("quiz_total", pa.int16()),
+])
+
+_export_lock = threading.Lock()
+
+
+def _as_utc(value):
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _load_state(snapshot_dir):
+    try:
+        with open(os.path.join(snapshot_dir, STATE_FILE), encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {"watermark": None, "recent_ids": {}, "rows": 0}
+    if "recent_ids" not in state:
+        # 이전 형식: 워터마크와 같은 timestamp의 문서 ID만 저장
+        state["recent_ids"] = {doc_id: state["watermark"] for doc_id in state.pop("watermark_ids", [])}
+    return state
+
+
+def _export_state(watermark, recent_ids, rows):
+    """저장할 상태 (재조회 구간을 벗어난 문서 ID는 버림)"""
+    since = watermark - WATERMARK_LAG
+    return {
+        "watermark": watermark.isoformat(),
+        "recent_ids": {doc_id: ts for doc_id, ts in recent_ids.items() if datetime.fromisoformat(ts) >= since},
+        "rows": rows,
+    }
+
+
+def _save_state(snapshot_dir, state):
+    path = os.path.join(snapshot_dir, STATE_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _next_part_path(month_dir):
+    os.makedirs(month_dir, exist_ok=True)
+    existing = glob.glob(os.path.join(month_dir, "part-*.parquet"))
+    numbers = [int(os.path.basename(p)[5:10]) for p in existing]
+    return os.path.join(month_dir, f"part-{max(numbers, default=-1) + 1:05d}.parquet")
+
+
+def _write_rows(snapshot_dir, rows):
+    """행 목록을 월별 파티션에 새 조각 파일로 추가"""
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(row["timestamp"].strftime("%Y-%m"), []).append(row)
+    for month, month_rows in by_month.items():
+        table = pa.Table.from_pylist(month_rows, schema=SCHEMA)
+        month_dir = os.path.join(snapshot_dir, f"month={month}")
+        path = _next_part_path(month_dir)
+        pq.write_table(table, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+
+def export_new_submissions(db, snapshot_dir=SNAPSHOT_DIR):
+    """
+    워터마크 이후의 제출만 스냅샷에 추가합니다.
+    timestamp가 커밋보다 먼저 찍혀 늦게 커밋된 제출도 빠지지 않도록 워터마크 - WATERMARK_LAG부터 다시 조회하고,
+    그 구간에서 이미 내보낸 문서 ID(recent_ids)는 건너뜁니다.
+
+    Args:
+        db: Firestore 클라이언트
+        snapshot_dir (str): 스냅샷 디렉터리
+
+    Returns:
+        int: 추가된 행 수
+    """
+    with _export_lock:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        state = _load_state(snapshot_dir)
+        watermark = datetime.fromisoformat(state["watermark"]) if state["watermark"] else None
+        recent_ids = dict(state["recent_ids"])
+
+        query = db.collection("readfit_submissions").order_by("timestamp")
+        if watermark is not None:
+            query = query.where("timestamp", ">=", watermark - WATERMARK_LAG)
+
+        assignments = {}
+        added = 0
+        batch = []
+        for doc in query.stream():
+            data = doc.to_dict()
+            ts = _as_utc(data.get("timestamp"))
+            if ts is None or doc.id in recent_ids:
+                continue
+            code = data.get("access_code", "")
+            if code not in assignments:
+                snapshot = db.collection("readfit_assignments").document(code).get() if code else None
+                assignments[code] = snapshot.to_dict() if snapshot is not None and snapshot.exists else {}
+            assignment = assignments[code]
+            batch.append({
+                "doc_id": doc.id,
+                "access_code": code,
+                "student_name": data.get("student_name", ""),
+                "timestamp": ts,
+                "unit": assignment.get("unit", ""),
+                "difficulty": assignment.get("difficulty", ""),
+                "mission_id": data.get("mission_id", "unknown"),
+                "quiz_score": int(data.get("quiz_score") or 0),
+                "activity_score": int(data.get("activity_score") or 0),
+                "total_score": int(data.get("total_score") or 0),
+                "quiz_correct": int(data.get("quiz_correct") or 0),
+                "quiz_total": int(data.get("quiz_total") or 0),
+            })
+            recent_ids[doc.id] = ts.isoformat()
+            watermark = ts if watermark is None else max(watermark, ts)
+            if len(batch) >= EXPORT_PAGE_SIZE:
+                _write_rows(snapshot_dir, batch)
+                added += len(batch)
+                batch = []
+                _save_state(snapshot_dir, _export_state(watermark, recent_ids, state["rows"] + added))
+        if batch:
+            _write_rows(snapshot_dir, batch)
+            added += len(batch)
+        if added:
+            _save_state(snapshot_dir, _export_state(watermark, recent_ids, state["rows"] + added))
+        return added
+
+
+def compact(snapshot_dir=SNAPSHOT_DIR):
+    """월별 조각 파일을 하나로 병합 (읽기 시 파일 열기 횟수 감소)"""
+    with _export_lock:
+        for month_dir in glob.glob(os.path.join(snapshot_dir, "month=*")):
+            parts = sorted(glob.glob(os.path.join(month_dir, "part-*.parquet")))
+            if len(parts) <= 1:
+                continue
+            table = pa.concat_tables([pq.read_table(p, schema=SCHEMA) for p in parts])
+            # 병합본을 먼저 새 조각으로 기록한 뒤 기존 조각 삭제 (중간에 멈춰도 데이터 손실 없음)
+            merged = _next_part_path(month_dir)
+            pq.write_table(table, merged + ".tmp")
+            os.replace(merged + ".tmp", merged)
+            for p in parts:
+                os.unlink(p)
+
+
+def rebuild(db, snapshot_dir=SNAPSHOT_DIR):
+    """
+    스냅샷을 처음부터 다시 만듭니다 (재채점 등으로 과거 제출의 점수가 바뀐 뒤 사용).
+    새 스냅샷을 옆 디렉터리에 완성한 다음 교체하므로 그동안에도 기존 스냅샷을 읽을 수 있습니다.
+
+    Returns:
+        int: 스냅샷 행 수
+    """
+    staging = snapshot_dir.rstrip(os.sep) + ".rebuild"
+    shutil.rmtree(staging, ignore_errors=True)
+    rows = export_new_submissions(db, staging)
+    with _export_lock:
+        retired = snapshot_dir.rstrip(os.sep) + ".old"
+        shutil.rmtree(retired, ignore_errors=True)
+        if os.path.isdir(snapshot_dir):
+            os.replace(snapshot_dir, retired)
+        os.replace(staging, snapshot_dir)
+        shutil.rmtree(retired, ignore_errors=True)
+    return rows
+
+
+def load_columns(snapshot_dir=SNAPSHOT_DIR, months=None, columns=None):
+    """
+    스냅샷을 NumPy 배열 dict로 읽습니다.
+
+    Args:
+        months (list): 읽을 "YYYY-MM" 목록 (None이면 전체)
+        columns (list): 읽을 컬럼 (None이면 전체)
+
+    Returns:
+        dict: 컬럼 이름 → ndarray ("month" 컬럼 포함)
+    """
+    names = columns or SCHEMA.names
+    tables = []
+    for month_dir in sorted(glob.glob(os.path.join(snapshot_dir, "month=*"))):
+        month = month_dir.rsplit("=", 1)[-1]
+        if months and month not in months:
+            continue
+        for path in sorted(glob.glob(os.path.join(month_dir, "part-*.parquet"))):
+            table = pq.read_table(path, columns=names, schema=SCHEMA)
+            tables.append(table.append_column("month", pa.array([month] * table.num_rows, pa.string())))
+    if not tables:
+        return {name: np.array([]) for name in list(names) + ["month"]}
+    table = pa.concat_tables(tables)
+    return {name: table.column(name).to_numpy(zero_copy_only=False) for name in table.column_names}
+
+
+def group_stats(keys, values):
+    """
+    키별 건수/평균/최소/최대를 한 번의 벡터 연산으로 계산합니다.
+
+    Returns:
+        list: [{"key", "count", "mean", "min", "max"}] (키 순서)
+    """
+    if len(keys) == 0:
+        return []
+    labels, inverse = np.unique(keys, return_inverse=True)
+    values = np.asarray(values, dtype=np.float64)
+    counts = np.bincount(inverse, minlength=len(labels))
+    sums = np.bincount(inverse, weights=values, minlength=len(labels))
+    mins = np.full(len(labels), np.inf)
+    maxs = np.full(len(labels), -np.inf)
+    np.minimum.at(mins, inverse, values)
+    np.maximum.at(maxs, inverse, values)
+    return [
+        {"key": str(label), "count": int(c), "mean": round(float(s / c), 1), "min": int(lo), "max": int(hi)}
+        for label, c, s, lo, hi in zip(labels, counts, sums, mins, maxs)
+    ]
+
+
+def term_summary(columns):
+    """
+    학기 전체 요약: 단원별, 난이도별, 월별, 활동별 최종 점수 통계.
+
+    Returns:
+        dict: {"total", "by_unit", "by_difficulty", "by_month", "by_mission"}
+    """
+    total = columns["total_score"]
+    return {
+        "total": int(len(total)),
+        "by_unit": group_stats(columns["unit"], total),
+        "by_difficulty": group_stats(columns["difficulty"], total),
+        "by_month": group_stats(columns["month"], total),
+        "by_mission": group_stats(columns["mission_id"], total),
+    }
+
+
+def print_summary(summary):
+    print(f"제출 {summary['total']}건")
+    for title, key in (("단원", "by_unit"), ("난이도", "by_difficulty"), ("월", "by_month"), ("활동", "by_mission")):
+        print(f"\n[{title}별]")
+        for g in summary[key]:
+            print(f"  {g['key'] or '(없음)':<24}{g['count']:>6}건  평균 {g['mean']:>5}  ({g['min']}~{g['max']})")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "summary"
+    if command == "export":
+        from firebase_config import get_firestore_client
+        print(f"{export_new_submissions(get_firestore_client())}건 추가")
+    elif command == "compact":
+        compact()
+    elif command == "rebuild":
+        from firebase_config import get_firestore_client
+        print(f"{rebuild(get_firestore_client())}건으로 다시 생성")
+    elif command == "summary":
+        print_summary(term_summary(load_columns()))
+    else:
+        print(__doc__)
@@ -0,0 +1,149 @@
+"""
+쉐도잉 녹음 트랜스코딩 모듈
+업로드 전에 학생 녹음을 ffmpeg로 모노 Opus(OGG) 또는 16kHz FLAC으로 변환하고,
+앞뒤 무음을 잘라낸 뒤 파형 미리보기(peak 목록)를 만듭니다.
+
+- 변환은 CPU를 많이 쓰므로 크기가 제한된 프로세스 풀에서 실행 (Streamlit 요청 스레드와 GIL을 막지 않음)
+- 코덱 선택: READFIT_AUDIO_CODEC=opus|flac (기본 opus)
+- ffmpeg가 없으면 변환 없이 원본을 그대로 업로드 (Streamlit Cloud는 packages.txt로 설치)
+"""
+
+import multiprocessing
+import os
+import shutil
+import subprocess
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+FFMPEG = os.getenv("FFMPEG_BINARY") or shutil.which("ffmpeg")
+
+CODECS = {
+    "opus": {
+        "ext": "ogg",
+        "content_type": "audio/ogg",
+        "args": ["-ac", "1", "-ar", "16000", "-c:a", "libopus", "-b:a", "24k", "-application", "voip"],
+    },
+    "flac": {
+        "ext": "flac",
+        "content_type": "audio/flac",
+        "args": ["-ac", "1", "-ar", "16000", "-sample_fmt", "s16", "-c:a", "flac"],
+    },
+}
+DEFAULT_CODEC = os.getenv("READFIT_AUDIO_CODEC", "opus")
+
+SILENCE_THRESHOLD_DB = -45
+PREVIEW_SAMPLE_RATE = 8000
+WAVEFORM_POINTS = 120
+TRANSCODE_TIMEOUT_SECONDS = 120
+
+# 앞쪽 무음 제거 → 뒤집기 → 다시 앞쪽(원래 끝) 무음 제거 → 원래 방향으로
+_TRIM = f"silenceremove=start_periods=1:start_silence=0.1:start_threshold={SILENCE_THRESHOLD_DB}dB"
+TRIM_FILTER = f"{_TRIM},areverse,{_TRIM},areverse"
+
+
+def ffmpeg_available():
+    return bool(FFMPEG)
+
+
+def _run_ffmpeg(args, capture=False):
+    result = subprocess.run(
+        [FFMPEG, "-nostdin", "-hide_banner", "-loglevel", "error", "-y", *args],
+        stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        timeout=TRANSCODE_TIMEOUT_SECONDS,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg 실패: {result.stderr.decode(errors='replace').strip()[:300]}")
+    return result.stdout
+
+
+def decode_pcm(path, sample_rate=PREVIEW_SAMPLE_RATE):
+    """오디오 파일을 모노 16비트 PCM 샘플(array('h'))로 디코딩"""
+    raw = _run_ffmpeg(["-i", path, "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "-"], capture=True)
+    samples = array("h")
+    samples.frombytes(raw[: len(raw) - len(raw) % 2])
+    return samples
+
+
+def waveform_peaks(samples, points=WAVEFORM_POINTS):
+    """
+    구간별 최대 진폭을 0~100 정수로 정규화한 파형 미리보기.
+
+    Returns:
+        list: 길이 points 이하의 정수 목록 (샘플이 없으면 빈 목록)
+    """
+    if not samples:
+        return []
+    points = min(points, len(samples))
+    step = len(samples) / points
+    peaks = []
+    for i in range(points):
+        window = samples[int(i * step):int((i + 1) * step)] or samples[int(i * step):int(i * step) + 1]
+        peaks.append(max(max(window), -min(window)))
+    top = max(peaks) or 1
+    return [round(p * 100 / top) for p in peaks]
+
+
+def transcode_file(src_path, codec=DEFAULT_CODEC):
+    """
+    녹음 파일을 무음 제거 후 압축 코덱으로 변환합니다 (프로세스 풀 워커에서 실행).
+
+    Args:
+        src_path (str): 원본 파일 경로
+        codec (str): "opus" 또는 "flac"
+
+    Returns:
+        dict: {"path", "size", "content_type", "ext", "codec", "duration_seconds", "waveform"}
+    """
+    spec = CODECS[codec]
+    out_path = f"{os.path.splitext(src_path)[0]}.{codec}.{spec['ext']}"
+    _run_ffmpeg(["-i", src_path, "-af", TRIM_FILTER, *spec["args"], out_path])
+    samples = decode_pcm(out_path)
+    return {
+        "path": out_path,
+        "size": os.path.getsize(out_path),
+        "content_type": spec["content_type"],
+        "ext": spec["ext"],
+        "codec": codec,
+        "duration_seconds": round(len(samples) / PREVIEW_SAMPLE_RATE, 2),
+        "waveform": waveform_peaks(samples),
+    }
+
+
+class Transcoder:
+    """AudioUploader의 업로드 전 단계로 등록하는 변환기 (프로세스 풀은 첫 사용 시 생성)"""
+
+    def __init__(self, codec=DEFAULT_CODEC, max_workers=None):
+        if codec not in CODECS:
+            raise ValueError(f"지원하지 않는 코덱: {codec}")
+        self.codec = codec
+        self.max_workers = max_workers or max(1, min(2, (os.cpu_count() or 2) - 1))
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            # 스레드가 많은 Streamlit 서버 프로세스를 fork하면 잠긴 락이 복제되어 멈출 수 있으므로 spawn 사용
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def __call__(self, job):
+        """업로드할 파일을 변환 결과로 바꾸는 작업 필드 갱신 dict 반환"""
+        result = self._get_pool().submit(transcode_file, job["spool_path"], self.codec).result(
+            timeout=TRANSCODE_TIMEOUT_SECONDS * 2
+        )
+        blob_dir = job["blob_path"].rsplit("/", 1)[0]
+        return {
+            "spool_path": result["path"],
+            "size": result["size"],
+            "content_type": result["content_type"],
+            "blob_path": f"{blob_dir}/{job['sha256']}.{result['ext']}",
+            "doc_fields": {
+                "codec": result["codec"],
+                "original_size_bytes": job["size"],
+                "duration_seconds": result["duration_seconds"],
+                "waveform": result["waveform"],
+            },
+        }
@@ -0,0 +1,395 @@
+"""
+쉐도잉 녹음 업로드 파이프라인
+학생 녹음 파일을 요청 스레드에서는 청크 단위로 로컬 스풀 파일에 기록(동시에 SHA-256 계산)만 하고,
+Firebase Storage 업로드는 백그라운드 스레드 풀에서 재개 가능한(resumable) 청크 업로드로 완료합니다.
+
+- 파일 이름은 내용 해시 기반 → 같은 녹음을 다시 제출해도 한 번만 저장 (중복 제거)
+- 업로드 세션 URL을 스풀 디렉터리에 기록 → 서버 재시작 후에도 이어서 업로드
+- 업로드 전 단계(pre-upload hook)에서 변환(트랜스코딩) 등으로 업로드할 파일을 바꿀 수 있음
+- 업로드 완료 시 readfit_audio_submissions 문서를 기록
+- MAX_JOB_ATTEMPTS번 실패한 작업은 스풀 파일을 지우고 더 이상 재개하지 않음
+- 작업 실행 중에는 작업 기록의 잠금 파일(.lock)에 flock을 걸어 두므로, 스풀 디렉터리를 공유하는
+  다른 워커 프로세스가 재개 시 같은 작업을 동시에 실행하지 않음 (프로세스가 죽으면 잠금은 자동 해제)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경: 워커 하나만 쓰므로 잠금 없이 동작
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024  # GCS 재개 업로드 청크는 256KiB의 배수여야 함
+MAX_CHUNK_RETRIES = 5
+MAX_JOB_ATTEMPTS = 3  # 작업 실행 횟수 한도 (서버 재시작 후 재개 포함) - 넘으면 스풀 파일 삭제
+SPOOL_DIR = os.getenv("READFIT_AUDIO_SPOOL", os.path.join(tempfile.gettempdir(), "readfit_audio"))
+SUBMISSIONS_COLLECTION = "readfit_audio_submissions"
+SESSION_EXPIRED_STATUSES = (404, 410)
+
+CONTENT_TYPES = {
+    "wav": "audio/wav",
+    "mp3": "audio/mpeg",
+    "m4a": "audio/mp4",
+    "ogg": "audio/ogg",
+    "opus": "audio/ogg",
+    "flac": "audio/flac",
+    "webm": "audio/webm",
+}
+
+
+class UploadSessionExpired(RuntimeError):
+    """재개 업로드 세션 URL이 더 이상 유효하지 않음 (새 세션으로 처음부터 다시 올려야 함)"""
+
+
+def content_type_for(filename):
+    ext = os.path.splitext(filename or "")[1].lstrip(".").lower()
+    return CONTENT_TYPES.get(ext, "application/octet-stream"), ext or "bin"
+
+
+def spool_stream(file_obj, spool_dir=SPOOL_DIR, chunk_size=CHUNK_SIZE):
+    """
+    파일 객체를 청크 단위로 임시 스풀 파일(.part)에 복사하며 SHA-256을 계산합니다.
+
+    Returns:
+        tuple: (임시 스풀 파일 경로, sha256 hex, 바이트 수)
+
+    Raises:
+        ValueError: 빈 파일인 경우 (스풀 파일을 만들지 않음)
+    """
+    if hasattr(file_obj, "seek"):
+        file_obj.seek(0)
+    chunk = file_obj.read(chunk_size)
+    if not chunk:
+        raise ValueError("빈 녹음 파일입니다.")
+    os.makedirs(spool_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=spool_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk:
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+                chunk = file_obj.read(chunk_size)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest(), size
+
+
+class AudioUploader:
+    """백그라운드 재개 업로드 작업 관리자 (프로세스 전역 1개)"""
+
+    def __init__(self, get_bucket, get_db, spool_dir=SPOOL_DIR, max_workers=4):
+        self.get_bucket = get_bucket
+        self.get_db = get_db
+        self.spool_dir = spool_dir
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="audio-upload")
+        self._lock = threading.Lock()
+        self._jobs = {}  # 작업 ID(학습 코드 + 내용 해시) -> 상태 dict
+        self._claims = {}  # 작업 ID -> 잠금 파일 디스크립터 (이 프로세스가 실행 중인 작업)
+        self._pre_upload_hooks = []
+        self._post_upload_hooks = []
+
+    def add_pre_upload_hook(self, hook):
+        """
+        업로드 전에 호출될 함수 등록.
+        hook(job) → 작업 필드 갱신 dict 또는 None.
+        spool_path/size/content_type/blob_path를 바꾸면 바뀐 파일이 업로드되고,
+        "doc_fields"는 제출 문서에 병합됩니다. 실패하면 원본 파일을 그대로 업로드합니다.
+        """
+        self._pre_upload_hooks.append(hook)
+
+    def add_post_upload_hook(self, hook):
+        """업로드 완료 후 호출될 함수 등록. hook(job, spool_path) → 문서에 병합할 dict 또는 None"""
+        self._post_upload_hooks.append(hook)
+
+    def _job_record_path(self, job_id):
+        return os.path.join(self.spool_dir, f"{job_id}.json")
+
+    def _lock_path(self, job_id):
+        return os.path.join(self.spool_dir, f"{job_id}.lock")
+
+    def _claim(self, job_id):
+        """
+        작업 기록에 배타 잠금을 겁니다 (self._lock을 잡은 상태에서 호출).
+
+        Returns:
+            bool: 잠금을 얻었으면 True (다른 프로세스가 실행 중이면 False)
+        """
+        if fcntl is None or job_id in self._claims:
+            return True
+        fd = os.open(self._lock_path(job_id), os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._claims[job_id] = fd
+        return True
+
+    def _release(self, job_id):
+        with self._lock:
+            fd = self._claims.pop(job_id, None)
+        if fd is not None:
+            os.close(fd)
+
+    def _save_job(self, job):
+        path = self._job_record_path(job["job_id"])
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def submit(self, file_obj, filename, access_code, student_name):
+        """
+        녹음 파일을 스풀에 기록하고 백그라운드 업로드를 예약합니다 (요청 스레드는 곧바로 반환).
+
+        Returns:
+            str: 작업 ID (학습 코드 + 내용 SHA-256, 제출 문서 ID와 동일)
+
+        Raises:
+            ValueError: 빈 파일인 경우
+        """
+        tmp_path, sha256, size = spool_stream(file_obj, self.spool_dir)
+        job_id = f"{access_code}_{sha256[:20]}"
+        spool_path = os.path.join(self.spool_dir, f"{job_id}.audio")
+        content_type, ext = content_type_for(filename)
+        job = {
+            "job_id": job_id,
+            "sha256": sha256,
+            "size": size,
+            "content_type": content_type,
+            "blob_path": f"student_audio/{access_code}/{sha256}.{ext}",
+            "access_code": access_code,
+            "student_name": student_name,
+            "original_filename": filename,
+            "spool_path": spool_path,
+            "source_path": spool_path,
+            "doc_fields": {},
+            "prepared": False,
+            "session_url": None,
+            "attempts": 0,
+            "status": "queued",
+            "submitted_at": datetime.now().isoformat(),
+        }
+        with self._lock:
+            existing = self._jobs.get(job_id)
+            # 실패한 작업만 다시 예약 (변환 중인 작업의 스풀 파일을 덮어쓰지 않도록 나머지는 모두 진행 중으로 취급)
+            # 같은 녹음을 다른 워커가 처리 중이어도 건너뜀
+            if existing and existing["status"] != "failed" or not self._claim(job_id):
+                os.unlink(tmp_path)
+                return job_id
+            self._jobs[job_id] = job
+        os.replace(tmp_path, spool_path)
+        self._save_job(job)
+        self._executor.submit(self._run, job)
+        return job_id
+
+    def status(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def resume_pending(self):
+        """스풀 디렉터리에 남은 미완료 작업을 다시 예약합니다 (서버 시작 시 호출)."""
+        if not os.path.isdir(self.spool_dir):
+            return 0
+        resumed = 0
+        for name in os.listdir(self.spool_dir):
+            if not name.endswith(".json"):
+                continue
+            job_id = name[:-len(".json")]
+            with self._lock:
+                if job_id in self._jobs or not self._claim(job_id):
+                    continue
+            # 잠금을 얻은 뒤에 기록을 읽음 (그 전에 다른 워커가 갱신/완료했을 수 있음)
+            try:
+                with open(os.path.join(self.spool_dir, name), encoding="utf-8") as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                # 다른 워커가 이미 완료해 기록을 지운 경우 - 방금 만든 잠금 파일도 정리
+                if not os.path.exists(os.path.join(self.spool_dir, name)):
+                    try:
+                        os.unlink(self._lock_path(job_id))
+                    except OSError:
+                        pass
+                self._release(job_id)
+                continue
+            if job.get("status") == "done" or not os.path.exists(job.get("spool_path", "")):
+                self._release(job_id)
+                continue
+            if job.get("attempts", 0) >= MAX_JOB_ATTEMPTS:
+                self._cleanup(job)
+                self._release(job_id)
+                continue
+            with self._lock:
+                job["status"] = "queued"
+                self._jobs[job_id] = job
+            self._executor.submit(self._run, job)
+            resumed += 1
+        return resumed
+
+    def _update(self, job, **fields):
+        with self._lock:
+            job.update(fields)
+        self._save_job(job)
+
+    def _run(self, job):
+        try:
+            self._execute(job)
+        finally:
+            self._release(job["job_id"])
+
+    def _execute(self, job):
+        self._update(job, attempts=job.get("attempts", 0) + 1)
+        try:
+            if not job.get("prepared"):
+                self._update(job, status="processing")
+                self._prepare(job)
+            self._update(job, status="uploading")
+            bucket = self.get_bucket()
+            blob = bucket.blob(job["blob_path"])
+            if not blob.exists():
+                self._upload_resumable(blob, job)
+            doc_fields = dict(job.get("doc_fields") or {})
+            for hook in self._post_upload_hooks:
+                try:
+                    doc_fields.update(hook(job, job["spool_path"]) or {})
+                except Exception as e:
+                    logger.warning("업로드 후처리 실패 (%s): %s", job["job_id"], e)
+            self._update(job, doc_fields=doc_fields)
+            self._save_submission(job)
+            self._update(job, status="done", finished_at=datetime.now().isoformat())
+            self._cleanup(job)
+        except Exception as e:
+            logger.warning("오디오 업로드 실패 (%s, %d회째): %s", job["job_id"], job["attempts"], e)
+            self._update(job, status="failed", error=f"{type(e).__name__}: {e}")
+            if job["attempts"] >= MAX_JOB_ATTEMPTS:
+                # 재시작할 때마다 다시 시도하지 않도록 스풀 파일과 작업 기록 삭제
+                self._cleanup(job)
+
+    def _prepare(self, job):
+        """업로드 전 단계 실행 (재시작 후 재개 시에는 건너뜀)"""
+        for hook in self._pre_upload_hooks:
+            try:
+                updates = dict(hook(job) or {})
+            except Exception as e:
+                logger.warning("업로드 전처리 실패 (%s): %s", job["job_id"], e)
+                continue
+            doc_fields = dict(job.get("doc_fields") or {}, **updates.pop("doc_fields", {}))
+            self._update(job, doc_fields=doc_fields, **updates)
+        self._update(job, prepared=True)
+
+    def _upload_resumable(self, blob, job):
+        """GCS 재개 업로드 프로토콜로 청크 전송 (세션 URL 재사용으로 중단 지점부터 재개)"""
+        try:
+            self._send_chunks(blob, job)
+        except UploadSessionExpired:
+            # 세션이 만료됨 (GCS 재개 세션은 약 1주일 유지) - 새 세션을 만들어 처음부터 다시 전송
+            self._update(job, session_url=None)
+            self._send_chunks(blob, job)
+
+    def _send_chunks(self, blob, job):
+        total = job["size"]
+        if not job.get("session_url"):
+            session_url = blob.create_resumable_upload_session(content_type=job["content_type"], size=total)
+            self._update(job, session_url=session_url)
+        session_url = job["session_url"]
+        offset = self._query_offset(session_url, total)
+        http = requests.Session()
+        with open(job["spool_path"], "rb") as f:
+            retries = 0
+            while offset is not None and offset < total:
+                f.seek(offset)
+                chunk = f.read(CHUNK_SIZE)
+                end = offset + len(chunk) - 1
+                try:
+                    response = http.put(
+                        session_url,
+                        data=chunk,
+                        headers={"Content-Range": f"bytes {offset}-{end}/{total}"},
+                        timeout=(5, 60),
+                    )
+                except requests.RequestException:
+                    response = None
+                if response is not None and response.status_code in (200, 201):
+                    return
+                if response is not None and response.status_code == 308:
+                    offset = _offset_from_range(response.headers.get("Range"))
+                    retries = 0
+                    continue
+                if response is not None and response.status_code in SESSION_EXPIRED_STATUSES:
+                    raise UploadSessionExpired(f"업로드 세션 만료 (status={response.status_code})")
+                retries += 1
+                if retries > MAX_CHUNK_RETRIES:
+                    code = response.status_code if response is not None else "network"
+                    raise RuntimeError(f"청크 업로드 실패 (offset={offset}, status={code})")
+                time.sleep(min(2 ** retries, 30))
+                offset = self._query_offset(session_url, total)
+
+    def _query_offset(self, session_url, total):
+        """
+        업로드 세션에 이미 저장된 바이트 수 조회 (완료된 세션이면 None)
+
+        Raises:
+            UploadSessionExpired: 세션이 만료/삭제된 경우 (404/410)
+        """
+        response = requests.put(
+            session_url, headers={"Content-Range": f"bytes */{total}"}, timeout=(5, 30)
+        )
+        if response.status_code in (200, 201):
+            return None
+        if response.status_code == 308:
+            return _offset_from_range(response.headers.get("Range"))
+        if response.status_code in SESSION_EXPIRED_STATUSES:
+            raise UploadSessionExpired(f"업로드 세션 만료 (status={response.status_code})")
+        raise RuntimeError(f"업로드 세션 조회 실패 (status={response.status_code})")
+
+    def _save_submission(self, job):
+        db = self.get_db()
+        data = {
+            "access_code": job["access_code"],
+            "student_name": job["student_name"],
+            "blob_path": job["blob_path"],
+            "content_type": job["content_type"],
+            "size_bytes": job["size"],
+            "sha256": job["sha256"],
+            "submitted_at": datetime.fromisoformat(job["submitted_at"]),
+            "score": None,
+        }
+        data.update(job.get("doc_fields") or {})
+        db.collection(SUBMISSIONS_COLLECTION).document(job["job_id"]).set(data, merge=True)
+
+    def _cleanup(self, job):
+        paths = {
+            job["spool_path"],
+            job.get("source_path") or job["spool_path"],
+            self._job_record_path(job["job_id"]),
+            self._lock_path(job["job_id"]),
+        }
+        for path in paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+def _offset_from_range(range_header):
+    """308 응답의 Range 헤더(bytes=0-N)에서 다음 업로드 시작 위치 계산"""
+    if not range_header:
+        return 0
+    return int(range_header.rsplit("-", 1)[-1]) + 1
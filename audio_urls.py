@@ -0,0 +1,91 @@
+"""
+저장된 녹음 재생용 서명 URL 캐시
+버킷을 공개하지 않고 V4 서명 URL로 녹음을 재생합니다.
+
+- 서비스 계정 키로 로컬에서 서명 → URL 생성에 네트워크 호출이 없음 (학급 전체 N개도 즉시 생성)
+- blob별로 만료 직전까지 같은 URL을 재사용 (브라우저 캐시도 그대로 활용)
+- GCS는 서명 URL에 대해 HTTP Range 요청을 지원하므로, st.audio에 바이트 대신 URL을 넘기면
+  브라우저가 탐색(scrub)한 구간만 부분 요청으로 받아옴
+"""
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+logger = logging.getLogger(__name__)
+
+SIGNED_URL_TTL = timedelta(hours=1)
+# 만료까지 이만큼 남으면 새로 서명 (재생 도중 만료 방지)
+REFRESH_MARGIN_SECONDS = 600
+MAX_CACHED_URLS = 4096
+
+
+class SignedUrlCache:
+    """blob 경로별 V4 서명 URL 캐시 (프로세스 전역 1개)"""
+
+    def __init__(self, get_bucket, ttl=SIGNED_URL_TTL, refresh_margin=REFRESH_MARGIN_SECONDS):
+        self.get_bucket = get_bucket
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._urls = {}  # (blob_path, content_type) -> (url, expires_at)
+        self._warned = False
+
+    def _sign(self, blob_path, content_type):
+        blob = self.get_bucket().blob(blob_path)
+        return blob.generate_signed_url(
+            version="v4",
+            expiration=self.ttl,
+            method="GET",
+            response_type=content_type,
+        )
+
+    def _prune(self, now):
+        expired = [key for key, (_, expires_at) in self._urls.items() if expires_at - self.refresh_margin <= now]
+        for key in expired:
+            del self._urls[key]
+        if len(self._urls) >= MAX_CACHED_URLS:
+            # 가장 먼저 만료되는 항목부터 제거
+            for key, _ in sorted(self._urls.items(), key=lambda item: item[1][1])[: len(self._urls) // 4]:
+                del self._urls[key]
+
+    def url(self, blob_path, content_type=None):
+        """
+        재생용 서명 URL 반환 (캐시된 URL이 충분히 남아 있으면 재사용).
+
+        Returns:
+            str: 서명 URL (서명할 수 없는 자격 증명이면 None)
+        """
+        if not blob_path:
+            return None
+        key = (blob_path, content_type)
+        now = time.time()
+        with self._lock:
+            cached = self._urls.get(key)
+            if cached and cached[1] - self.refresh_margin > now:
+                return cached[0]
+        try:
+            signed = self._sign(blob_path, content_type)
+        except Exception as e:
+            # 에뮬레이터/익명 자격 증명 등 개인 키가 없으면 서명 불가
+            if not self._warned:
+                logger.warning("서명 URL 생성 실패: %s", e)
+                self._warned = True
+            return None
+        with self._lock:
+            self._prune(now)
+            self._urls[key] = (signed, now + self.ttl.total_seconds())
+        return signed
+
+    def urls(self, items):
+        """
+        여러 녹음의 서명 URL을 한 번에 생성합니다.
+
+        Args:
+            items (list): (blob_path, content_type) 튜플 목록
+
+        Returns:
+            dict: blob_path -> 서명 URL 또는 None
+        """
+        return {blob_path: self.url(blob_path, content_type) for blob_path, content_type in items}
@@ -0,0 +1,174 @@
+"""
+외부 API 서킷 브레이커 모듈
+OpenAI 등 외부 호출을 엔드포인트별로 감시하여, 장애(오류율/지연 증가) 시
+호출을 즉시 차단하고 폴백으로 넘어가도록 합니다.
+
+상태:
+- closed: 정상. 최근 호출 결과를 시간 창(window) 안에서 집계
+- open: 차단. cooldown 동안 호출하지 않고 즉시 CircuitOpenError 발생
+- half_open: cooldown 이후 한 번의 시험 호출만 허용, 성공하면 closed로 복귀
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class CircuitOpenError(Exception):
+    """서킷이 열려 있어 호출이 차단되었을 때 발생합니다."""
+
+
+class CircuitBreaker:
+    """엔드포인트 하나에 대한 오류율/지연 기반 서킷 브레이커"""
+
+    def __init__(self, name, window_seconds=60, min_calls=5, error_rate_threshold=0.5,
+                 slow_call_seconds=20.0, slow_rate_threshold=0.5, cooldown_seconds=30,
+                 failure_errors=(Exception,)):
+        self.name = name
+        # 장애로 집계할 예외 (그 밖의 예외는 서버가 응답한 것이므로 성공으로 집계)
+        self.failure_errors = failure_errors
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate_threshold = slow_rate_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self._calls = deque()  # (timestamp, ok, latency)
+        self._state = "closed"
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._last_error = None
+
+    def _trim(self, now):
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def _open(self, now):
+        self._state = "open"
+        self._opened_at = now
+        self._probe_in_flight = False
+
+    def allow_request(self):
+        """호출 가능 여부. half_open에서는 시험 호출 한 건만 허용합니다."""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == "open":
+                if now - self._opened_at < self.cooldown_seconds:
+                    return False
+                self._state = "half_open"
+                self._probe_in_flight = False
+            if self._state == "half_open":
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def is_open(self):
+        """쿨다운 중인 열린 상태인지 (상태를 바꾸지 않는 사전 확인용)"""
+        with self._lock:
+            return self._state == "open" and time.monotonic() - self._opened_at < self.cooldown_seconds
+
+    def record_success(self, latency):
+        with self._lock:
+            now = time.monotonic()
+            if self._state == "half_open":
+                self._state = "closed"
+                self._probe_in_flight = False
+                self._calls.clear()
+            self._calls.append((now, True, latency))
+            self._evaluate(now)
+
+    def record_failure(self, latency, error=None):
+        with self._lock:
+            now = time.monotonic()
+            self._last_error = f"{type(error).__name__}: {error}" if error else None
+            if self._state == "half_open":
+                self._open(now)
+                return
+            self._calls.append((now, False, latency))
+            self._evaluate(now)
+
+    def _evaluate(self, now):
+        self._trim(now)
+        total = len(self._calls)
+        if self._state != "closed" or total < self.min_calls:
+            return
+        errors = sum(1 for _, ok, _ in self._calls if not ok)
+        slow = sum(1 for _, _, latency in self._calls if latency >= self.slow_call_seconds)
+        if errors / total >= self.error_rate_threshold or slow / total >= self.slow_rate_threshold:
+            self._open(now)
+
+    def call(self, func, *args, **kwargs):
+        """
+        func를 서킷 브레이커 보호 아래에서 실행합니다.
+
+        Raises:
+            CircuitOpenError: 서킷이 열려 있어 호출하지 않은 경우
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"{self.name} 서킷이 열려 있어 호출을 건너뜁니다.")
+        started = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except self.failure_errors as e:
+            self.record_failure(time.monotonic() - started, e)
+            raise
+        except Exception:
+            # 잘못된 요청/인증/콘텐츠 정책 오류 등은 엔드포인트 장애가 아님
+            self.record_success(time.monotonic() - started)
+            raise
+        except BaseException:
+            # KeyboardInterrupt, Streamlit 리런 중단 등: 결과 없이 끝났으므로 시험 호출 자리만 반납
+            self._release_probe()
+            raise
+        self.record_success(time.monotonic() - started)
+        return result
+
+    def _release_probe(self):
+        with self._lock:
+            if self._state == "half_open":
+                self._probe_in_flight = False
+
+    def status(self):
+        """대시보드 표시용 상태 요약"""
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            total = len(self._calls)
+            errors = sum(1 for _, ok, _ in self._calls if not ok)
+            latencies = sorted(latency for _, _, latency in self._calls)
+            state = self._state
+            if state == "open" and now - self._opened_at >= self.cooldown_seconds:
+                state = "half_open"
+            return {
+                "name": self.name,
+                "state": state,
+                "calls": total,
+                "error_rate": round(errors / total, 3) if total else 0.0,
+                "p50_latency": round(latencies[len(latencies) // 2], 2) if latencies else None,
+                "retry_in": max(0, round(self.cooldown_seconds - (now - self._opened_at)))
+                if state == "open" else 0,
+                "last_error": self._last_error,
+            }
+
+
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name, **options):
+    """이름별 공유 서킷 브레이커 (프로세스 전역). options는 최초 생성 시에만 적용됩니다."""
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, **options)
+            _breakers[name] = breaker
+        return breaker
+
+
+def all_breaker_status():
+    """등록된 모든 서킷 브레이커의 상태 목록"""
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return [b.status() for b in breakers]
@@ -0,0 +1,144 @@
+"""
+학급 통계 엔진
+학습 코드 하나의 제출 점수(quiz_score, activity_score, total_score, quiz_correct)를
+NumPy 배열로 받아 분포, 백분위수, 활동별 비교, 점수 히스토그램을 한 번에 계산합니다.
+
+결과는 (학습 코드, 데이터 버전) 단위로 프로세스 메모리에 캐시되므로
+제출이 바뀌지 않은 동안 교사 대시보드 리런은 제출을 다시 읽거나 계산하지 않습니다.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+SCORE_FIELDS = ("quiz_score", "activity_score", "total_score")
+PERCENTILES = (10, 25, 50, 75, 90)
+HISTOGRAM_BIN_WIDTH = 10  # 0~9, 10~19, ..., 90~100 (100점은 마지막 구간)
+MAX_CACHED_CLASSES = 256
+
+_cache = OrderedDict()  # access_code -> (version, stats)
+_cache_lock = threading.Lock()
+
+
+def data_version(count, updated_at):
+    """
+    학습 코드의 데이터 버전 (제출 수 + 문항 집계 문서 수정 시각).
+    제출 문서를 모두 읽지 않고 집계(count) 조회와 집계 문서 1건만으로 만듭니다.
+    새 제출은 집계 문서를 증분하고, 재채점(regrade.py)은 집계 문서를 갱신하므로 둘 다 버전이 바뀝니다.
+    """
+    return (count, str(updated_at) if updated_at else None)
+
+
+def build_arrays(records):
+    """
+    제출 dict 목록을 통계 입력 배열로 변환합니다.
+
+    Returns:
+        dict: scores (3, n) float 배열, quiz_correct (n,), quiz_total (n,), mission_id (n,) 문자열
+    """
+    n = len(records)
+    scores = np.zeros((len(SCORE_FIELDS), n), dtype=np.float64)
+    for row, field in enumerate(SCORE_FIELDS):
+        scores[row] = [r.get(field) or 0 for r in records]
+    return {
+        "scores": scores,
+        "quiz_correct": np.array([r.get("quiz_correct") or 0 for r in records], dtype=np.int64),
+        "quiz_total": np.array([r.get("quiz_total") or 0 for r in records], dtype=np.int64),
+        "mission_id": np.array([r.get("mission_id") or "unknown" for r in records], dtype=object),
+    }
+
+
+def compute_stats(arrays):
+    """
+    학급 통계 계산.
+
+    Args:
+        arrays (dict): build_arrays()의 결과
+
+    Returns:
+        dict: {
+            "count": int,
+            "fields": {field: {"mean", "std", "min", "max", "percentiles": {p: 값}}},
+            "histogram": {"bins": [구간 라벨], field: [개수]},
+            "quiz_correct": {정답 수: 인원},
+            "by_mission": [{"mission_id", "count", field별 평균}],
+        }
+    """
+    scores = arrays["scores"]
+    n = scores.shape[1]
+    n_bins = 100 // HISTOGRAM_BIN_WIDTH
+    bin_labels = [f"{i * HISTOGRAM_BIN_WIDTH}~{(i + 1) * HISTOGRAM_BIN_WIDTH - 1}" for i in range(n_bins)]
+    bin_labels[-1] = f"{(n_bins - 1) * HISTOGRAM_BIN_WIDTH}~100"
+    if n == 0:
+        return {
+            "count": 0,
+            "fields": {},
+            "histogram": {"bins": bin_labels, **{field: [0] * n_bins for field in SCORE_FIELDS}},
+            "quiz_correct": {},
+            "by_mission": [],
+        }
+
+    means = scores.mean(axis=1)
+    stds = scores.std(axis=1)
+    mins = scores.min(axis=1)
+    maxs = scores.max(axis=1)
+    pct = np.percentile(scores, PERCENTILES, axis=1)  # (len(PERCENTILES), 3)
+
+    # 세 점수 필드의 히스토그램을 bincount 한 번으로 계산 (필드별로 구간 인덱스를 이동)
+    bins = np.clip(scores // HISTOGRAM_BIN_WIDTH, 0, n_bins - 1).astype(np.int64)
+    offsets = np.arange(len(SCORE_FIELDS))[:, None] * n_bins
+    hist = np.bincount((bins + offsets).ravel(), minlength=len(SCORE_FIELDS) * n_bins).reshape(len(SCORE_FIELDS), n_bins)
+
+    correct_values, correct_counts = np.unique(arrays["quiz_correct"], return_counts=True)
+
+    missions, inverse = np.unique(arrays["mission_id"], return_inverse=True)
+    mission_counts = np.bincount(inverse, minlength=len(missions))
+    by_mission = []
+    mission_means = [np.bincount(inverse, weights=scores[row], minlength=len(missions)) / mission_counts
+                     for row in range(len(SCORE_FIELDS))]
+    for i, mission in enumerate(missions):
+        entry = {"mission_id": str(mission), "count": int(mission_counts[i])}
+        for row, field in enumerate(SCORE_FIELDS):
+            entry[field] = round(float(mission_means[row][i]), 1)
+        by_mission.append(entry)
+
+    fields = {}
+    for row, field in enumerate(SCORE_FIELDS):
+        fields[field] = {
+            "mean": round(float(means[row]), 1),
+            "std": round(float(stds[row]), 1),
+            "min": int(mins[row]),
+            "max": int(maxs[row]),
+            "percentiles": {p: round(float(pct[i, row]), 1) for i, p in enumerate(PERCENTILES)},
+        }
+    return {
+        "count": n,
+        "fields": fields,
+        "histogram": {"bins": bin_labels, **{field: hist[row].tolist() for row, field in enumerate(SCORE_FIELDS)}},
+        "quiz_correct": {int(v): int(c) for v, c in zip(correct_values, correct_counts)},
+        "by_mission": by_mission,
+    }
+
+
+def get_class_stats(access_code, version, load_records):
+    """
+    캐시된 학급 통계 반환. 버전이 바뀌었을 때만 load_records()를 호출해 다시 계산합니다.
+
+    Args:
+        access_code (str): 학습 코드
+        version: data_version() 결과
+        load_records (callable): 제출 dict 목록을 돌려주는 함수 (캐시 미스 시에만 호출)
+    """
+    with _cache_lock:
+        cached = _cache.get(access_code)
+        if cached and cached[0] == version:
+            _cache.move_to_end(access_code)
+            return cached[1]
+    stats = compute_stats(build_arrays(load_records()))
+    with _cache_lock:
+        _cache[access_code] = (version, stats)
+        _cache.move_to_end(access_code)
+        while len(_cache) > MAX_CACHED_CLASSES:
+            _cache.popitem(last=False)
+    return stats
@@ -0,0 +1,90 @@
+"""
+이미지 탐정 오답 유형 집계
+학생이 고른 문장의 유형(result_type)을 문장 성분(주어/동사/목적어)으로 묶어
+교사별 집계 문서(readfit_error_stats/{교사})에 과제별·단원별·전체 횟수로 증분 누적합니다.
+교사 화면의 히트맵은 이 문서 1건만 읽어서 그립니다.
+"""
+
+ROLLUP_COLLECTION = "readfit_error_stats"
+
+ROLES = ("correct", "subject", "verb", "object", "other")
+ROLE_LABELS = {
+    "correct": "정답",
+    "subject": "주어",
+    "verb": "동사",
+    "object": "목적어/장소",
+    "other": "기타",
+}
+SCOPES = ("by_assignment", "by_unit")
+
+_ROLE_BY_RESULT_TYPE = {
+    "correct": "correct",
+    "subject_wrong": "subject",
+    "fallback_subject": "subject",
+    "verb_wrong": "verb",
+    "fallback_verb": "verb",
+    "object_wrong": "object",
+    "fallback_object": "object",
+}
+
+
+def role_for(result_type):
+    """result_type → 문장 성분 (알 수 없는 유형은 "other")"""
+    return _ROLE_BY_RESULT_TYPE.get(result_type, "other")
+
+
+def map_key(value):
+    # Firestore 필드 경로 구분자와 문서 경로 구분자를 피함
+    return str(value or "N/A").replace(".", "_").replace("/", "_")
+
+
+def record_result(db, teacher, access_code, unit, result_type):
+    """제출 한 건의 오답 유형을 교사 집계 문서에 원자적 Increment로 반영 (쓰기 1회)"""
+    from firebase_admin import firestore
+
+    role = role_for(result_type)
+    one = firestore.Increment(1)
+    data = {
+        "total": {role: one},
+        "by_assignment": {map_key(access_code): {role: one}},
+        "by_unit": {map_key(unit): {role: one}},
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    }
+    db.collection(ROLLUP_COLLECTION).document(map_key(teacher)).set(data, merge=True)
+
+
+def heatmap_cells(rollup, scope):
+    """
+    히트맵용 셀 목록 (행 = 과제 또는 단원, 열 = 문장 성분).
+
+    Args:
+        rollup (dict): readfit_error_stats 문서
+        scope (str): "by_assignment" 또는 "by_unit"
+
+    Returns:
+        list: [{"group", "role", "count", "rate"}] (rate = 해당 행 시도 중 비율)
+              마지막 행은 "전체"
+    """
+    groups = dict(sorted((rollup.get(scope) or {}).items()))
+    groups["전체"] = rollup.get("total") or {}
+    cells = []
+    for group, counts in groups.items():
+        attempts = sum(counts.values())
+        for role in ROLES:
+            count = counts.get(role, 0)
+            cells.append({
+                "group": group,
+                "role": ROLE_LABELS[role],
+                "count": count,
+                "rate": count / attempts if attempts else 0.0,
+            })
+    return cells
+
+
+def most_confused(rollup):
+    """전체 오답 중 가장 많이 헷갈린 문장 성분 (오답이 없으면 None)"""
+    total = rollup.get("total") or {}
+    wrong = {role: total.get(role, 0) for role in ROLES if role not in ("correct", "other")}
+    if not any(wrong.values()):
+        return None
+    return ROLE_LABELS[max(wrong, key=wrong.get)]
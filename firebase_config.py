@@ -1,10 +1,14 @@
 """
 Firebase 초기화 및 설정 모듈
 로컬 firebase-credentials.json 또는 Streamlit secrets.toml에서 인증 정보를 로드합니다.
+
+secrets.toml은 한 번만 파싱하고 파일 수정 시각(mtime)이 바뀔 때만 다시 읽으며,
+Firestore / Storage 클라이언트는 프로세스당 하나만 만들어 재사용합니다.
 """
 
 import json
 import os
+import threading
 import tomllib
 from dotenv import load_dotenv
 import firebase_admin
@@ -14,12 +18,26 @@ import streamlit as st
 # .env 파일 로드 (로컬 개발용)
 load_dotenv()
 
+DEFAULT_STORAGE_BUCKET = "ai-english-learning-be011.appspot.com"
+LOCAL_SECRETS_PATH = os.path.join(os.path.dirname(__file__), ".streamlit", "secrets.toml")
 
-def _load_local_streamlit_secrets():
-    """로컬 .streamlit/secrets.toml을 로드 (TOML 또는 JSON 형태 모두 허용)."""
+
+def _using_emulator():
+    """로컬 Firebase 에뮬레이터(Firestore/Storage/Auth) 사용 여부"""
+    return bool(os.getenv("FIRESTORE_EMULATOR_HOST") or os.getenv("FIREBASE_AUTH_EMULATOR_HOST"))
+
+
+class _EmulatorCredential(credentials.Base):
+    """에뮬레이터 전용 익명 인증 정보 (서비스 계정 키 불필요)"""
+
+    def get_credential(self):
+        from google.auth.credentials import AnonymousCredentials
+        return AnonymousCredentials()
+
+
+def _read_local_streamlit_secrets(secrets_path=LOCAL_SECRETS_PATH):
+    """로컬 .streamlit/secrets.toml을 파싱 (TOML 또는 JSON 형태 모두 허용)."""
     try:
-        base_dir = os.path.dirname(__file__)
-        secrets_path = os.path.join(base_dir, ".streamlit", "secrets.toml")
         if os.path.exists(secrets_path):
             with open(secrets_path, "rb") as f:
                 data = f.read()
@@ -49,7 +67,102 @@ def _load_local_streamlit_secrets():
     return {}
 
 
+_UNSET = object()
+
+
+class FirebaseConfig:
+    """
+    지연 초기화되는 스레드 안전 설정 객체.
+    로컬 secrets 파싱 결과, Web API Key, Firestore/Storage 클라이언트를 한 번만 만들어 보관합니다.
+    """
+
+    def __init__(self, secrets_path=LOCAL_SECRETS_PATH):
+        self.secrets_path = secrets_path
+        self._lock = threading.RLock()
+        self._secrets_mtime = _UNSET
+        self._secrets = {}
+        self._web_api_key = _UNSET
+        self._initialized = False
+        self._firestore = None
+        self._bucket = None
+
+    def local_secrets(self):
+        """로컬 secrets.toml 파싱 결과 (mtime이 바뀌었을 때만 다시 파싱)"""
+        try:
+            mtime = os.stat(self.secrets_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._secrets_mtime:
+            return self._secrets
+        with self._lock:
+            if mtime != self._secrets_mtime:
+                self._secrets = _read_local_streamlit_secrets(self.secrets_path) if mtime else {}
+                self._secrets_mtime = mtime
+                self._web_api_key = _UNSET
+            return self._secrets
+
+    def web_api_key(self):
+        """Web API Key (secrets가 바뀌기 전까지 캐시)"""
+        self.local_secrets()
+        if self._web_api_key is _UNSET:
+            with self._lock:
+                if self._web_api_key is _UNSET:
+                    self._web_api_key = _resolve_web_api_key()
+        return self._web_api_key
+
+    def initialize(self):
+        """Firebase Admin SDK 초기화 (최초 1회만 잠금 획득)"""
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            if not firebase_admin._apps:
+                creds = load_firebase_credentials()
+                options = {"storageBucket": DEFAULT_STORAGE_BUCKET}
+                if isinstance(creds, _EmulatorCredential):
+                    options["projectId"] = os.getenv("GCLOUD_PROJECT", "demo-readfit")
+                firebase_admin.initialize_app(creds, options)
+            self._initialized = True
+
+    def firestore_client(self):
+        if self._firestore is None:
+            with self._lock:
+                if self._firestore is None:
+                    self.initialize()
+                    self._firestore = firestore.client()
+        return self._firestore
+
+    def storage_bucket(self):
+        if self._bucket is None:
+            with self._lock:
+                if self._bucket is None:
+                    self.initialize()
+                    self._bucket = storage.bucket()
+        return self._bucket
+
+
+_config = FirebaseConfig()
+
+
+def get_config():
+    """프로세스 전역 FirebaseConfig"""
+    return _config
+
+
+def _load_local_streamlit_secrets():
+    """로컬 .streamlit/secrets.toml을 로드 (파싱 결과는 mtime 기준으로 캐시됨)."""
+    return _config.local_secrets()
+
+
 def get_web_api_key():
+    """
+    Firebase Web API Key를 로드합니다 (결과는 캐시됨).
+    """
+    return _config.web_api_key()
+
+
+def _resolve_web_api_key():
     """
     Firebase Web API Key를 로드합니다.
     1. 우선순위: .env 파일 (로컬 개발)
@@ -85,6 +198,7 @@ def load_firebase_credentials():
     1. 우선순위: 로컬 firebase-credentials.json 파일
     2. 차선책: Streamlit secrets (Cloud 배포용)
     3. 예외: 로컬 .streamlit/secrets.toml 직접 로드 (Streamlit 미실행 시)
+    4. 에뮬레이터 환경 변수가 있으면 익명 인증 정보
     """
     # 로컬 파일에서 먼저 로드 시도
     credentials_path = os.path.join(
@@ -122,6 +236,9 @@ def load_firebase_credentials():
             except Exception as e:
                 print(f"로컬 secrets(JSON) 로드 실패: {e}")
     
+    if _using_emulator():
+        return _EmulatorCredential()
+    
     raise FileNotFoundError(
         "Firebase 인증 정보를 찾을 수 없습니다. "
         "firebase-credentials.json 파일이 있는지 확인하거나 "
@@ -135,23 +252,17 @@ def initialize_firebase():
     중복 초기화 방지 로직을 포함합니다.
     """
     try:
-        if not firebase_admin._apps:
-            creds = load_firebase_credentials()
-            firebase_admin.initialize_app(creds, {
-                "storageBucket": "ai-english-learning-be011.appspot.com"
-            })
+        _config.initialize()
     except Exception as e:
         print(f"Firebase 초기화 오류: {e}")
         raise
 
 
 def get_firestore_client():
-    """Firestore 클라이언트를 반환합니다."""
-    initialize_firebase()
-    return firestore.client()
+    """Firestore 클라이언트를 반환합니다 (싱글톤)."""
+    return _config.firestore_client()
 
 
 def get_storage_bucket():
-    """Firebase Storage 버킷을 반환합니다."""
-    initialize_firebase()
-    return storage.bucket()
+    """Firebase Storage 버킷을 반환합니다 (싱글톤)."""
+    return _config.storage_bucket()
@@ -0,0 +1,161 @@
+"""
+퀴즈 문항 분석 모듈
+제출마다 문항별 정오(비트마스크)와 선택지 번호를 압축 저장하고,
+과제별 집계 문서(readfit_item_stats/{학습 코드})에 충분 통계를 증분(Increment)으로 누적합니다.
+
+집계 문서 하나만 읽으면 전체 제출을 다시 조회하지 않고도 다음을 계산할 수 있습니다.
+- 난이도 지수: 문항 정답률 p
+- 변별도: 문항 점수와 나머지 문항 점수의 상관(교정된 점이연 상관)
+- 선택지별 선택 비율 (매력 없는 오답, 정답보다 많이 고른 오답 찾기)
+"""
+
+import math
+
+ROLLUP_COLLECTION = "readfit_item_stats"
+
+# 문항 진단 기준
+EASY_P = 0.9
+HARD_P = 0.2
+LOW_DISCRIMINATION = 0.2
+MIN_RESPONSES = 5
+
+
+def encode_answers(quiz_answers):
+    """
+    문항별 응답을 압축합니다.
+
+    Args:
+        quiz_answers (list): show_step1_quiz의 응답 목록 ({"is_correct", "selected_index", ...})
+
+    Returns:
+        tuple: (bitmask: i번째 비트 = i번 문항 정답 여부, choices: 문항별 선택지 번호 목록 (-1 = 무응답))
+    """
+    bitmask = 0
+    choices = []
+    for idx, answer in enumerate(quiz_answers):
+        if answer.get("is_correct"):
+            bitmask |= 1 << idx
+        choices.append(answer.get("selected_index", -1))
+    return bitmask, choices
+
+
+def decode_bitmask(bitmask, n_items):
+    """비트마스크 → 문항별 정오 목록 (0/1)"""
+    return [(bitmask >> idx) & 1 for idx in range(n_items)]
+
+
+def rollup_increments(bitmask, choices):
+    """
+    제출 한 건이 집계 문서에 더할 값.
+    문항 점수 x, 총점 t에 대해 n, Σt, Σt², 문항별 Σx, Σxt, 선택지별 횟수를 누적합니다.
+
+    Returns:
+        dict: 중첩 dict (키는 Firestore 맵 키로 쓰도록 문자열)
+    """
+    correct = decode_bitmask(bitmask, len(choices))
+    total = sum(correct)
+    items = {}
+    for idx, (x, choice) in enumerate(zip(correct, choices)):
+        items[str(idx)] = {
+            "correct": x,
+            "sum_xt": x * total,
+            "options": {str(choice): 1},
+        }
+    return {"n": 1, "sum_t": total, "sum_t2": total * total, "items": items}
+
+
+def _as_increments(values, increment):
+    return {
+        key: _as_increments(value, increment) if isinstance(value, dict) else increment(value)
+        for key, value in values.items()
+    }
+
+
+def record_submission(db, access_code, bitmask, choices):
+    """집계 문서에 제출 한 건을 원자적 Increment로 반영 (읽기 없이 쓰기 1회)"""
+    from firebase_admin import firestore
+
+    data = _as_increments(rollup_increments(bitmask, choices), firestore.Increment)
+    db.collection(ROLLUP_COLLECTION).document(access_code).set(data, merge=True)
+
+
+def _item_rest_correlation(n, sum_x, sum_t, sum_t2, sum_xt):
+    """
+    문항 점수 x와 나머지 점수 r = t - x의 상관계수 (x² = x 이용).
+    분산이 0이면(모두 정답/오답 또는 나머지 점수가 모두 같음) None.
+    """
+    sum_r = sum_t - sum_x
+    sum_r2 = sum_t2 - 2 * sum_xt + sum_x
+    sum_xr = sum_xt - sum_x
+    p = sum_x / n
+    mean_r = sum_r / n
+    var_x = p * (1 - p)
+    var_r = sum_r2 / n - mean_r ** 2
+    if var_x <= 0 or var_r <= 1e-12:
+        return None
+    return (sum_xr / n - p * mean_r) / math.sqrt(var_x * var_r)
+
+
+def analyze(rollup, quiz):
+    """
+    집계 문서와 과제 퀴즈로 문항 분석 결과를 만듭니다.
+
+    Args:
+        rollup (dict): readfit_item_stats 문서
+        quiz (list): 과제 퀴즈 ({"question", "options", "answer"})
+
+    Returns:
+        list: 문항별 {"index", "question", "responses", "difficulty", "discrimination",
+                     "option_rates", "answer", "flags"}
+    """
+    n = rollup.get("n", 0)
+    items = rollup.get("items", {})
+    results = []
+    for idx, q in enumerate(quiz):
+        item = items.get(str(idx), {})
+        options = q.get("options", [])
+        entry = {
+            "index": idx,
+            "question": q.get("question", ""),
+            "responses": n,
+            "answer": q.get("answer"),
+            "difficulty": None,
+            "discrimination": None,
+            "option_rates": [0.0] * len(options),
+            "flags": [],
+        }
+        if n:
+            counts = item.get("options", {})
+            entry["option_rates"] = [counts.get(str(i), 0) / n for i in range(len(options))]
+            entry["difficulty"] = item.get("correct", 0) / n
+            entry["discrimination"] = _item_rest_correlation(
+                n, item.get("correct", 0), rollup.get("sum_t", 0), rollup.get("sum_t2", 0), item.get("sum_xt", 0)
+            )
+        if n >= MIN_RESPONSES:
+            entry["flags"] = _diagnose(entry)
+        results.append(entry)
+    return results
+
+
+def _diagnose(entry):
+    flags = []
+    p = entry["difficulty"]
+    if p >= EASY_P:
+        flags.append("너무 쉬움")
+    elif p <= HARD_P:
+        flags.append("너무 어려움")
+    r = entry["discrimination"]
+    if r is not None and r < 0:
+        flags.append("변별도 음수 (정답 확인 필요)")
+    elif r is not None and r < LOW_DISCRIMINATION:
+        flags.append("변별도 낮음")
+    rates = entry["option_rates"]
+    answer = entry["answer"]
+    for i, rate in enumerate(rates):
+        if i == answer:
+            continue
+        if rate == 0:
+            flags.append(f"{i + 1}번 오답을 아무도 고르지 않음")
+        elif answer is not None and answer < len(rates) and rate > rates[answer]:
+            flags.append(f"{i + 1}번 오답이 정답보다 많이 선택됨")
+    return flags
@@ -0,0 +1,315 @@
+"""
+교실 부하 테스트 도구
+Streamlit AppTest로 가상 학생 N명이 공통 학습 코드로 입장하여
+퀴즈(Step 1) → 활동 선택(Step 2) → 활동 수행(Step 3) → 최종 리포트(Step 4)까지 진행합니다.
+
+로컬 Firestore 에뮬레이터와 OpenAI 대역 서버(openai_stub_server.py)를 대상으로 실행하며,
+단계별 지연 p50/p95/p99, CPU 시간, RSS, 학생당 백엔드 호출 수를 보고합니다.
+
+실행 예:
+    firebase emulators:start --only firestore   # 별도 터미널
+    FIRESTORE_EMULATOR_HOST=127.0.0.1:8080 python loadtest.py --students 30 --concurrency 10
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app.py")
+# 각 단계 지연 = 해당 화면에서의 제출 동작 + 다음 화면 렌더링 (step3_activity는 Step 4 리포트 생성/저장 포함)
+STEPS = ("login", "step1_quiz", "step2_mission", "step3_activity")
+MISSIONS = ("image_detective", "mystery_20_questions", "writer")
+
+# 부하 테스트용 과제 (교사 대시보드에서 만든 과제와 같은 형태)
+SEED_ASSIGNMENT = {
+    "unit": "Unit 1",
+    "difficulty": "Beginner (초급)",
+    "text": (
+        "Hi! I am Harin. I like to run. I run in the park every day. The air is fresh and nice. "
+        "I use a running app. It records my steps and time. My friend Jimin runs with me on Sundays."
+    ),
+    "quiz": [
+        {"question": "What does Harin like to do?", "options": ["Run", "Swim", "Read"], "answer": 0},
+        {"question": "Where does Harin run?", "options": ["At school", "In the park", "At home"], "answer": 1},
+        {"question": "What does the app record?", "options": ["Songs", "Photos", "Steps and time"], "answer": 2},
+    ],
+    "teacher_name": "loadtest",
+}
+
+
+def percentile(values, pct):
+    """선형 보간 백분위수 (값이 없으면 None)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def current_rss_mb():
+    """현재 프로세스 RSS (MB). /proc가 없으면 최대 RSS로 대체"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class RssSampler(threading.Thread):
+    """부하 테스트 동안 RSS를 주기적으로 기록"""
+
+    def __init__(self, interval=0.2):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.samples.append(current_rss_mb())
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class FirestoreCallCounter:
+    """Firestore 클라이언트의 읽기/쓰기 메서드 호출 수를 셉니다 (프로세스 전체)."""
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def install(self):
+        from google.cloud.firestore_v1.collection import CollectionReference
+        from google.cloud.firestore_v1.document import DocumentReference
+        from google.cloud.firestore_v1.query import Query
+
+        targets = [
+            (DocumentReference, "get", "doc_get"),
+            (DocumentReference, "set", "doc_set"),
+            (DocumentReference, "update", "doc_update"),
+            (CollectionReference, "add", "collection_add"),
+            (CollectionReference, "stream", "collection_stream"),
+            (Query, "stream", "query_stream"),
+        ]
+        for cls, name, label in targets:
+            original = getattr(cls, name)
+            if getattr(original, "_loadtest_counted", False):
+                continue
+            setattr(cls, name, self._wrap(original, label))
+
+    def _wrap(self, original, label):
+        counter = self
+
+        def wrapper(*args, **kwargs):
+            with counter._lock:
+                counter.counts[label] += 1
+            return original(*args, **kwargs)
+
+        wrapper._loadtest_counted = True
+        return wrapper
+
+
+def seed_assignment(access_code):
+    """에뮬레이터에 부하 테스트용 과제를 만듭니다."""
+    from datetime import datetime
+    from firebase_config import get_firestore_client
+
+    db = get_firestore_client()
+    data = dict(SEED_ASSIGNMENT, access_code=access_code, created_at=datetime.now())
+    db.collection("readfit_assignments").document(access_code).set(data)
+
+
+def run_student(index, access_code, mission, accuracy, timeout):
+    """
+    가상 학생 한 명의 4단계 플로우를 실행합니다.
+
+    Returns:
+        dict: 단계별 지연(초), 성공 여부, 오류 메시지
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(index)
+    timings = {}
+    result = {"student": index, "mission": mission, "timings": timings, "ok": False, "error": None}
+
+    def timed(step, action):
+        started = time.perf_counter()
+        action()
+        timings[step] = time.perf_counter() - started
+        if at.exception:
+            raise RuntimeError(f"{step}: {at.exception[0].message}")
+
+    try:
+        at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        if os.getenv("OPENAI_BASE_URL"):
+            at.secrets["OPENAI_BASE_URL"] = os.environ["OPENAI_BASE_URL"]
+        at.run()
+
+        def login():
+            at.text_input(key="student_name").input(f"student{index:03d}")
+            at.text_input(key="access_code_input").input(access_code)
+            at.button(key="student_login_btn").click().run()
+
+        timed("login", login)
+
+        def answer_quiz():
+            for q_idx, question in enumerate(SEED_ASSIGNMENT["quiz"]):
+                options = question["options"]
+                if rng.random() < accuracy:
+                    choice = options[question["answer"]]
+                else:
+                    choice = rng.choice(options)
+                at.radio(key=f"quiz_{q_idx}").set_value(choice)
+            at.button(key="submit_quiz").click().run()
+
+        timed("step1_quiz", answer_quiz)
+
+        # 미션 선택 → Step 3 화면 렌더링 (이미지 탐정은 이 단계에서 문제 생성)
+        timed("step2_mission", lambda: at.button(key=f"mission_{mission}").click().run())
+
+        def do_activity():
+            if mission == "image_detective":
+                at.button(key=f"detect_sent_{rng.randrange(4)}").click().run()
+            elif mission == "mystery_20_questions":
+                at.text_input(key="mystery_answer_input").input("park")
+                at.button(key="submit_mystery").click().run()
+            else:
+                at.text_area(key="writer_story_input").input(
+                    "Harin runs in the park every morning. The fresh air makes her happy. "
+                    "She records her steps with an app and shares them with Jimin."
+                )
+                at.button(key="submit_writer").click().run()
+
+        timed("step3_activity", do_activity)
+        if at.session_state["step"] != 4:
+            raise RuntimeError(f"step4에 도달하지 못함 (step={at.session_state['step']})")
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def summarize(results, wall_seconds, cpu_seconds, rss_samples, backend_counts, students):
+    """결과를 단계별 백분위수와 자원 사용량으로 요약합니다."""
+    per_step = {}
+    for step in STEPS:
+        values = [r["timings"][step] for r in results if step in r["timings"]]
+        if not values:
+            continue
+        per_step[step] = {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "mean": statistics.fmean(values),
+        }
+    return {
+        "students": students,
+        "succeeded": sum(1 for r in results if r["ok"]),
+        "errors": [r["error"] for r in results if r["error"]][:10],
+        "wall_seconds": wall_seconds,
+        "cpu_seconds": cpu_seconds,
+        "cpu_utilization": cpu_seconds / wall_seconds if wall_seconds else 0.0,
+        "rss_mb": {
+            "start": rss_samples[0] if rss_samples else None,
+            "peak": max(rss_samples) if rss_samples else None,
+            "end": rss_samples[-1] if rss_samples else None,
+        },
+        "steps": per_step,
+        "backend_calls_total": dict(backend_counts),
+        "backend_calls_per_student": {k: v / students for k, v in backend_counts.items()},
+    }
+
+
+def print_report(report):
+    print(f"\n학생 {report['students']}명 중 {report['succeeded']}명 완료 "
+          f"(총 {report['wall_seconds']:.1f}초, CPU {report['cpu_seconds']:.1f}초, "
+          f"RSS 최대 {report['rss_mb']['peak'] or 0:.0f}MB)")
+    print(f"{'단계':<16}{'건수':>6}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for step, s in report["steps"].items():
+        print(f"{step:<16}{s['count']:>6}{s['p50']:>8.2f}s{s['p95']:>8.2f}s{s['p99']:>8.2f}s")
+    print("학생당 백엔드 호출:")
+    for name, value in sorted(report["backend_calls_per_student"].items()):
+        print(f"  {name:<20}{value:>8.2f}")
+    for error in report["errors"]:
+        print(f"  오류: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ReadFit 교실 부하 테스트")
+    parser.add_argument("--students", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--access-code", default="990001")
+    parser.add_argument("--mission", choices=MISSIONS + ("mixed",), default="mixed")
+    parser.add_argument("--accuracy", type=float, default=0.7, help="퀴즈 정답 확률")
+    parser.add_argument("--timeout", type=float, default=120.0, help="AppTest 1회 실행 제한(초)")
+    parser.add_argument("--openai-base-url", default=None,
+                        help="외부 OpenAI 대역 주소 (없으면 내장 대역 서버 실행)")
+    parser.add_argument("--stub-latency", default="lognormal:0.6,0.4")
+    parser.add_argument("--json", dest="json_path", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if not os.getenv("FIRESTORE_EMULATOR_HOST"):
+        parser.error("FIRESTORE_EMULATOR_HOST가 필요합니다 (로컬 Firestore 에뮬레이터 대상으로만 실행)")
+
+    stub_server = None
+    if args.openai_base_url:
+        os.environ["OPENAI_BASE_URL"] = args.openai_base_url
+    else:
+        from openai_stub_server import run_server
+        stub_server = run_server(port=0, latency=args.stub_latency)
+        threading.Thread(target=stub_server.serve_forever, daemon=True).start()
+        os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{stub_server.server_address[1]}/v1"
+
+    seed_assignment(args.access_code)
+    firestore_counter = FirestoreCallCounter()
+    firestore_counter.install()
+
+    missions = [
+        MISSIONS[i % len(MISSIONS)] if args.mission == "mixed" else args.mission
+        for i in range(args.students)
+    ]
+
+    sampler = RssSampler()
+    sampler.start()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [
+            pool.submit(run_student, i, args.access_code, missions[i], args.accuracy, args.timeout)
+            for i in range(args.students)
+        ]
+        results = [f.result() for f in futures]
+    wall_seconds = time.perf_counter() - wall_start
+    cpu_seconds = time.process_time() - cpu_start
+    sampler.stop()
+
+    backend_counts = {f"firestore.{k}": v for k, v in firestore_counter.counts.items()}
+    if stub_server:
+        backend_counts["openai.requests"] = stub_server.stub_config.counts["requests"]
+        stub_server.shutdown()
+
+    report = summarize(results, wall_seconds, cpu_seconds, sampler.samples, backend_counts, args.students)
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+OpenAI 호환 로컬 대역(stand-in) 서버
+실제 OpenAI 크레딧이나 네트워크 없이 학생 플로우를 부하 테스트/CI 하기 위한 서버입니다.
+
+지원 엔드포인트:
+- POST /v1/chat/completions (response_format: text / json_object / json_schema)
+- POST /v1/images/generations (response_format: b64_json / url)
+
+지연 분포, 오류 주입, 분당 요청 한도(429) 시뮬레이션을 설정할 수 있습니다.
+
+실행 예:
+    python openai_stub_server.py --port 8089 --latency lognormal:0.8,0.5 --error-rate 0.02 --rpm 300
+앱에서 사용:
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 streamlit run streamlit_app.py
+"""
+
+import argparse
+import base64
+import json
+import math
+import random
+import re
+import struct
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def parse_latency(spec):
+    """
+    지연 분포 문자열을 샘플링 함수로 변환합니다.
+
+    형식:
+        fixed:0.5 / uniform:0.2,1.5 / normal:0.8,0.2 / lognormal:<중앙값>,<sigma>
+    """
+    kind, _, params = (spec or "fixed:0").partition(":")
+    values = [float(v) for v in params.split(",") if v] or [0.0]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda: max(0.0, random.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        mu = math.log(max(values[0], 1e-6))
+        return lambda: random.lognormvariate(mu, values[1])
+    raise ValueError(f"알 수 없는 지연 분포: {spec}")
+
+
+def _png_bytes(width=64, height=64, color=(120, 170, 220)):
+    """단색 PNG 이미지 바이트 (표준 라이브러리만 사용)"""
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    row = b"\x00" + bytes(color) * width
+    raw = row * height
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+_PLACEHOLDER_PNG_B64 = base64.b64encode(_png_bytes()).decode()
+
+
+def _estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _value_for_schema(schema, key=""):
+    """JSON schema에 맞는 예시 값을 만듭니다 (strict 모드 스키마 기준)."""
+    kind = schema.get("type", "string")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "string")
+    if "enum" in schema:
+        return schema["enum"][0]
+    if kind == "object":
+        return {name: _value_for_schema(sub, name) for name, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_value_for_schema(schema.get("items", {}), key)]
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 1.0
+    if kind == "boolean":
+        return True
+    if "feedback" in key:
+        return "그림 속 주인공의 행동을 정확하게 찾았어요! 다음에는 주어도 함께 살펴보세요."
+    return f"stub {key}".strip()
+
+
+_JSON_EXAMPLE_RE = re.compile(r"\{\{?\s*(\"[a-z_]+\"\s*:\s*\"[^\"]*\"\s*,?\s*)+\}?\}")
+_JSON_KEY_RE = re.compile(r"\"([a-z_]+)\"\s*:")
+
+# json_object 요청에서 프롬프트 예시의 키별로 돌려줄 값
+_JSON_OBJECT_VALUES = {
+    "subject_wrong": "The girl is running to school.",
+    "verb_wrong": "The boy is walking to school.",
+    "object_wrong": "The boy is running to the park.",
+    "semantic": "cat",
+    "spelling": "log",
+    "random": "desk",
+}
+
+
+def build_chat_content(body):
+    """요청의 response_format과 프롬프트에 맞는 응답 본문을 만듭니다."""
+    response_format = body.get("response_format") or {}
+    prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+    fmt = response_format.get("type", "text")
+    if fmt == "json_schema":
+        schema = response_format.get("json_schema", {}).get("schema", {})
+        return json.dumps(_value_for_schema(schema), ensure_ascii=False)
+    if fmt == "json_object":
+        example = _JSON_EXAMPLE_RE.search(prompt)
+        keys = _JSON_KEY_RE.findall(example.group(0)) if example else []
+        return json.dumps({k: _JSON_OBJECT_VALUES.get(k, f"stub {k}") for k in keys}, ensure_ascii=False)
+    if "visual scene description" in prompt:
+        return "A child runs along a path in a sunny park."
+    return "The boy runs in the park."
+
+
+class StubConfig:
+    """서버 동작 설정과 분당 요청 한도 상태"""
+
+    def __init__(self, latency="fixed:0", error_rate=0.0, rpm=0, image_latency=None):
+        self.sample_latency = parse_latency(latency)
+        self.sample_image_latency = parse_latency(image_latency) if image_latency else self.sample_latency
+        self.error_rate = error_rate
+        self.rpm = rpm
+        self._lock = threading.Lock()
+        self._window = []
+        self.counts = {"requests": 0, "errors": 0, "rate_limited": 0}
+
+    def check_rate_limit(self):
+        """분당 한도를 넘었으면 재시도까지 남은 초, 아니면 None"""
+        with self._lock:
+            self.counts["requests"] += 1
+            if not self.rpm:
+                return None
+            now = time.monotonic()
+            self._window = [t for t in self._window if now - t < 60]
+            if len(self._window) >= self.rpm:
+                self.counts["rate_limited"] += 1
+                return max(1, int(60 - (now - self._window[0])) + 1)
+            self._window.append(now)
+            return None
+
+    def should_fail(self):
+        if self.error_rate and random.random() < self.error_rate:
+            with self._lock:
+                self.counts["errors"] += 1
+            return True
+        return False
+
+
+def make_handler(config):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload, headers=None):
+            data = json.dumps(payload, ensure_ascii=False).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _error(self, status, message, kind, headers=None):
+            self._send_json(status, {"error": {"message": message, "type": kind, "code": None}}, headers)
+
+        def do_GET(self):
+            if self.path.rstrip("/") in ("/health", "/v1/health"):
+                self._send_json(200, {"status": "ok", **config.counts})
+            elif self.path.rstrip("/") == "/v1/models":
+                self._send_json(200, {"object": "list", "data": [
+                    {"id": "gpt-4o-mini", "object": "model"}, {"id": "dall-e-3", "object": "model"}
+                ]})
+            else:
+                self._error(404, f"Unknown path {self.path}", "invalid_request_error")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                self._error(400, "Invalid JSON body", "invalid_request_error")
+                return
+
+            retry_after = config.check_rate_limit()
+            if retry_after:
+                self._error(429, "Rate limit reached (stub)", "rate_limit_exceeded",
+                            {"Retry-After": str(retry_after)})
+                return
+
+            path = self.path.rstrip("/")
+            if path == "/v1/chat/completions":
+                time.sleep(config.sample_latency())
+                if config.should_fail():
+                    self._error(500, "Injected server error (stub)", "server_error")
+                    return
+                self._send_json(200, self._chat_response(body))
+            elif path == "/v1/images/generations":
+                time.sleep(config.sample_image_latency())
+                if config.should_fail():
+                    self._error(500, "Injected server error (stub)", "server_error")
+                    return
+                self._send_json(200, self._image_response(body))
+            else:
+                self._error(404, f"Unknown path {self.path}", "invalid_request_error")
+
+        def _chat_response(self, body):
+            content = build_chat_content(body)
+            prompt_text = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+            prompt_tokens = _estimate_tokens(prompt_text)
+            completion_tokens = _estimate_tokens(content)
+            return {
+                "id": f"chatcmpl-stub-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "gpt-4o-mini"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+
+        def _image_response(self, body):
+            count = int(body.get("n") or 1)
+            if body.get("response_format", "url") == "b64_json":
+                item = {"b64_json": _PLACEHOLDER_PNG_B64, "revised_prompt": body.get("prompt", "")}
+            else:
+                item = {"url": "https://picsum.photos/seed/stub/512/512", "revised_prompt": body.get("prompt", "")}
+            return {"created": int(time.time()), "data": [dict(item) for _ in range(count)]}
+
+    return StubHandler
+
+
+def run_server(host="127.0.0.1", port=8089, **options):
+    """대역 서버를 생성해 반환합니다 (serve_forever는 호출자가 실행)."""
+    config = StubConfig(**options)
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    server.stub_config = config
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 호환 로컬 대역 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="fixed:0",
+                        help="chat 지연 분포 (fixed:s / uniform:a,b / normal:mu,sd / lognormal:median,sigma)")
+    parser.add_argument("--image-latency", default=None, help="images 지연 분포 (기본: --latency와 동일)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 오류 주입 비율 (0~1)")
+    parser.add_argument("--rpm", type=int, default=0, help="분당 요청 한도, 초과 시 429 (0이면 무제한)")
+    args = parser.parse_args()
+
+    server = run_server(args.host, args.port, latency=args.latency, image_latency=args.image_latency,
+                        error_rate=args.error_rate, rpm=args.rpm)
+    print(f"OpenAI stub server listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+리런(rerun) 단위 프로파일링 모듈
+스크립트 실행 한 번마다 이름 붙은 구간(스타일 적용, Firestore 조회, 퀴즈 생성, OpenAI 호출 등)의
+소요 시간을 기록하고, 페이지/단계별 히스토그램으로 집계합니다.
+
+READFIT_PROFILE=1 일 때만 동작하며, 꺼져 있으면 section()은 공유 no-op 컨텍스트를 돌려주므로
+호출 비용이 함수 호출 한 번 수준입니다.
+집계 결과는 Prometheus 텍스트 또는 JSON lines(READFIT_PROFILE_LOG 경로)로 내보낼 수 있습니다.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
+
+# 히스토그램 버킷 경계(초)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+ENABLED = os.getenv("READFIT_PROFILE", "").lower() in ("1", "true", "yes")
+LOG_PATH = os.getenv("READFIT_PROFILE_LOG")
+
+_NOOP = nullcontext()
+_local = threading.local()
+_lock = threading.Lock()
+_histograms = {}  # (page, section) -> {"count", "sum", "buckets"}
+_last_runs = {}   # page -> 마지막 실행의 구간별 소요 시간
+
+
+class _Section:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        run = getattr(_local, "run", None)
+        if run is not None:
+            run.append((self.name, time.perf_counter() - self.started))
+        return False
+
+
+def section(name):
+    """이름 붙은 구간의 소요 시간을 현재 실행에 기록하는 컨텍스트 매니저"""
+    if not ENABLED:
+        return _NOOP
+    return _Section(name)
+
+
+def timed(name):
+    """함수 전체를 구간으로 기록하는 데코레이터 (비활성 시 원래 함수 그대로 반환)"""
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Section(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_run():
+    """스크립트 실행 시작 시 호출 (구간 기록 초기화)"""
+    if ENABLED:
+        _local.run = []
+        _local.started = time.perf_counter()
+
+
+def end_run(page):
+    """스크립트 실행 종료 시 호출. 구간 기록을 page 기준으로 집계합니다."""
+    if not ENABLED:
+        return
+    run = getattr(_local, "run", None)
+    if run is None:
+        return
+    total = time.perf_counter() - _local.started
+    _local.run = None
+    run.append(("total", total))
+    with _lock:
+        breakdown = {}
+        for name, elapsed in run:
+            breakdown[name] = breakdown.get(name, 0.0) + elapsed
+        for name, elapsed in breakdown.items():
+            hist = _histograms.setdefault(
+                (page, name), {"count": 0, "sum": 0.0, "buckets": [0] * len(BUCKETS)}
+            )
+            hist["count"] += 1
+            hist["sum"] += elapsed
+            for i, bound in enumerate(BUCKETS):
+                if elapsed <= bound:
+                    hist["buckets"][i] += 1
+        _last_runs[page] = breakdown
+    if LOG_PATH:
+        record = {"ts": time.time(), "page": page, "sections": breakdown}
+        try:
+            with open(LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logger.warning("프로파일 로그 기록 실패: %s", e)
+
+
+def _quantile(hist, q):
+    """히스토그램 버킷으로 근사한 분위수 (버킷 상한값)"""
+    target = hist["count"] * q
+    for bound, count in zip(BUCKETS, hist["buckets"]):
+        if count >= target:
+            return bound
+    return float("inf")
+
+
+def snapshot():
+    """페이지/구간별 집계 요약 목록 (평균 내림차순)"""
+    with _lock:
+        rows = []
+        for (page, name), hist in _histograms.items():
+            rows.append({
+                "page": page,
+                "section": name,
+                "count": hist["count"],
+                "mean_ms": round(hist["sum"] / hist["count"] * 1000, 2),
+                "p50_ms": _quantile(hist, 0.5) * 1000,
+                "p95_ms": _quantile(hist, 0.95) * 1000,
+            })
+        last_runs = {page: dict(b) for page, b in _last_runs.items()}
+    rows.sort(key=lambda r: (r["page"], -r["mean_ms"]))
+    return {"sections": rows, "last_runs": last_runs}
+
+
+def metrics_text():
+    """Prometheus 텍스트 형식의 구간별 히스토그램"""
+    lines = [
+        "# HELP readfit_section_seconds Time spent per named section in one script run.",
+        "# TYPE readfit_section_seconds histogram",
+    ]
+    with _lock:
+        for (page, name), hist in sorted(_histograms.items()):
+            labels = f'page="{page}",section="{name}"'
+            for bound, count in zip(BUCKETS, hist["buckets"]):
+                lines.append(f'readfit_section_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'readfit_section_seconds_bucket{{{labels},le="+Inf"}} {hist["count"]}')
+            lines.append(f"readfit_section_seconds_sum{{{labels}}} {hist['sum']:.6f}")
+            lines.append(f"readfit_section_seconds_count{{{labels}}} {hist['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """집계 초기화"""
+    with _lock:
+        _histograms.clear()
+        _last_runs.clear()
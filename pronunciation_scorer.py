@@ -0,0 +1,401 @@
+"""
+쉐도잉 발음/유창성 채점 모듈
+외부 음성 API 없이 NumPy만으로 학생 녹음을 채점합니다.
+
+- 특징: 16kHz 모노 신호의 log-mel 스펙트럼 → MFCC (켑스트럼 평균/분산 정규화)
+- 발음: 교사 모범 낭독 녹음과의 DTW 정렬 비용 (대각선 단위로 벡터화한 DTW + Sakoe-Chiba 밴드)
+- 유창성: 발화 속도(지문 음절 수 / 발화 시간), 쉼 비율, 긴 쉼 횟수
+- 모범 낭독이 없으면 유창성 점수만 사용
+- 교사 목록용 녹음 요약: 길이, RMS 포락선, 발화 구간, 무음 비율 (오디오를 다시 받지 않고 정렬/필터/미리보기)
+
+채점과 요약은 AudioUploader의 업로드 후 단계에서 프로세스 풀로 실행됩니다.
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+import audio_transcode
+from writing_analyzer import count_syllables, tokenize
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+FRAME_LENGTH = 400   # 25ms
+HOP_LENGTH = 160     # 10ms
+N_FFT = 512
+N_MELS = 40
+N_MFCC = 13
+
+# 발화 구간 판정: 가장 큰 프레임보다 35dB 이상 작거나 절대값 -50dBFS 미만이면 무음
+SILENCE_BELOW_PEAK_DB = 35
+SILENCE_FLOOR_DBFS = -50
+LONG_PAUSE_SECONDS = 0.5
+
+# DTW 설정 (프레임이 많으면 간격을 두고 추려 메모리/시간 제한)
+DTW_BAND = 0.2
+DTW_MAX_FRAMES = 1500
+# 정렬 비용 → 점수 보정값 (정규화된 MFCC 기준: 같은 녹음은 비용이 약 0, 무관한 발화는 2 이상)
+DTW_COST_FLOOR = 1.0
+DTW_COST_SCALE = 1.5
+
+# 모범 낭독이 없을 때 학습자 목표 발화 속도 (초당 음절)
+TARGET_SYLLABLES_PER_SECOND = (2.0, 4.0)
+SCORE_TIMEOUT_SECONDS = 120
+
+# 녹음 요약 설정
+ENVELOPE_POINTS = 200
+SEGMENT_MERGE_GAP_SECONDS = 0.2
+MAX_SEGMENTS = 100
+
+
+def load_signal(path, sample_rate=SAMPLE_RATE):
+    """
+    오디오 파일을 [-1, 1] 범위의 float32 모노 신호로 읽습니다.
+    ffmpeg가 있으면 모든 형식을, 없으면 WAV만 지원합니다.
+    """
+    if audio_transcode.ffmpeg_available():
+        samples = audio_transcode.decode_pcm(path, sample_rate)
+        return np.frombuffer(samples.tobytes(), dtype=np.int16).astype(np.float32) / 32768.0
+
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError("ffmpeg 없이 읽을 수 있는 형식은 16비트 PCM WAV뿐입니다.")
+        channels = wav.getnchannels()
+        source_rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+    signal = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+    if channels > 1:
+        signal = signal.reshape(-1, channels).mean(axis=1)
+    if source_rate != sample_rate and len(signal):
+        duration = len(signal) / source_rate
+        target_times = np.arange(int(duration * sample_rate)) / sample_rate
+        signal = np.interp(target_times, np.arange(len(signal)) / source_rate, signal).astype(np.float32)
+    return signal
+
+
+def frame_signal(signal):
+    """신호를 (프레임 수, FRAME_LENGTH) 배열로 자릅니다 (복사 없는 view)."""
+    if len(signal) < FRAME_LENGTH:
+        signal = np.pad(signal, (0, FRAME_LENGTH - len(signal)))
+    return np.lib.stride_tricks.sliding_window_view(signal, FRAME_LENGTH)[::HOP_LENGTH]
+
+
+@lru_cache(maxsize=4)
+def mel_filterbank(sample_rate=SAMPLE_RATE, n_fft=N_FFT, n_mels=N_MELS):
+    """삼각형 mel 필터뱅크 (n_mels, n_fft // 2 + 1)"""
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+    mel_points = np.linspace(hz_to_mel(0.0), hz_to_mel(sample_rate / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mel_points) / sample_rate).astype(int)
+    bank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            bank[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            bank[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return bank
+
+
+@lru_cache(maxsize=2)
+def _dct_matrix(n_mfcc=N_MFCC, n_mels=N_MELS):
+    """직교 정규화 DCT-II 행렬 (n_mfcc, n_mels)"""
+    k = np.arange(n_mfcc)[:, None]
+    n = np.arange(n_mels)[None, :]
+    matrix = np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)) * np.sqrt(2.0 / n_mels)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+def log_mel(signal):
+    """log-mel 스펙트럼 (프레임 수, N_MELS)"""
+    frames = frame_signal(signal) * np.hamming(FRAME_LENGTH).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames, n=N_FFT)) ** 2 / N_FFT
+    return np.log(power @ mel_filterbank().T + 1e-10)
+
+
+def mfcc(log_mel_spec):
+    """MFCC + 켑스트럼 평균/분산 정규화 (프레임 수, N_MFCC)"""
+    coeffs = log_mel_spec @ _dct_matrix().T
+    if len(coeffs) > 1:
+        coeffs = (coeffs - coeffs.mean(axis=0)) / (coeffs.std(axis=0) + 1e-8)
+    return coeffs
+
+
+def frame_db(signal):
+    """프레임별 RMS 에너지 (dBFS)"""
+    frames = frame_signal(signal)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    return 20 * np.log10(rms + 1e-10)
+
+
+def voiced_mask(signal):
+    """프레임별 발화 여부 (bool 배열)"""
+    db = frame_db(signal)
+    if not len(db):
+        return np.zeros(0, dtype=bool)
+    threshold = max(db.max() - SILENCE_BELOW_PEAK_DB, SILENCE_FLOOR_DBFS)
+    return db > threshold
+
+
+def runs(mask):
+    """bool 배열에서 True 구간 목록 [(시작, 끝)) (프레임 인덱스)"""
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+
+def dtw_cost(a, b, band=DTW_BAND):
+    """
+    두 특징 시퀀스의 DTW 정렬 비용 (경로 길이로 정규화).
+    같은 반대각선 위의 셀은 서로 의존하지 않으므로 반대각선 하나를 한 번의 벡터 연산으로 채웁니다.
+
+    Args:
+        a (ndarray): (n, d) 특징
+        b (ndarray): (m, d) 특징
+        band (float): 정규화된 시간축 기준 Sakoe-Chiba 밴드 폭 (None이면 제한 없음)
+
+    Returns:
+        float: 정규화된 누적 비용 (정렬 불가능하면 inf)
+    """
+    n, m = len(a), len(b)
+    if n == 0 or m == 0:
+        return float("inf")
+    sq = (a ** 2).sum(axis=1)[:, None] + (b ** 2).sum(axis=1)[None, :] - 2.0 * (a @ b.T)
+    cost = np.sqrt(np.maximum(sq, 0.0))
+    if band is not None:
+        ti = np.arange(n)[:, None] / max(n - 1, 1)
+        tj = np.arange(m)[None, :] / max(m - 1, 1)
+        cost = np.where(np.abs(ti - tj) <= band, cost, np.inf)
+
+    acc = np.full((n + 1, m + 1), np.inf)
+    acc[0, 0] = 0.0
+    for s in range(2, n + m + 1):
+        i = np.arange(max(1, s - m), min(n, s - 1) + 1)
+        j = s - i
+        best_prev = np.minimum(np.minimum(acc[i - 1, j - 1], acc[i - 1, j]), acc[i, j - 1])
+        acc[i, j] = cost[i - 1, j - 1] + best_prev
+    return float(acc[n, m] / (n + m))
+
+
+def _voiced_features(signal):
+    """발화 프레임만 남긴 MFCC (DTW 입력 크기 제한을 위해 필요하면 간격을 두고 추림)"""
+    features = mfcc(log_mel(signal))
+    mask = voiced_mask(signal)[: len(features)]
+    features = features[mask] if mask.any() else features
+    step = math.ceil(len(features) / DTW_MAX_FRAMES) if len(features) > DTW_MAX_FRAMES else 1
+    return features[::step], step
+
+
+def _reference_features(reference_path):
+    """모범 낭독 특징 (같은 파일은 .npz로 캐시)"""
+    cache_path = reference_path + ".mfcc.npz"
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(reference_path):
+        with np.load(cache_path) as cached:
+            return cached["features"], int(cached["step"]), float(cached["voiced_seconds"])
+    signal = load_signal(reference_path)
+    features, step = _voiced_features(signal)
+    voiced_seconds = float(voiced_mask(signal).sum() * HOP_LENGTH / SAMPLE_RATE)
+    np.savez(cache_path, features=features, step=step, voiced_seconds=voiced_seconds)
+    return features, step, voiced_seconds
+
+
+def fluency_metrics(signal, passage_text):
+    """
+    발화 속도와 쉼 지표를 계산합니다.
+
+    Returns:
+        dict: duration_seconds, voiced_seconds, speech_rate(초당 음절), pause_ratio, long_pauses
+    """
+    mask = voiced_mask(signal)
+    frame_seconds = HOP_LENGTH / SAMPLE_RATE
+    voiced_seconds = float(mask.sum() * frame_seconds)
+    segments = runs(mask)
+    pause_ratio = 0.0
+    long_pauses = 0
+    if segments:
+        span = segments[-1][1] - segments[0][0]
+        gaps = [start - end for (_, end), (start, _) in zip(segments, segments[1:])]
+        pause_ratio = sum(gaps) / span if span else 0.0
+        long_pauses = sum(1 for g in gaps if g * frame_seconds >= LONG_PAUSE_SECONDS)
+    syllables = sum(count_syllables(w) for w in tokenize(passage_text))
+    return {
+        "duration_seconds": round(len(signal) / SAMPLE_RATE, 2),
+        "voiced_seconds": round(voiced_seconds, 2),
+        "speech_rate": round(syllables / voiced_seconds, 2) if voiced_seconds else 0.0,
+        "pause_ratio": round(pause_ratio, 3),
+        "long_pauses": long_pauses,
+    }
+
+
+def recording_summary(signal):
+    """
+    교사 목록에 표시할 녹음 요약을 계산합니다 (업로드 시 한 번).
+
+    Returns:
+        dict: duration_seconds, silence_ratio,
+              rms_envelope (ENVELOPE_POINTS 이하, 0~100 정수),
+              voiced_segments ([{"start", "end"}] 초 단위, 짧은 쉼은 병합, 최대 MAX_SEGMENTS개)
+    """
+    frames = frame_signal(signal)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    points = min(ENVELOPE_POINTS, len(rms))
+    bounds = np.linspace(0, len(rms), points + 1).astype(int)
+    envelope = np.add.reduceat(rms, bounds[:-1]) / np.diff(bounds)
+    top = envelope.max() if len(envelope) else 0
+    envelope = np.round(envelope * 100 / top).astype(int).tolist() if top > 0 else [0] * points
+
+    mask = voiced_mask(signal)
+    frame_seconds = HOP_LENGTH / SAMPLE_RATE
+    merge_gap = SEGMENT_MERGE_GAP_SECONDS / frame_seconds
+    segments = []
+    for start, end in runs(mask):
+        if segments and start - segments[-1][1] <= merge_gap:
+            segments[-1][1] = end
+        else:
+            segments.append([start, end])
+    # Firestore는 중첩 배열을 저장할 수 없으므로 구간은 dict 목록으로 저장
+    voiced_segments = [
+        {"start": round(start * frame_seconds, 2), "end": round(end * frame_seconds, 2)}
+        for start, end in segments[:MAX_SEGMENTS]
+    ]
+    return {
+        "duration_seconds": round(len(signal) / SAMPLE_RATE, 2),
+        "silence_ratio": round(1.0 - float(mask.mean()), 3) if len(mask) else 1.0,
+        "rms_envelope": envelope,
+        "voiced_segments": voiced_segments,
+    }
+
+
+def _fluency_score(metrics, target_rate=None):
+    """발화 속도가 목표(모범 낭독 속도 또는 학습자 권장 범위)에서 벗어난 정도와 쉼 비율로 감점"""
+    rate = metrics["speech_rate"]
+    if not rate:
+        return 0
+    low, high = (target_rate, target_rate) if target_rate else TARGET_SYLLABLES_PER_SECOND
+    if rate < low:
+        deviation = math.log(low / rate)
+    elif rate > high:
+        deviation = math.log(rate / high)
+    else:
+        deviation = 0.0
+    rate_penalty = min(50.0, 60.0 * deviation)
+    pause_penalty = min(40.0, 100.0 * max(0.0, metrics["pause_ratio"] - 0.15)) + min(10, 2 * metrics["long_pauses"])
+    return max(0, round(100 - rate_penalty - pause_penalty))
+
+
+def score_signal(signal, passage_text, reference_path=None):
+    """
+    녹음 신호 하나를 채점합니다.
+
+    Args:
+        signal (ndarray): load_signal()로 읽은 학생 녹음
+        passage_text (str): 과제 지문 (발화 속도 계산용)
+        reference_path (str): 교사 모범 낭독 파일 경로 (없으면 유창성만 채점)
+
+    Returns:
+        dict: score, fluency_score, pronunciation_score, alignment_cost, tempo_ratio, 유창성 지표
+    """
+    metrics = fluency_metrics(signal, passage_text)
+    result = dict(metrics, pronunciation_score=None, alignment_cost=None, tempo_ratio=None)
+
+    target_rate = None
+    if reference_path:
+        ref_features, ref_step, ref_voiced_seconds = _reference_features(reference_path)
+        features, step = _voiced_features(signal)
+        # 두 시퀀스의 프레임 간격을 맞춘 뒤 정렬
+        common = max(step, ref_step)
+        cost = dtw_cost(features[:: common // step], ref_features[:: common // ref_step])
+        pronunciation = 100 * math.exp(-max(0.0, cost - DTW_COST_FLOOR) / DTW_COST_SCALE) if math.isfinite(cost) else 0
+        result["alignment_cost"] = round(cost, 3) if math.isfinite(cost) else None
+        result["pronunciation_score"] = round(pronunciation)
+        if ref_voiced_seconds and metrics["voiced_seconds"]:
+            result["tempo_ratio"] = round(metrics["voiced_seconds"] / ref_voiced_seconds, 2)
+            target_rate = metrics["speech_rate"] * result["tempo_ratio"]
+
+    fluency = _fluency_score(metrics, target_rate)
+    result["fluency_score"] = fluency
+    if result["pronunciation_score"] is not None:
+        result["score"] = round(0.6 * result["pronunciation_score"] + 0.4 * fluency)
+    else:
+        result["score"] = fluency
+    return result
+
+
+def analyze_recording(path, passage_text, reference_path=None):
+    """
+    녹음 파일을 한 번 디코딩해 채점과 요약을 함께 계산합니다 (프로세스 풀 워커에서 실행).
+
+    Returns:
+        dict: {"score", "scoring": 채점 지표 + elapsed_ms/realtime_factor, "summary": recording_summary()}
+    """
+    started = time.perf_counter()
+    signal = load_signal(path)
+    summary = recording_summary(signal)
+    scoring = score_signal(signal, passage_text, reference_path)
+    elapsed = time.perf_counter() - started
+    scoring["elapsed_ms"] = round(elapsed * 1000, 1)
+    duration = summary["duration_seconds"]
+    scoring["realtime_factor"] = round(elapsed / duration, 3) if duration else None
+    return {"score": scoring.pop("score"), "scoring": scoring, "summary": summary}
+
+
+class ShadowingScorer:
+    """
+    AudioUploader의 업로드 후 단계로 등록하는 채점기.
+    과제 문서에서 지문과 모범 낭독 경로를 읽고, 모범 낭독은 로컬에 한 번만 내려받아 재사용합니다.
+    """
+
+    def __init__(self, get_db, get_bucket, cache_dir, max_workers=None):
+        self.get_db = get_db
+        self.get_bucket = get_bucket
+        self.cache_dir = os.path.join(cache_dir, "reference")
+        self.max_workers = max_workers or max(1, min(2, (os.cpu_count() or 2) - 1))
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            # 스레드가 많은 Streamlit 서버 프로세스를 fork하면 잠긴 락이 복제되어 멈출 수 있으므로 spawn 사용
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def _reference_file(self, blob_path):
+        if not blob_path:
+            return None
+        local_path = os.path.join(self.cache_dir, blob_path.replace("/", "_"))
+        if not os.path.exists(local_path):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = local_path + ".part"
+            self.get_bucket().blob(blob_path).download_to_filename(tmp_path)
+            os.replace(tmp_path, local_path)
+        return local_path
+
+    def __call__(self, job, spool_path):
+        """제출 문서에 병합할 채점 결과와 요약 반환 (정렬/필터용 값은 최상위 필드로도 기록)"""
+        snapshot = self.get_db().collection("readfit_assignments").document(job["access_code"]).get()
+        assignment = snapshot.to_dict() if snapshot.exists else {}
+        try:
+            reference_path = self._reference_file(assignment.get("reference_audio_path"))
+        except Exception as e:
+            logger.warning("모범 낭독 다운로드 실패 (%s): %s", job["access_code"], e)
+            reference_path = None
+        result = self._get_pool().submit(
+            analyze_recording, spool_path, assignment.get("text", ""), reference_path
+        ).result(timeout=SCORE_TIMEOUT_SECONDS)
+        result["duration_seconds"] = result["summary"]["duration_seconds"]
+        result["silence_ratio"] = result["summary"]["silence_ratio"]
+        return result
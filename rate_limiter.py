@@ -0,0 +1,224 @@
+"""
+OpenAI 호출 속도 제한 및 우선순위 스케줄러 모듈
+모델별 분당 요청 수(RPM)와 분당 토큰 수(TPM)를 토큰 버킷으로 관리하고,
+학생 상호작용 호출(interactive)이 배치 작업(batch)보다 항상 먼저 처리되도록 합니다.
+대기 시간은 우선순위별로 집계되어 Prometheus 텍스트 형식으로 내보낼 수 있습니다.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+
+
+# 모델별 한도 (OpenAI 계정 티어 기준 값, 환경 변수 OPENAI_<MODEL>_RPM / _TPM 으로 덮어쓰기 가능)
+MODEL_LIMITS = {
+    "gpt-4o-mini": {"rpm": 500, "tpm": 200000},
+    "dall-e-3": {"rpm": 5, "tpm": None},
+}
+DEFAULT_LIMITS = {"rpm": 60, "tpm": 60000}
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+# 대기 시간 히스토그램 버킷 경계(초)
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class SchedulerTimeoutError(Exception):
+    """허용 대기 시간 안에 호출 순서가 오지 않았을 때 발생합니다."""
+
+
+class TokenBucket:
+    """분당 한도를 초당 보충 속도로 바꾼 토큰 버킷 (잠금은 스케줄러가 담당)"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """amount만큼 꺼내려면 기다려야 하는 시간(초). 0이면 즉시 가능"""
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+
+def _limit_for(model, kind):
+    env_name = f"OPENAI_{model.upper().replace('-', '_').replace('.', '_')}_{kind.upper()}"
+    if os.getenv(env_name):
+        return int(os.getenv(env_name))
+    return MODEL_LIMITS.get(model, DEFAULT_LIMITS).get(kind)
+
+
+class OpenAIScheduler:
+    """모델별 RPM/TPM 버킷과 우선순위 대기열을 가진 프로세스 전역 스케줄러"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._buckets = {}
+        self._waiters = {}  # model -> heap of (priority, seq) (다른 모델의 대기 요청은 서로 막지 않음)
+        self._seq = itertools.count()
+        self._wait_stats = {}
+        for name in PRIORITIES:
+            self._stats_for(name)
+
+    def _stats_for(self, priority):
+        return self._wait_stats.setdefault(
+            priority, {"count": 0, "sum": 0.0, "buckets": [0] * len(WAIT_BUCKETS), "timeouts": 0}
+        )
+
+    def _model_buckets(self, model):
+        if model not in self._buckets:
+            rpm = _limit_for(model, "rpm")
+            tpm = _limit_for(model, "tpm")
+            self._buckets[model] = (
+                TokenBucket(rpm) if rpm else None,
+                TokenBucket(tpm) if tpm else None,
+            )
+        return self._buckets[model]
+
+    def acquire(self, model, tokens=0, priority="interactive", max_wait=30.0):
+        """
+        호출 한 건의 실행 권한을 얻을 때까지 대기합니다.
+
+        Args:
+            model (str): 모델 이름 (한도 조회용)
+            tokens (int): 예상 토큰 수 (프롬프트 + 응답)
+            priority (str): "interactive" 또는 "batch"
+            max_wait (float): 최대 대기 시간(초)
+
+        Returns:
+            float: 실제 대기 시간(초)
+
+        Raises:
+            SchedulerTimeoutError: max_wait 안에 실행 권한을 얻지 못한 경우
+        """
+        started = time.monotonic()
+        entry = (PRIORITIES.get(priority, PRIORITIES["batch"]), next(self._seq))
+        with self._cond:
+            waiters = self._waiters.setdefault(model, [])
+            heapq.heappush(waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    rpm_bucket, tpm_bucket = self._model_buckets(model)
+                    wait = 0.0
+                    for bucket, amount in ((rpm_bucket, 1), (tpm_bucket, tokens)):
+                        if bucket:
+                            bucket.refill(now)
+                            wait = max(wait, bucket.wait_time(amount))
+                    if waiters[0] == entry and wait == 0.0:
+                        if rpm_bucket:
+                            rpm_bucket.take(1)
+                        if tpm_bucket:
+                            tpm_bucket.take(tokens)
+                        break
+                    remaining = max_wait - (now - started)
+                    if remaining <= 0:
+                        self._stats_for(priority)["timeouts"] += 1
+                        raise SchedulerTimeoutError(
+                            f"{model} 호출 대기 시간 초과 ({max_wait:.0f}초, {priority})"
+                        )
+                    self._cond.wait(timeout=min(remaining, wait or 0.05))
+            finally:
+                waiters.remove(entry)
+                heapq.heapify(waiters)
+                self._cond.notify_all()
+        waited = time.monotonic() - started
+        self._record_wait(priority, waited)
+        return waited
+
+    def settle(self, model, estimated_tokens, actual_tokens):
+        """응답의 실제 사용 토큰으로 TPM 버킷을 보정합니다."""
+        if actual_tokens is None:
+            return
+        with self._cond:
+            _, tpm_bucket = self._model_buckets(model)
+            if tpm_bucket:
+                tpm_bucket.tokens = min(
+                    tpm_bucket.capacity, tpm_bucket.tokens + estimated_tokens - actual_tokens
+                )
+                self._cond.notify_all()
+
+    def _record_wait(self, priority, waited):
+        with self._cond:
+            stats = self._stats_for(priority)
+            stats["count"] += 1
+            stats["sum"] += waited
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if waited <= bound:
+                    stats["buckets"][i] += 1
+
+    def metrics(self):
+        """우선순위별 대기 시간 통계와 현재 대기열 길이"""
+        with self._cond:
+            queued = {name: 0 for name in PRIORITIES}
+            for level, _ in (entry for waiters in self._waiters.values() for entry in waiters):
+                for name, value in PRIORITIES.items():
+                    if value == level:
+                        queued[name] += 1
+            return {
+                "queue_wait": {
+                    name: {
+                        "count": s["count"],
+                        "sum": round(s["sum"], 4),
+                        "buckets": dict(zip(WAIT_BUCKETS, s["buckets"])),
+                        "timeouts": s["timeouts"],
+                    }
+                    for name, s in self._wait_stats.items()
+                },
+                "queued": queued,
+            }
+
+    def metrics_text(self):
+        """Prometheus 텍스트 형식의 대기 시간 히스토그램"""
+        m = self.metrics()
+        lines = [
+            "# HELP openai_queue_wait_seconds Time spent waiting for OpenAI rate limit capacity.",
+            "# TYPE openai_queue_wait_seconds histogram",
+        ]
+        for name, s in m["queue_wait"].items():
+            for bound, count in s["buckets"].items():
+                lines.append(f'openai_queue_wait_seconds_bucket{{priority="{name}",le="{bound}"}} {count}')
+            lines.append(f'openai_queue_wait_seconds_bucket{{priority="{name}",le="+Inf"}} {s["count"]}')
+            lines.append(f'openai_queue_wait_seconds_sum{{priority="{name}"}} {s["sum"]}')
+            lines.append(f'openai_queue_wait_seconds_count{{priority="{name}"}} {s["count"]}')
+        lines.append("# TYPE openai_queue_timeouts_total counter")
+        for name, s in m["queue_wait"].items():
+            lines.append(f'openai_queue_timeouts_total{{priority="{name}"}} {s["timeouts"]}')
+        lines.append("# TYPE openai_queue_length gauge")
+        for name, count in m["queued"].items():
+            lines.append(f'openai_queue_length{{priority="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def estimate_tokens(messages=None, prompt="", max_output_tokens=300):
+    """문자 수 기반 대략적인 토큰 추정 (영어 약 4자, 한글 약 1자당 1토큰)"""
+    text = prompt or ""
+    for message in messages or []:
+        text += str(message.get("content", ""))
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars // 4) + (len(text) - ascii_chars) + max_output_tokens
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """프로세스 전역 스케줄러"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = OpenAIScheduler()
+        return _scheduler
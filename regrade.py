@@ -0,0 +1,290 @@
+"""
+과거 제출 재채점 작업
+채점 규칙(scoring_rules.py)을 바꾼 뒤 이미 저장된 제출의 활동 점수·최종 점수를 새 규칙 버전으로 다시 계산합니다.
+
+- 제출을 문서 ID 순으로 페이지 단위 조회 (채점에 필요한 필드만 프로젝션)
+- 바뀐 제출만 배치 쓰기로 갱신, 배치 커밋은 스레드 풀에서 병렬 실행 (다음 페이지 조회와 겹침)
+- 페이지 커밋이 끝날 때마다 체크포인트 저장 → 중단 후 같은 명령으로 이어서 실행
+- 학생 학습 이력(readfit_rosters)의 해당 제출 점수도 같은 배치에서 갱신
+- 바뀐 학습 코드의 문항 집계 문서(readfit_item_stats)에 regraded_at을 기록 → 학급 통계 캐시 무효화
+- 완료 후 분석 스냅샷(analytics_store)을 다시 생성
+  (문항 분석·오답 유형 집계는 점수와 무관)
+
+실행 예:
+    python regrade.py --code ABC123 --dry-run
+    python regrade.py --code ABC123 --code XYZ789 --mission writer
+    python regrade.py --all --workers 8
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import scoring_rules
+import student_registry
+from item_analysis import ROLLUP_COLLECTION
+
+SUBMISSIONS_COLLECTION = "readfit_submissions"
+PAGE_SIZE = 500
+# 제출 갱신 + 학습 이력 갱신이 한 배치에 들어가므로 Firestore 배치 한도(500 쓰기)의 절반 이하
+BATCH_DOCS = 200
+IN_QUERY_LIMIT = 30
+REGRADE_FIELDS = (
+    "access_code", "timestamp", "student_id", "mission_id", "mission_details",
+    "quiz_score", "activity_score", "total_score", "scoring_version",
+)
+CHECKPOINT_DIR = os.getenv(
+    "READFIT_REGRADE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "regrade"),
+)
+
+
+def job_id(access_codes, mission_id, version):
+    """같은 선택 조건과 규칙 버전이면 같은 작업 (체크포인트 공유)"""
+    key = ",".join(sorted(access_codes or [])) or "*"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    return f"v{version}_{mission_id or 'all'}_{digest}"
+
+
+def _fresh_state():
+    return {"group": 0, "last_doc_id": None, "scanned": 0, "changed": 0, "by_mission": {}, "done": False}
+
+
+class Checkpoint:
+    """작업 진행 상황 (JSON 파일, 원자적 교체로 저장)"""
+
+    def __init__(self, job, checkpoint_dir=CHECKPOINT_DIR):
+        self.path = os.path.join(checkpoint_dir, f"{job}.json")
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = _fresh_state()
+
+    def save(self, **updates):
+        self.state.update(updates)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def reset(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self.state = _fresh_state()
+
+
+def _query_groups(access_codes):
+    """학습 코드를 in 조회 한도 단위로 나눈 조회 그룹 (None = 전체 제출)"""
+    if not access_codes:
+        return [None]
+    codes = sorted(set(access_codes))
+    return [codes[i:i + IN_QUERY_LIMIT] for i in range(0, len(codes), IN_QUERY_LIMIT)]
+
+
+def iter_pages(db, codes, last_doc_id=None, page_size=PAGE_SIZE):
+    """조회 그룹 하나의 제출을 문서 ID 순 페이지로 반환 (last_doc_id 다음부터)"""
+    from firebase_admin import firestore
+
+    collection = db.collection(SUBMISSIONS_COLLECTION)
+    query = collection
+    if codes is not None:
+        query = query.where("access_code", "in", codes)
+    query = query.select(list(REGRADE_FIELDS)).order_by(firestore.FieldPath.document_id()).limit(page_size)
+    cursor = collection.document(last_doc_id).get() if last_doc_id else None
+    while True:
+        page = query.start_after(cursor) if cursor is not None else query
+        docs = list(page.stream())
+        if docs:
+            yield docs
+        if len(docs) < page_size:
+            return
+        cursor = docs[-1]
+
+
+def plan_update(data, version, spell_checker=None):
+    """
+    제출 한 건의 재채점 결과.
+
+    Returns:
+        dict: 바뀐 필드 (그대로면 None)
+    """
+    graded = scoring_rules.regrade(data, version, spell_checker)
+    unchanged = (
+        graded["activity_score"] == data.get("activity_score")
+        and graded["total_score"] == data.get("total_score")
+        and data.get("scoring_version", 1) == version
+    )
+    return None if unchanged else graded
+
+
+class RegradeJob:
+    """
+    재채점 작업.
+
+    Args:
+        db: Firestore 클라이언트
+        access_codes (list): 대상 학습 코드 (비우면 전체 제출)
+        mission_id (str): 대상 활동 (None이면 전체)
+        version (int): 적용할 채점 규칙 버전
+        workers (int): 배치 커밋 동시 실행 수
+        dry_run (bool): 쓰지 않고 변경 건수만 계산
+    """
+
+    def __init__(self, db, access_codes=None, mission_id=None, version=scoring_rules.CURRENT_VERSION,
+                 workers=4, dry_run=False, checkpoint_dir=CHECKPOINT_DIR):
+        scoring_rules.get_rules(version)
+        self.db = db
+        self.access_codes = list(access_codes or [])
+        self.mission_id = mission_id
+        self.version = version
+        self.workers = workers
+        self.dry_run = dry_run
+        self.checkpoint = Checkpoint(job_id(self.access_codes, mission_id, version), checkpoint_dir)
+        self._assignments = {}
+        self.by_mission = Counter()
+
+    def _assignment(self, access_code):
+        if access_code not in self._assignments:
+            snapshot = self.db.collection("readfit_assignments").document(access_code).get() if access_code else None
+            self._assignments[access_code] = snapshot.to_dict() if snapshot is not None and snapshot.exists else {}
+        return self._assignments[access_code]
+
+    def _plan_page(self, docs):
+        """페이지의 변경 목록 [(문서, 제출 데이터, 새 점수, 과제)] (과제 조회는 여기서만 - 커밋 스레드는 읽지 않음)"""
+        updates = []
+        for doc in docs:
+            data = doc.to_dict()
+            if self.mission_id and data.get("mission_id") != self.mission_id:
+                continue
+            graded = plan_update(data, self.version)
+            if graded is not None:
+                updates.append((doc, data, graded, self._assignment(data.get("access_code"))))
+        return updates
+
+    def _commit(self, updates):
+        from firebase_admin import firestore
+
+        batch = self.db.batch()
+        for doc, data, graded, assignment in updates:
+            batch.update(doc.reference, dict(graded, regraded_at=firestore.SERVER_TIMESTAMP))
+            teacher = assignment.get("teacher_name")
+            if data.get("student_id") and teacher and data.get("timestamp"):
+                entry = {field: data.get(field) for field in student_registry.PROGRESS_FIELDS}
+                entry.update(activity_score=graded["activity_score"], total_score=graded["total_score"],
+                             unit=assignment.get("unit"))
+                batch.set(student_registry.progress_ref(self.db, teacher, data["student_id"], data), entry, merge=True)
+        batch.commit()
+        # 집계 문서 수정 시각이 학급 통계의 데이터 버전이므로 점수가 바뀐 학습 코드마다 갱신
+        touch = self.db.batch()
+        for code in {data.get("access_code") for _, data, _, _ in updates} - {None}:
+            rollup_ref = self.db.collection(ROLLUP_COLLECTION).document(code)
+            touch.set(rollup_ref, {"regraded_at": firestore.SERVER_TIMESTAMP}, merge=True)
+        touch.commit()
+
+    def run(self, restart=False):
+        """
+        작업 실행 (체크포인트가 있으면 이어서).
+
+        Returns:
+            dict: {"scanned", "changed", "by_mission", "seconds", "done"}
+        """
+        if restart:
+            self.checkpoint.reset()
+        # 미리보기는 항상 처음부터 확인하고 체크포인트를 건드리지 않음
+        state = self.checkpoint.state if not self.dry_run else _fresh_state()
+        started = time.perf_counter()
+        if state["done"] and not self.dry_run:
+            print("이미 완료된 작업입니다. 처음부터 다시 하려면 --restart를 사용하세요.")
+            return dict(state, by_mission=state.get("by_mission", {}), seconds=0.0)
+
+        # 미션별 변경 건수도 scanned/changed와 같은 시점 값으로 체크포인트에 저장하고 이어받음
+        scanned, changed = state["scanned"], state["changed"]
+        self.by_mission = Counter(state.get("by_mission", {}))
+        groups = _query_groups(self.access_codes)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="regrade") as pool:
+            for group_index in range(state["group"], len(groups)):
+                last_doc_id = state["last_doc_id"] if group_index == state["group"] else None
+                pending = []
+                for docs in iter_pages(self.db, groups[group_index], last_doc_id):
+                    updates = self._plan_page(docs)
+                    # 이전 페이지 커밋이 끝난 뒤에만 체크포인트를 옮김 (그동안 이번 페이지 조회/계산)
+                    wait(pending)
+                    for future in pending:
+                        future.result()
+                    if pending and not self.dry_run:
+                        self.checkpoint.save(group=group_index, last_doc_id=last_doc_id,
+                                             scanned=scanned, changed=changed, by_mission=dict(self.by_mission))
+                    pending = []
+                    if not self.dry_run:
+                        pending = [
+                            pool.submit(self._commit, updates[i:i + BATCH_DOCS])
+                            for i in range(0, len(updates), BATCH_DOCS)
+                        ]
+                    scanned += len(docs)
+                    changed += len(updates)
+                    self.by_mission.update(data.get("mission_id", "unknown") for _, data, _, _ in updates)
+                    last_doc_id = docs[-1].id
+                    print(f"  {scanned}건 확인, {changed}건 변경 ({time.perf_counter() - started:.1f}초)")
+                wait(pending)
+                for future in pending:
+                    future.result()
+                if not self.dry_run:
+                    self.checkpoint.save(group=group_index + 1, last_doc_id=None, scanned=scanned, changed=changed,
+                                         by_mission=dict(self.by_mission))
+
+        if not self.dry_run:
+            self.checkpoint.save(done=True)
+        return {
+            "scanned": scanned,
+            "changed": changed,
+            "by_mission": dict(self.by_mission),
+            "seconds": round(time.perf_counter() - started, 2),
+            "done": True,
+        }
+
+
+def rebuild_aggregates(db):
+    """재채점 후 점수를 담고 있는 집계 데이터 다시 생성 (분석 스냅샷이 있을 때만)"""
+    import analytics_store
+
+    if os.path.isdir(analytics_store.SNAPSHOT_DIR):
+        rows = analytics_store.rebuild(db)
+        print(f"분석 스냅샷 {rows}건으로 다시 생성")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ReadFit 과거 제출 재채점")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--code", action="append", help="대상 학습 코드 (여러 번 지정 가능)")
+    target.add_argument("--all", action="store_true", help="전체 제출")
+    parser.add_argument("--mission", choices=("image_detective", "mystery_20_questions", "writer"), help="대상 활동")
+    parser.add_argument("--version", type=int, default=scoring_rules.CURRENT_VERSION, help="적용할 채점 규칙 버전")
+    parser.add_argument("--workers", type=int, default=4, help="배치 커밋 동시 실행 수")
+    parser.add_argument("--dry-run", action="store_true", help="쓰지 않고 변경 건수만 확인")
+    parser.add_argument("--restart", action="store_true", help="체크포인트를 무시하고 처음부터")
+    parser.add_argument("--skip-rebuild", action="store_true", help="집계 데이터 재생성 생략")
+    args = parser.parse_args()
+
+    from firebase_config import get_firestore_client
+
+    db = get_firestore_client()
+    job = RegradeJob(db, args.code, args.mission, args.version, args.workers, args.dry_run)
+    print(f"재채점 시작 (규칙 v{args.version}, 작업 {os.path.basename(job.checkpoint.path)[:-5]})")
+    result = job.run(restart=args.restart)
+    print(f"\n확인 {result['scanned']}건 / 변경 {result['changed']}건 ({result['seconds']}초)")
+    for mission, count in sorted(result["by_mission"].items()):
+        print(f"  {mission}: {count}건")
+    if not args.dry_run and result["changed"] and not args.skip_rebuild:
+        rebuild_aggregates(db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+채점 규칙 (버전 관리)
+활동 점수와 최종 점수 계산식을 버전별로 한곳에 모아 둡니다.
+학생 화면과 재채점 작업(regrade.py)이 같은 함수를 쓰므로 규칙을 바꿀 때는
+SCORING_RULES에 새 버전을 추가하고 CURRENT_VERSION만 올리면 됩니다.
+제출 문서에는 채점에 쓴 버전이 scoring_version으로 기록됩니다 (없으면 1).
+"""
+
+from writing_analyzer import analyze_writing, score_writing
+
+SCORING_RULES = {
+    # 최초 규칙: 작가 미션은 제출만 하면 85점
+    1: {
+        "quiz_weight": 0.4,
+        "activity_weight": 0.6,
+        "detective": {"correct": 100, "wrong": 30},
+        "mystery": {"correct": 100, "wrong": 50},
+        "writer_fixed": 85,
+    },
+    # 작가 미션을 로컬 작문 분석(키워드/분량/철자/어휘 다양도)으로 채점
+    2: {
+        "quiz_weight": 0.4,
+        "activity_weight": 0.6,
+        "detective": {"correct": 100, "wrong": 30},
+        "mystery": {"correct": 100, "wrong": 50},
+        "writer_fixed": None,
+    },
+}
+CURRENT_VERSION = 2
+
+
+def get_rules(version=CURRENT_VERSION):
+    if version not in SCORING_RULES:
+        raise ValueError(f"알 수 없는 채점 규칙 버전: {version}")
+    return SCORING_RULES[version]
+
+
+def detective_score(is_correct, version=CURRENT_VERSION):
+    points = get_rules(version)["detective"]
+    return points["correct"] if is_correct else points["wrong"]
+
+
+def mystery_score(is_correct, version=CURRENT_VERSION):
+    points = get_rules(version)["mystery"]
+    return points["correct"] if is_correct else points["wrong"]
+
+
+def writer_score(analysis, version=CURRENT_VERSION):
+    fixed = get_rules(version)["writer_fixed"]
+    return fixed if fixed is not None else score_writing(analysis)
+
+
+def total_score(quiz_score, activity_score, version=CURRENT_VERSION):
+    rules = get_rules(version)
+    return int(quiz_score * rules["quiz_weight"] + activity_score * rules["activity_weight"])
+
+
+def activity_score_from_details(mission_id, mission_details, version=CURRENT_VERSION, spell_checker=None):
+    """
+    저장된 mission_details로 활동 점수를 다시 계산합니다.
+
+    Returns:
+        int: 활동 점수 (미션 정보가 부족해 다시 계산할 수 없으면 None)
+    """
+    details = mission_details or {}
+    if mission_id == "image_detective":
+        if "result_type" not in details:
+            return None
+        return detective_score(details["result_type"] == "correct", version)
+    if mission_id == "mystery_20_questions":
+        target = details.get("target_word")
+        if not target:
+            return None
+        answer = (details.get("student_answer") or "").strip().lower()
+        return mystery_score(answer == target.lower(), version)
+    if mission_id == "writer":
+        if get_rules(version)["writer_fixed"] is not None:
+            return writer_score(None, version)
+        analysis = details.get("analysis")
+        if not analysis:
+            # 분석 결과가 없는 예전 제출은 작품과 키워드로 다시 분석
+            text = details.get("student_text") or ""
+            if not text.strip():
+                return None
+            analysis = analyze_writing(text, details.get("keywords_used") or [], spell_checker=spell_checker)
+        return writer_score(analysis, version)
+    return None
+
+
+def regrade(submission, version=CURRENT_VERSION, spell_checker=None):
+    """
+    제출 한 건의 파생 점수를 지정한 규칙 버전으로 다시 계산합니다.
+
+    Returns:
+        dict: {"activity_score", "total_score", "scoring_version"}
+              (활동 점수를 다시 계산할 수 없으면 저장된 활동 점수를 유지)
+    """
+    activity = activity_score_from_details(
+        submission.get("mission_id"), submission.get("mission_details"), version, spell_checker
+    )
+    if activity is None:
+        activity = submission.get("activity_score") or 0
+    return {
+        "activity_score": activity,
+        "total_score": total_score(submission.get("quiz_score") or 0, activity, version),
+        "scoring_version": version,
+    }
@@ -0,0 +1,274 @@
+"""
+프로세스 간 공유 캐시 계층
+st.cache_resource / st.session_state는 워커 프로세스마다 따로 있으므로,
+Streamlit 워커 여러 개를 로드 밸런서 뒤에 두면 과제 조회·AI 응답·생성 이미지를 워커마다 다시 만들게 됩니다.
+이 모듈은 모든 워커가 함께 보는 캐시를 네임스페이스 단위로 제공합니다.
+
+백엔드 (READFIT_CACHE_URL로 선택):
+    sqlite:///경로/cache.db   같은 호스트의 워커끼리 파일 하나 공유 (기본값, WAL 모드)
+    redis://호스트:6379/0     여러 호스트에 걸친 배포 (redis 패키지 필요)
+    memory://                 프로세스 내부 전용 (테스트용)
+
+값은 pickle로 저장하므로 이 앱만 쓰는 저장소를 가리켜야 합니다.
+무효화는 키 삭제(delete) 또는 네임스페이스 전체 삭제(clear)이며, 모든 워커가 같은 저장소를 보므로 즉시 반영됩니다.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CACHE_URL = os.getenv(
+    "READFIT_CACHE_URL",
+    "sqlite:///" + os.path.join(tempfile.gettempdir(), "readfit_cache", "cache.db"),
+)
+KEY_PREFIX = "readfit"
+
+# 네임스페이스별 기본 유효 시간(초)
+NAMESPACE_TTLS = {
+    "assignment": 6 * 3600,
+    "ai_response": 7 * 24 * 3600,
+    "image": 30 * 24 * 3600,
+}
+DEFAULT_TTL = 3600
+
+SQLITE_MAX_BYTES = 512 * 1024 * 1024
+SQLITE_PRUNE_EVERY = 200  # set 호출 N번마다 만료/용량 정리
+
+
+def make_key(*parts):
+    """입력값(단어, 지문 문장, 모델 등)으로 만든 고정 길이 캐시 키"""
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:40]
+
+
+class MemoryBackend:
+    """프로세스 내부 백엔드 (공유되지 않음)"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._data[key]
+                return None
+            return entry[1]
+
+    def set(self, key, blob, ttl):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, blob)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self, prefix):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+
+class SQLiteBackend:
+    """
+    파일 하나를 여러 프로세스가 공유하는 백엔드.
+    WAL 모드라 읽기는 쓰기를 기다리지 않으며, 연결은 스레드마다 따로 엽니다.
+    """
+
+    def __init__(self, path, max_bytes=SQLITE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL, created_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache(expires_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, blob, ttl):
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, created_at) VALUES (?, ?, ?, ?)",
+            (key, sqlite3.Binary(blob), now + ttl, now),
+        )
+        with self._writes_lock:
+            self._writes += 1
+            prune = self._writes % SQLITE_PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self, prefix):
+        self._conn().execute("DELETE FROM cache WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+    def prune(self):
+        """만료 항목 삭제 후 용량을 넘으면 오래된 항목부터 삭제"""
+        conn = self._conn()
+        conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM cache").fetchone()[0]
+        while total > self.max_bytes:
+            rows = conn.execute("SELECT key, LENGTH(value) FROM cache ORDER BY created_at LIMIT 100").fetchall()
+            if not rows:
+                break
+            conn.executemany("DELETE FROM cache WHERE key = ?", [(k,) for k, _ in rows])
+            total -= sum(size for _, size in rows)
+
+
+class RedisBackend:
+    """Redis 프로토콜 백엔드 (여러 호스트의 워커가 공유)"""
+
+    def __init__(self, url):
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+
+    def get(self, key):
+        return self._client.get(key)
+
+    def set(self, key, blob, ttl):
+        self._client.set(key, blob, ex=max(1, int(ttl)))
+
+    def delete(self, key):
+        self._client.delete(key)
+
+    def clear(self, prefix):
+        keys = list(self._client.scan_iter(match=prefix + "*", count=500))
+        for i in range(0, len(keys), 500):
+            self._client.delete(*keys[i:i + 500])
+
+
+def create_backend(url=CACHE_URL):
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        return RedisBackend(url)
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    if url.startswith("memory://"):
+        return MemoryBackend()
+    raise ValueError(f"지원하지 않는 캐시 URL: {url}")
+
+
+class SharedCache:
+    """
+    네임스페이스별 공유 캐시.
+    백엔드 오류는 캐시 미스로 처리하여 캐시 장애가 학생 화면을 멈추지 않게 합니다.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._stats_lock = threading.Lock()
+        self.stats = {}  # namespace -> {"hits", "misses", "errors"}
+
+    def _key(self, namespace, key):
+        return f"{KEY_PREFIX}:{namespace}:{key}"
+
+    def _count(self, namespace, field):
+        with self._stats_lock:
+            counts = self.stats.setdefault(namespace, {"hits": 0, "misses": 0, "errors": 0})
+            counts[field] += 1
+
+    def get(self, namespace, key):
+        """캐시된 값 (없거나 만료되었으면 None)"""
+        try:
+            blob = self.backend.get(self._key(namespace, key))
+        except Exception as e:
+            logger.warning("공유 캐시 읽기 실패 (%s): %s", namespace, e)
+            self._count(namespace, "errors")
+            return None
+        if blob is None:
+            self._count(namespace, "misses")
+            return None
+        self._count(namespace, "hits")
+        return pickle.loads(blob)
+
+    def set(self, namespace, key, value, ttl=None):
+        ttl = ttl or NAMESPACE_TTLS.get(namespace, DEFAULT_TTL)
+        try:
+            self.backend.set(self._key(namespace, key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ttl)
+        except Exception as e:
+            logger.warning("공유 캐시 쓰기 실패 (%s): %s", namespace, e)
+            self._count(namespace, "errors")
+
+    def delete(self, namespace, key):
+        try:
+            self.backend.delete(self._key(namespace, key))
+        except Exception as e:
+            logger.warning("공유 캐시 삭제 실패 (%s): %s", namespace, e)
+
+    def clear(self, namespace):
+        """네임스페이스 전체 무효화 (모든 워커에 즉시 반영)"""
+        try:
+            self.backend.clear(self._key(namespace, ""))
+        except Exception as e:
+            logger.warning("공유 캐시 비우기 실패 (%s): %s", namespace, e)
+
+    def get_or_set(self, namespace, key, loader, ttl=None, cache_if=None):
+        """
+        캐시된 값을 반환하고, 없으면 loader()를 호출해 저장합니다.
+
+        Args:
+            cache_if (callable): 결과를 저장할지 판단 (예: 폴백 응답은 저장하지 않음). None이면 None이 아닌 값만 저장
+        """
+        value = self.get(namespace, key)
+        if value is not None:
+            return value
+        value = loader()
+        if value is not None and (cache_if is None or cache_if(value)):
+            self.set(namespace, key, value, ttl)
+        return value
+
+    def hit_rates(self):
+        """네임스페이스별 적중률 (관리자 패널용)"""
+        with self._stats_lock:
+            rates = {}
+            for namespace, counts in self.stats.items():
+                lookups = counts["hits"] + counts["misses"]
+                rates[namespace] = dict(counts, hit_rate=round(counts["hits"] / lookups, 3) if lookups else None)
+            return rates
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """프로세스 전역 공유 캐시 (백엔드를 만들 수 없으면 프로세스 내부 캐시로 대체)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            try:
+                backend = create_backend()
+            except Exception as e:
+                logger.warning("공유 캐시 백엔드 초기화 실패, 프로세스 내부 캐시 사용: %s", e)
+                backend = MemoryBackend()
+            _cache = SharedCache(backend)
+        return _cache
@@ -7,47 +7,131 @@ import streamlit as st
 import random
 import string
 import base64
+import logging
 import os
+import threading
+import time
 from datetime import datetime
+import openai
 from openai import OpenAI
+import profiler
+import tracing
+import analytics_store
+import audio_transcode
+import error_heatmap
+import scoring_rules
+import shared_cache
+import student_progress
+import student_registry
+import submission_export
+import warmup
+from audio_urls import SignedUrlCache
+from audio_upload import SUBMISSIONS_COLLECTION as AUDIO_SUBMISSIONS_COLLECTION, AudioUploader, content_type_for
+from class_stats import data_version, get_class_stats
+from circuit_breaker import CircuitOpenError, all_breaker_status, get_breaker
+from item_analysis import ROLLUP_COLLECTION as ITEM_STATS_COLLECTION, analyze as analyze_items, encode_answers, record_submission
+from pronunciation_scorer import ShadowingScorer
+from rate_limiter import SchedulerTimeoutError, estimate_tokens, get_scheduler
+from writing_analyzer import analyze_writing, build_spell_checker
+
+logger = logging.getLogger(__name__)
 
 
 # ==========================================================================
 # UTILITY FUNCTIONS
 # ==========================================================================
 
+# 엔드포인트별 타임아웃(초)과 서킷 브레이커 설정.
+# SDK 기본값(600초, 재시도 2회) 대신 짧게 끊고, 장애가 이어지면 서킷을 열어 즉시 폴백합니다.
+OPENAI_TIMEOUTS = {"chat": 20.0, "images": 60.0}
+# 재시도는 SDK 대신 call_openai에서 직접 수행 (재시도 횟수를 추적 로그에 남기기 위함)
+OPENAI_MAX_RETRIES = 1
+OPENAI_RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+# 서킷 오류율에는 일시적 장애(타임아웃/연결/429/5xx)만 집계 (잘못된 요청 하나로 전체 학생이 차단되지 않도록)
+OPENAI_BREAKER_OPTIONS = {
+    "chat": {"slow_call_seconds": 15.0, "failure_errors": OPENAI_RETRYABLE_ERRORS},
+    "images": {"slow_call_seconds": 45.0, "failure_errors": OPENAI_RETRYABLE_ERRORS},
+}
+
+
 @st.cache_resource(show_spinner=False)
 def get_openai_client():
-    """Create a cached OpenAI client using secrets or env."""
+    """Create a cached OpenAI client using secrets or env.
+
+    OPENAI_BASE_URL을 지정하면 해당 서버(예: openai_stub_server.py 로컬 대역)로 요청합니다.
+    """
     api_key = st.secrets.get("OPENAI_API_KEY") or os.getenv("OPENAI_API_KEY")
-    return OpenAI(api_key=api_key) if api_key else None
+    base_url = st.secrets.get("OPENAI_BASE_URL") or os.getenv("OPENAI_BASE_URL")
+    if base_url and not api_key:
+        api_key = "stub"  # 로컬 대역 서버는 키를 검사하지 않음
+    if not api_key:
+        return None
+    return OpenAI(api_key=api_key, base_url=base_url or None, timeout=OPENAI_TIMEOUTS["chat"], max_retries=0)
 
 
-def generate_report_insights_with_openai(submission_data, mission_details):
-    """Generate coaching-style Korean report insights as JSON via OpenAI Responses API."""
-    client = get_openai_client()
-    if not client:
-        return None
+def call_openai(endpoint, func, priority="interactive", feature="general", **kwargs):
+    """OpenAI 호출을 속도 제한 스케줄러와 엔드포인트별 서킷 브레이커로 감싸고 추적 로그를 남깁니다.
 
-    json_schema = {
-        "name": "report_insights",
-        "schema": {
-            "type": "object",
-            "properties": {
-                "one_line_feedback": {"type": "string"}
-            },
-            "required": ["one_line_feedback"],
-            "additionalProperties": False
-        },
-        "strict": True
-    }
+    Args:
+        endpoint (str): "chat" 또는 "images"
+        func (callable): 호출할 SDK 메서드 (예: client.chat.completions.create)
+        priority (str): "interactive"(학생 화면 대기 중) 또는 "batch"(리포트 등 후순위 작업)
+        feature (str): 비용/지연 집계용 기능 태그 (report, detective, distractor, feedback, image 등)
+
+    Raises:
+        CircuitOpenError: 서킷이 열려 있어 호출하지 않은 경우 (호출부에서 즉시 폴백)
+        SchedulerTimeoutError: 속도 제한 대기 시간이 초과된 경우
+    """
+    breaker = get_breaker(f"openai.{endpoint}", **OPENAI_BREAKER_OPTIONS.get(endpoint, {}))
+    # 서킷이 열려 있으면 속도 제한 토큰을 잡거나 대기열에서 기다리지 않고 바로 폴백
+    if breaker.is_open():
+        raise CircuitOpenError(f"{breaker.name} 서킷이 열려 있어 호출을 건너뜁니다.")
+    kwargs.setdefault("timeout", OPENAI_TIMEOUTS.get(endpoint, OPENAI_TIMEOUTS["chat"]))
+    model = kwargs.get("model", "gpt-4o-mini")
+    estimated = 0 if endpoint == "images" else estimate_tokens(kwargs.get("messages"))
+    scheduler = get_scheduler()
+    with profiler.section("openai.queue_wait"):
+        scheduler.acquire(model, estimated, priority=priority)
+    started = time.perf_counter()
+    retries = 0
+    with profiler.section(f"openai.{endpoint}"):
+        while True:
+            try:
+                result = breaker.call(func, **kwargs)
+                break
+            except Exception as e:
+                # CircuitOpenError(재시도 중 서킷이 열린 경우)도 오류로 기록
+                if retries >= OPENAI_MAX_RETRIES or not isinstance(e, OPENAI_RETRYABLE_ERRORS):
+                    tracing.record_openai(endpoint, model, feature, time.perf_counter() - started, retries, error=e)
+                    raise
+                retries += 1
+                time.sleep(0.5 * retries)
+                # 재시도도 새 요청이므로 속도 제한 용량을 다시 확보 (원래 요청의 우선순위 유지)
+                try:
+                    with profiler.section("openai.queue_wait"):
+                        scheduler.acquire(model, estimated, priority=priority)
+                except SchedulerTimeoutError as wait_error:
+                    tracing.record_openai(
+                        endpoint, model, feature, time.perf_counter() - started, retries, error=wait_error
+                    )
+                    raise
+    tracing.record_openai(endpoint, model, feature, time.perf_counter() - started, retries, result=result)
+    usage = getattr(result, "usage", None)
+    if estimated and usage is not None:
+        scheduler.settle(model, estimated, getattr(usage, "total_tokens", None))
+    return result
 
-    mission_id = submission_data.get("mission_id", "")
-    is_correct = submission_data.get("activity_score", 0) >= 80
-    
-    # 2~3문장 피드백 프롬프트 (칭찬 + 꿀팁)
-    prompt = f"""너는 초등학생을 따뜻하게 격려하는 선생님이야.
-아이가 {mission_id} 활동을 했고, {'정답' if is_correct else '오답'}을 골랐어.
+
+# 리포트 피드백 시스템 프롬프트 (변수 없이 고정 → 제공자 측 프롬프트 캐시 적중)
+REPORT_SYSTEM_PROMPT = """너는 초등학생을 따뜻하게 격려하는 선생님이야.
+사용자 메시지로 아이의 활동 결과가 JSON으로 주어져.
+- mission: image_detective(그림 보고 문장 고르기) / mystery_20_questions(빈칸 단어 추리) / writer(키워드로 이야기 쓰기)
+- result: 정답 또는 오답, quiz: 퀴즈 맞힌 수/전체, detail: 미션별 상세
 
 피드백 규칙 (총 2~3문장):
 1. [구체적인 칭찬] - 그림의 어떤 요소(주어/동사/사물 등)를 잘 찾았는지 콕 집어서 칭찬
@@ -64,18 +148,73 @@ def generate_report_insights_with_openai(submission_data, mission_details):
 
 좋은 예시 (전체):
 "문장 속 장소(school)를 정확하게 찾아냈어요! 다음에는 주어가 누구인지도 함께 생각하며 읽어보면 더 잘 이해될 거예요."
-
-제출 데이터: {submission_data}
-미션 상세: {mission_details}
 """
 
+# 미션별로 피드백에 쓰이는 mission_details 필드만 전달 (작문 원문, 시간 등은 제외)
+REPORT_DETAIL_FIELDS = {
+    "image_detective": ("result_type", "target_word", "student_answer"),
+    "mystery_20_questions": ("hints_used", "target_word", "student_answer"),
+    "writer": ("keywords_used",),
+}
+REPORT_ANALYSIS_FIELDS = ("word_count", "sentence_count", "keywords_found", "keywords_missing")
+
+
+def compact_report_context(submission_data, mission_details):
+    """리포트 피드백에 필요한 필드만 골라 짧은 JSON 문자열로 직렬화합니다."""
+    import json
+    mission_id = submission_data.get("mission_id", "")
+    detail = {
+        field: mission_details[field]
+        for field in REPORT_DETAIL_FIELDS.get(mission_id, ())
+        if mission_details.get(field) not in (None, "", [])
+    }
+    analysis = mission_details.get("analysis") or {}
+    for field in REPORT_ANALYSIS_FIELDS:
+        if analysis.get(field) not in (None, "", []):
+            detail[field] = analysis[field]
+    if analysis.get("misspellings"):
+        detail["misspellings"] = [m["word"] for m in analysis["misspellings"][:5]]
+    context = {
+        "mission": mission_id,
+        "result": "정답" if submission_data.get("activity_score", 0) >= 80 else "오답",
+        "quiz": f"{submission_data.get('quiz_correct', 0)}/{submission_data.get('quiz_total', 0)}",
+        "detail": detail,
+    }
+    return json.dumps(context, ensure_ascii=False, separators=(",", ":"))
+
+
+def generate_report_insights_with_openai(submission_data, mission_details):
+    """Generate coaching-style Korean report insights as JSON via OpenAI Responses API."""
+    client = get_openai_client()
+    if not client:
+        return None
+
+    json_schema = {
+        "name": "report_insights",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "one_line_feedback": {"type": "string"}
+            },
+            "required": ["one_line_feedback"],
+            "additionalProperties": False
+        },
+        "strict": True
+    }
+
+    messages = [
+        {"role": "system", "content": REPORT_SYSTEM_PROMPT},
+        {"role": "user", "content": compact_report_context(submission_data, mission_details)},
+    ]
+
     try:
-        resp = client.chat.completions.create(
+        resp = call_openai(
+            "chat",
+            client.chat.completions.create,
+            feature="report",
+            priority="batch",
             model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": str({"submission": submission_data, "mission_details": mission_details})}
-            ],
+            messages=messages,
             response_format={"type": "json_schema", "json_schema": json_schema}
         )
 
@@ -85,6 +224,8 @@ def generate_report_insights_with_openai(submission_data, mission_details):
             return None
         import json
         return json.loads(content)
+    except CircuitOpenError:
+        return None
     except Exception as e:
         st.error(f"❌ OpenAI 리포트 생성 실패: {type(e).__name__}: {str(e)}")
         return None
@@ -99,15 +240,23 @@ def generate_image_with_dalle(word, context_sentence=""):
     Returns:
         bytes or str: 이미지 바이트 데이터 또는 URL
     """
-    api_key = st.secrets.get("OPENAI_API_KEY") if hasattr(st, "secrets") else None
+    client = get_openai_client()
+    
+    # 같은 문장의 이미지는 모든 워커가 공유 (학생마다 다시 생성하지 않음)
+    image_cache = shared_cache.get_cache()
+    image_key = shared_cache.make_key("dall-e-3", word, context_sentence)
+    cached_image = image_cache.get("image", image_key)
+    if cached_image is not None:
+        return cached_image
     
-    if api_key:
+    if client:
         try:
-            client = OpenAI(api_key=api_key)
-            
             # 1단계: context_sentence를 시각화 가능한 장면 설명으로 변환
             if context_sentence:
-                chat_response = client.chat.completions.create(
+                chat_response = call_openai(
+                    "chat",
+                    client.chat.completions.create,
+                    feature="image_scene",
                     model="gpt-4o-mini",
                     messages=[{
                         "role": "user",
@@ -144,7 +293,10 @@ Key word (use only if naturally visible in the sentence):
 {word}
 """
             
-            result = client.images.generate(
+            result = call_openai(
+                "images",
+                client.images.generate,
+                feature="image",
                 model="dall-e-3",
                 prompt=image_prompt,
                 size="1024x1024",
@@ -152,7 +304,11 @@ Key word (use only if naturally visible in the sentence):
             )
             b64_data = result.data[0].b64_json
             if b64_data:
-                return base64.b64decode(b64_data)
+                image_bytes = base64.b64decode(b64_data)
+                image_cache.set("image", image_key, image_bytes)
+                return image_bytes
+        except CircuitOpenError:
+            pass
         except Exception as e:
             st.warning(f"OpenAI 이미지 생성 실패, 기본 이미지로 대체합니다: {e}")
     
@@ -173,14 +329,16 @@ def get_educational_distractors(word):
     Returns:
         dict: {"semantic": str, "spelling": str, "random": str}
     """
-    api_key = st.secrets.get("OPENAI_API_KEY")
+    client = get_openai_client()
     
-    if not api_key:
+    if not client:
         return {"semantic": "dog", "spelling": "log", "random": "desk"}
     
     try:
-        client = OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
+        response = call_openai(
+            "chat",
+            client.chat.completions.create,
+            feature="distractor",
             model="gpt-4o-mini",
             response_format={"type": "json_object"},
             messages=[{
@@ -201,6 +359,8 @@ Return ONLY a JSON object like: {{"semantic": "word1", "spelling": "word2", "ran
             raise ValueError("Empty content from OpenAI for distractors")
         result = json.loads(content)
         return result
+    except CircuitOpenError:
+        return {"semantic": "dog", "spelling": "log", "random": "desk"}
     except Exception as e:
         st.warning(f"오답 생성 실패: {e}")
         return {"semantic": "dog", "spelling": "log", "random": "desk"}
@@ -216,18 +376,26 @@ def get_sentence_distractors(correct_sentence, context_text):
     Returns:
         dict: {"subject_wrong": str, "verb_wrong": str, "object_wrong": str}
     """
-    api_key = st.secrets.get("OPENAI_API_KEY") if hasattr(st, "secrets") else None
+    client = get_openai_client()
     
-    if not api_key:
+    if not client:
         return {
             "subject_wrong": "The girl is running to school.",
             "verb_wrong": "The boy is walking to school.",
             "object_wrong": "The boy is running to the park."
         }
     
+    ai_cache = shared_cache.get_cache()
+    cache_key = shared_cache.make_key("sentence_distractors", "gpt-4o-mini", correct_sentence, context_text)
+    cached = ai_cache.get("ai_response", cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        client = OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
+        response = call_openai(
+            "chat",
+            client.chat.completions.create,
+            feature="distractor",
             model="gpt-4o-mini",
             response_format={"type": "json_object"},
             messages=[{
@@ -253,9 +421,11 @@ Return ONLY a JSON object like: {{"subject_wrong": "sentence1", "verb_wrong": "s
         if not content:
             raise ValueError("Empty content from OpenAI for sentence distractors")
         result = json.loads(content)
+        ai_cache.set("ai_response", cache_key, result)
         return result
     except Exception as e:
-        st.warning(f"오답 생성 실패: {e}")
+        if not isinstance(e, CircuitOpenError):
+            st.warning(f"오답 생성 실패: {e}")
         return {
             "subject_wrong": "The girl is running to school.",
             "verb_wrong": "The boy is walking to school.",
@@ -273,16 +443,18 @@ def get_writing_feedback(text, keywords):
     Returns:
         str: 한국어 피드백 메시지
     """
-    api_key = st.secrets.get("OPENAI_API_KEY")
+    client = get_openai_client()
     
-    if not api_key:
+    if not client:
         return "피드백 생성 중 오류가 발생했습니다."
     
     try:
-        client = OpenAI(api_key=api_key)
         keywords_str = ", ".join(keywords)
         
-        response = client.chat.completions.create(
+        response = call_openai(
+            "chat",
+            client.chat.completions.create,
+            feature="feedback",
             model="gpt-4o-mini",
             messages=[{
                 "role": "user",
@@ -313,6 +485,7 @@ def get_writing_feedback(text, keywords):
 # GLOBAL STYLES
 # ==========================================================================
 
+@profiler.timed("apply_global_styles")
 def apply_global_styles():
     """앱 전체에 공통 스타일을 적용합니다."""
     st.markdown(
@@ -419,6 +592,31 @@ YBM_TEXTBOOK = {
 }
 
 
+# 철자 검사기는 워밍업 스레드에서도 만들 수 있도록 st.cache_resource 밖에서 한 번만 색인
+_spell_checker = None
+_spell_checker_lock = threading.Lock()
+
+
+def build_textbook_spell_checker():
+    """교과서 지문 어휘로 만든 철자 검사기 (프로세스당 한 번만 색인, 스레드 안전)"""
+    global _spell_checker
+    with _spell_checker_lock:
+        if _spell_checker is None:
+            texts = [
+                unit[level]
+                for unit in YBM_TEXTBOOK.values()
+                for level in ("Beginner", "Intermediate", "Advanced")
+                if level in unit
+            ]
+            _spell_checker = build_spell_checker(texts)
+        return _spell_checker
+
+
+def get_spell_checker():
+    """교과서 지문 어휘로 만든 철자 검사기 (워밍업이 먼저 만들었으면 그대로 사용)"""
+    return build_textbook_spell_checker()
+
+
 # ============================================================================
 # 1. FIREBASE INITIALIZATION (Lazy Loading) - 기존 유지
 # ============================================================================
@@ -441,17 +639,69 @@ except Exception:
     pass
 
 
+@st.cache_resource(show_spinner=False)
+def get_audio_uploader():
+    """쉐도잉 녹음 백그라운드 업로더 (프로세스당 하나, 시작 시 미완료 업로드 재개)"""
+    uploader = AudioUploader(get_storage_bucket, get_firestore_client)
+    if audio_transcode.ffmpeg_available():
+        uploader.add_pre_upload_hook(audio_transcode.Transcoder())
+    else:
+        logger.warning("ffmpeg를 찾을 수 없어 녹음을 원본 형식으로 저장합니다.")
+    uploader.add_post_upload_hook(ShadowingScorer(get_firestore_client, get_storage_bucket, uploader.spool_dir))
+    resumed = uploader.resume_pending()
+    if resumed:
+        logger.info("미완료 오디오 업로드 %d건 재개", resumed)
+    return uploader
+
+
+@st.cache_resource(show_spinner=False)
+def get_signed_url_cache():
+    """녹음 재생용 서명 URL 캐시 (버킷은 비공개 유지)"""
+    return SignedUrlCache(get_storage_bucket)
+
+
+@st.cache_resource(show_spinner=False)
+def start_warmup():
+    """
+    워커 프로세스당 한 번 백그라운드 워밍업 (첫 세션은 기다리지 않음)
+    st.cache_resource 함수와 st.secrets는 스크립트 실행 스레드에서만 호출하고,
+    워밍업 스레드에는 여기서 만든 객체와 일반 함수만 넘깁니다.
+    """
+    client = get_openai_client()
+    
+    def preload_assignments():
+        db = get_firestore_client()
+        codes = warmup.recent_access_codes(db)
+        return f"{warmup.preload_assignments(db, shared_cache.get_cache(), codes)}/{len(codes)}건"
+    
+    def openai_handshake():
+        if client is None:
+            return "API 키 없음"
+        # 토큰을 쓰지 않는 조회로 TLS 연결과 인증만 미리 수립
+        client.models.list()
+        return "ok"
+    
+    return warmup.start_in_background([
+        ("firebase", lambda: get_firestore_client() and "ok"),
+        ("shared_cache", lambda: type(shared_cache.get_cache().backend).__name__),
+        ("openai", openai_handshake),
+        ("assignments", preload_assignments),
+        ("spell_checker", lambda: build_textbook_spell_checker() and "ok"),
+        ("imports", lambda: warmup.preload_modules(("pandas", "altair", "pyarrow"))),
+    ])
+
+
 # ============================================================================
 # 2. UTILITY FUNCTIONS
 # ============================================================================
 
 def authenticate_teacher(email, password):
     """
-    Firebase Authentication으로 교사 인증 (기존 함수 유지)
+    Firebase Authentication으로 교사 인증 (토큰 캐시 사용, teacher_auth 참고)
     """
     try:
-        import requests
         from firebase_config import get_web_api_key
+        from teacher_auth import sign_in
         
         api_key = get_web_api_key()
         if not api_key:
@@ -460,40 +710,7 @@ def authenticate_teacher(email, password):
                 "error": "Firebase API Key를 찾을 수 없습니다."
             }
         
-        # Firebase Authentication REST API 사용
-        url = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={api_key}"
-        
-        payload = {
-            "email": email,
-            "password": password,
-            "returnSecureToken": True
-        }
-        
-        response = requests.post(url, json=payload)
-        data = response.json()
-        
-        if response.status_code == 200:
-            return {
-                "success": True,
-                "user_email": data.get("email", email),
-                "user_id": data.get("localId")
-            }
-        else:
-            error_message = data.get("error", {}).get("message", "로그인 실패")
-            
-            error_map = {
-                "INVALID_EMAIL": "유효하지 않은 이메일 주소입니다.",
-                "INVALID_PASSWORD": "비밀번호가 틀렸습니다.",
-                "USER_DISABLED": "비활성화된 사용자입니다.",
-                "USER_NOT_FOUND": "등록되지 않은 이메일입니다."
-            }
-            
-            friendly_error = error_map.get(error_message, error_message)
-            
-            return {
-                "success": False,
-                "error": friendly_error
-            }
+        return sign_in(email, password, api_key)
     
     except Exception as e:
         return {
@@ -507,19 +724,84 @@ def generate_access_code():
     return "".join(random.choices(string.digits, k=6))
 
 
+def load_assignment(access_code, feature="assignment"):
+    """과제 문서 조회 (워커 간 공유 캐시 우선, 없는 코드면 None - 없는 결과는 캐시하지 않음)"""
+    def fetch():
+        db = get_firestore_client()
+        with profiler.section("firestore.assignment_get"):
+            doc = tracing.firestore_call(
+                "assignment_get", db.collection("readfit_assignments").document(access_code).get, feature=feature
+            )
+        return doc.to_dict() if doc.exists else None
+    
+    return shared_cache.get_cache().get_or_set("assignment", access_code, fetch)
+
+
 def check_access_code_exists(code):
-    """Firestore에서 해당 접속 코드가 존재하는지 확인"""
+    """Firestore에서 해당 접속 코드가 존재하는지 확인 (확인한 과제는 캐시되어 바로 이어지는 과제 로드에 재사용)"""
     try:
-        db = get_firestore_client()
-        doc = db.collection("readfit_assignments").document(code).get()
-        return doc.exists
+        return load_assignment(code, feature="login") is not None
     except Exception as e:
         st.error(f"데이터베이스 오류: {e}")
         return False
 
 
+def is_admin():
+    """관리자 여부 (ADMIN_EMAILS에 등록된 교사 계정, 쉼표로 구분)"""
+    if st.session_state.get("user_role") != "teacher":
+        return False
+    admins = st.secrets.get("ADMIN_EMAILS") or os.getenv("ADMIN_EMAILS", "")
+    if isinstance(admins, str):
+        admins = [a.strip() for a in admins.split(",")]
+    return st.session_state.get("user_name") in admins
+
+
+def show_profile_panel():
+    """관리자 전용 사이드바 프로파일 패널 (READFIT_PROFILE=1 일 때만 표시)"""
+    if not profiler.ENABLED or not is_admin():
+        return
+    import json
+    with st.expander("⏱️ 성능 프로파일"):
+        snapshot = profiler.snapshot()
+        if not snapshot["sections"]:
+            st.caption("아직 기록된 실행이 없습니다.")
+            return
+        pages = sorted({row["page"] for row in snapshot["sections"]})
+        page = st.selectbox("페이지", pages, key="profile_page")
+        st.dataframe(
+            [row for row in snapshot["sections"] if row["page"] == page],
+            use_container_width=True,
+            hide_index=True,
+        )
+        warmup_report = warmup.last_report()
+        if warmup_report:
+            st.caption(f"워밍업 {warmup_report['started_at']:%H:%M:%S} · {warmup_report['seconds']}초")
+            st.dataframe(warmup_report["steps"], use_container_width=True, hide_index=True)
+        cache_rates = shared_cache.get_cache().hit_rates()
+        if cache_rates:
+            st.caption("공유 캐시 적중률 (이 워커 기준)")
+            st.dataframe(
+                [dict(namespace=ns, **counts) for ns, counts in sorted(cache_rates.items())],
+                use_container_width=True,
+                hide_index=True,
+            )
+        st.download_button("Prometheus 텍스트", profiler.metrics_text(), file_name="readfit_metrics.txt")
+        st.download_button(
+            "JSON", json.dumps(snapshot, ensure_ascii=False), file_name="readfit_profile.json"
+        )
+        if st.button("초기화", key="profile_reset"):
+            profiler.reset()
+            st.rerun()
+
+
 def logout():
     """로그아웃 처리"""
+    if st.session_state.get("user_role") == "teacher" and st.session_state.get("user_name"):
+        from teacher_auth import sign_out
+        sign_out(st.session_state.user_name)
+    if st.session_state.get("resume_token"):
+        student_progress.discard(shared_cache.get_cache(), st.session_state.resume_token)
+        st.query_params.clear()
     st.session_state.clear()
     st.rerun()
 
@@ -528,6 +810,7 @@ def logout():
 # 3. QUIZ & MISSION FUNCTIONS
 # ============================================================================
 
+@profiler.timed("generate_simple_quiz")
 def generate_simple_quiz(text_content, unit_title, difficulty):
     """
     지문을 기반으로 3가지 객관식 퀴즈 문제를 생성합니다.
@@ -821,6 +1104,8 @@ def show_step1_quiz(assignment_data):
         key="quiz_text_display"
     )
     
+    show_shadowing_upload()
+    
     st.divider()
     st.subheader("❓ 객관식 문제")
     
@@ -853,6 +1138,7 @@ def show_step1_quiz(assignment_data):
         st.session_state.quiz_answers[idx] = {
             "question": q['question'],
             "selected": answer,
+            "selected_index": q['options'].index(answer) if answer in q['options'] else -1,
             "correct": q['options'][q['answer']],
             "is_correct": answer == q['options'][q['answer']]
         }
@@ -866,11 +1152,55 @@ def show_step1_quiz(assignment_data):
         st.session_state.quiz_score = score
         st.session_state.quiz_correct = correct_count
         st.session_state.quiz_total = total_count
+        st.session_state.submission_saved = False  # 새 시도: Step 4에서 한 번 저장
         st.session_state.step = 2
         st.success(f"✅ 제출 완료! 점수: {score}점 ({correct_count}/{total_count})")
         st.rerun()
 
 
+def show_shadowing_upload():
+    """지문 쉐도잉 녹음 제출 (스풀 기록 후 백그라운드 업로드)"""
+    AUDIO_STATUS_LABELS = {
+        "queued": "⏳ 업로드 대기 중",
+        "processing": "🔧 녹음 변환 중",
+        "uploading": "📤 업로드 중",
+        "done": "✅ 제출 완료",
+        "failed": "❌ 업로드 실패",
+    }
+    
+    with st.expander("🎙️ 쉐도잉 녹음 (선택)", expanded=False):
+        st.info("💡 지문을 큰 소리로 읽고 녹음 파일을 올려주세요. 업로드는 퀴즈를 푸는 동안 계속 진행됩니다.")
+        audio_file = st.file_uploader(
+            "녹음된 오디오 파일 (WAV, MP3, M4A, OGG)",
+            type=["wav", "mp3", "m4a", "ogg"],
+            key="shadowing_audio_file"
+        )
+        
+        if audio_file is not None and st.button("📤 녹음 제출하기", use_container_width=True, key="submit_shadowing"):
+            try:
+                st.session_state.shadowing_job_id = get_audio_uploader().submit(
+                    audio_file,
+                    audio_file.name,
+                    st.session_state.current_access_code,
+                    st.session_state.user_name,
+                )
+            except ValueError as e:
+                st.error(f"{e} 녹음을 다시 선택해주세요.")
+            except OSError as e:
+                st.error(f"녹음 파일을 저장하지 못했습니다: {e}")
+        
+        job_id = st.session_state.get("shadowing_job_id")
+        if job_id:
+            job = get_audio_uploader().status(job_id)
+            if job:
+                st.caption(f"{AUDIO_STATUS_LABELS.get(job['status'], job['status'])} · {job['size'] / 1024:.0f}KB")
+                score = (job.get("doc_fields") or {}).get("score")
+                if job["status"] == "done" and score is not None:
+                    st.success(f"🎯 쉐도잉 점수: {score}점")
+                if job["status"] == "failed":
+                    st.warning("녹음 업로드에 실패했습니다. 다시 제출해주세요.")
+
+
 def show_step2_mission_selection(quiz_score):
     """Step 2: 미션 선택"""
     st.header("Step 2️⃣ 활동 선택")
@@ -940,10 +1270,12 @@ def show_step3_image_detective():
         with st.spinner("🤖 AI가 문제를 만들고 있어요..."):
             # 1) 지문 전체를 입력으로 핵심 장면 요약 문장 1개 생성
             try:
-                api_key = st.secrets.get("OPENAI_API_KEY") if hasattr(st, "secrets") else None
-                if api_key:
-                    client = OpenAI(api_key=api_key)
-                    core_resp = client.chat.completions.create(
+                client = get_openai_client()
+                if client:
+                    core_resp = call_openai(
+                        "chat",
+                        client.chat.completions.create,
+                        feature="detective",
                         model="gpt-4o-mini",
                         messages=[{
                             "role": "user",
@@ -961,7 +1293,8 @@ def show_step3_image_detective():
                     sentences = [s.strip() for s in text.replace('!', '.').replace('?', '.').split('.') if s.strip()]
                     correct_sentence = sentences[0] if sentences else "The dog runs in the park."
             except Exception as e:
-                st.warning(f"핵심 장면 문장 생성 실패: {e}")
+                if not isinstance(e, CircuitOpenError):
+                    st.warning(f"핵심 장면 문장 생성 실패: {e}")
                 sentences = [s.strip() for s in text.replace('!', '.').replace('?', '.').split('.') if s.strip()]
                 correct_sentence = sentences[0] if sentences else "The dog runs in the park."
 
@@ -1029,6 +1362,10 @@ def show_step3_image_detective():
     
     data = st.session_state.detective_sentence_data
     
+    # 다른 워커에서 복원된 문제는 이미지 없이 저장되어 있으므로 공유 이미지 캐시에서 다시 찾음
+    if data["image"] is None and data.get("correct_sentence"):
+        data["image"] = generate_image_with_dalle("", data["correct_sentence"])
+    
     # 이미지 표시
     if data["image"]:
         try:
@@ -1052,11 +1389,10 @@ def show_step3_image_detective():
                     answer_type = data["option_types"].get(option, "unknown")
                     
                     # 정답 체크
+                    st.session_state.activity_score = scoring_rules.detective_score(option == correct)
                     if option == correct:
-                        st.session_state.activity_score = 100
                         st.success("🎉 정답입니다!")
                     else:
-                        st.session_state.activity_score = 30
                         st.error(f"❌ 틀렸습니다. 정답은 '{correct}'입니다.")
                     
                     # 리포트용 데이터 저장
@@ -1078,11 +1414,10 @@ def show_step3_image_detective():
                     answer_type = data["option_types"].get(option, "unknown")
                     
                     # 정답 체크
+                    st.session_state.activity_score = scoring_rules.detective_score(option == correct)
                     if option == correct:
-                        st.session_state.activity_score = 100
                         st.success("🎉 정답입니다!")
                     else:
-                        st.session_state.activity_score = 30
                         st.error(f"❌ 틀렸습니다. 정답은 '{correct}'입니다.")
                     
                     # 리포트용 데이터 저장
@@ -1168,11 +1503,11 @@ def show_step3_activity(selected_mission):
         answer = st.text_input("정답을 입력하세요:", key="mystery_answer_input")
         if st.button("정답 제출하기", use_container_width=True, key="submit_mystery"):
             target = st.session_state.mystery_target_word
-            if target and answer.strip().lower() == target.lower():
-                st.session_state.activity_score = 100
+            is_correct = bool(target) and answer.strip().lower() == target.lower()
+            st.session_state.activity_score = scoring_rules.mystery_score(is_correct)
+            if is_correct:
                 st.success(f"🎉 정답입니다! '{target}'")
             else:
-                st.session_state.activity_score = 50
                 st.error(f"❌ 틀렸습니다. 정답은 '{target}'입니다.")
             
             st.session_state.activity_answer = answer
@@ -1206,8 +1541,16 @@ def show_step3_activity(selected_mission):
             if len(story.strip()) < 10:
                 st.error("최소 10자 이상 작성해주세요.")
             else:
+                # 로컬 분석으로 점수 산정 (키워드/분량/철자/어휘 다양도)
+                analysis = analyze_writing(
+                    story,
+                    st.session_state.get("writer_keywords") or [],
+                    spell_checker=get_spell_checker(),
+                    known_text=st.session_state.get("reading_text", ""),
+                )
                 st.session_state.activity_answer = story
-                st.session_state.activity_score = 85
+                st.session_state.activity_score = scoring_rules.writer_score(analysis)
+                st.session_state.writer_analysis = analysis
                 # 이번 제출에서 사용한 키워드 보존
                 st.session_state.writer_keywords_used = st.session_state.get("writer_keywords", [])
                 st.session_state.writer_keywords = None  # 초기화
@@ -1222,87 +1565,153 @@ def show_step4_report(quiz_score, activity_score, selected_mission_title):
     # 분석 리포트 변수 초기화 (예외 발생 시에도 참조 가능하도록)
     insights = None
     
-    # Firestore에 결과 저장
-    try:
-        db = get_firestore_client()
-        
-        # mission_id 결정
-        if selected_mission_title == "🎨 이미지 탐정":
-            mission_id = "image_detective"
-        elif selected_mission_title == "🕵️ 미스터리 스무고개":
-            mission_id = "mystery_20_questions"
-        elif selected_mission_title == "✍️ 베스트셀러 작가":
-            mission_id = "writer"
-        else:
-            mission_id = "unknown"
-        
-        # 기본 데이터
-        submission_data = {
-            "student_name": st.session_state.get("student_name") or st.session_state.get("user_name", "Anonymous"),
-            "access_code": st.session_state.get("current_access_code", "N/A"),
-            "timestamp": datetime.now(),
-            "quiz_score": quiz_score,
-            "activity_score": activity_score,
-            "total_score": int((quiz_score * 0.4 + activity_score * 0.6)),
-            "mission_id": mission_id,
-            "quiz_correct": st.session_state.get("quiz_correct", 0),
-            "quiz_total": st.session_state.get("quiz_total", 0),
-        }
-        
-        # mission_details: 미션 타입별 상세 정보
-        mission_details = {}
-        
-        if mission_id == "image_detective":
-            mission_details = {
-                "result_type": st.session_state.get("detective_answer_type", "unknown"),
-                "target_word": st.session_state.get("detective_target", ""),
-                "student_answer": st.session_state.get("detective_answer", ""),
-                "interpretation_lens": st.session_state.get("detective_interpretation_lens", "사물"),
-            }
-        
-        elif mission_id == "mystery_20_questions":
-            mission_details = {
-                "hints_used": st.session_state.get("mystery_hint_level", 0),
-                "target_word": st.session_state.get("mystery_target_word", ""),
-                "student_answer": st.session_state.get("activity_answer", ""),
-            }
-        
-        elif mission_id == "writer":
-            mission_details = {
-                "student_text": st.session_state.get("activity_answer", ""),
-                "keywords_used": st.session_state.get("writer_keywords_used", []),
-            }
-        
-        submission_data["mission_details"] = mission_details
-
-        # OpenAI 학습 분석 리포트 생성 (저장 전에 먼저 생성)
+    # Firestore에 결과 저장 (리런마다 다시 저장/집계되지 않도록 한 번만)
+    if st.session_state.get("submission_saved"):
+        insights = st.session_state.get("report_insights")
+    else:
         try:
-            with st.spinner("🧠 학습 분석 리포트를 생성 중..."):
-                insights = generate_report_insights_with_openai(submission_data, mission_details)
-        except Exception as e:
-            st.warning(f"리포트 생성 중 오류: {str(e)}")
-            insights = None
-        
-        # 실패/예외 시 Fallback (항상 유효한 insights 보장)
-        if not insights:
-            st.warning("⚠️ AI 분석 리포트 생성 실패 - 기본 피드백을 사용합니다.")
-            insights = {
-                "one_line_feedback": "오늘 활동에 성실히 참여해서 정말 잘했어요! 다음에는 그림을 더 자세히 관찰하며 단어의 의미를 생각해보는 연습을 해보세요."
+            db = get_firestore_client()
+            
+            # mission_id 결정
+            if selected_mission_title == "🎨 이미지 탐정":
+                mission_id = "image_detective"
+            elif selected_mission_title == "🕵️ 미스터리 스무고개":
+                mission_id = "mystery_20_questions"
+            elif selected_mission_title == "✍️ 베스트셀러 작가":
+                mission_id = "writer"
+            else:
+                mission_id = "unknown"
+            
+            # 기본 데이터
+            submission_data = {
+                "student_name": st.session_state.get("student_name") or st.session_state.get("user_name", "Anonymous"),
+                "access_code": st.session_state.get("current_access_code", "N/A"),
+                "timestamp": datetime.now(),
+                "quiz_score": quiz_score,
+                "activity_score": activity_score,
+                "total_score": scoring_rules.total_score(quiz_score, activity_score),
+                "scoring_version": scoring_rules.CURRENT_VERSION,
+                "mission_id": mission_id,
+                "quiz_correct": st.session_state.get("quiz_correct", 0),
+                "quiz_total": st.session_state.get("quiz_total", 0),
             }
-        
-        # 분석 결과를 저장에 포함 (insights 생성 후)
-        submission_data["report_insights"] = insights
-        submission_data["report_insights_model"] = "gpt-4o-mini"
+            if st.session_state.get("student_id"):
+                submission_data["student_id"] = st.session_state.student_id
+            quiz_bitmask, quiz_choices = encode_answers(st.session_state.get("quiz_answers", []))
+            submission_data["quiz_bitmask"] = quiz_bitmask
+            submission_data["quiz_choices"] = quiz_choices
+            
+            # mission_details: 미션 타입별 상세 정보
+            mission_details = {}
+            
+            if mission_id == "image_detective":
+                mission_details = {
+                    "result_type": st.session_state.get("detective_answer_type", "unknown"),
+                    "target_word": st.session_state.get("detective_target", ""),
+                    "student_answer": st.session_state.get("detective_answer", ""),
+                    "interpretation_lens": st.session_state.get("detective_interpretation_lens", "사물"),
+                }
+            
+            elif mission_id == "mystery_20_questions":
+                mission_details = {
+                    "hints_used": st.session_state.get("mystery_hint_level", 0),
+                    "target_word": st.session_state.get("mystery_target_word", ""),
+                    "student_answer": st.session_state.get("activity_answer", ""),
+                }
+            
+            elif mission_id == "writer":
+                mission_details = {
+                    "student_text": st.session_state.get("activity_answer", ""),
+                    "keywords_used": st.session_state.get("writer_keywords_used", []),
+                    "analysis": st.session_state.get("writer_analysis", {}),
+                }
+            
+            submission_data["mission_details"] = mission_details
 
-        # Firestore 저장
-        db.collection("readfit_submissions").add(submission_data)
+            # OpenAI 학습 분석 리포트 생성 (저장 전에 먼저 생성)
+            try:
+                with st.spinner("🧠 학습 분석 리포트를 생성 중..."):
+                    insights = generate_report_insights_with_openai(submission_data, mission_details)
+            except Exception as e:
+                st.warning(f"리포트 생성 중 오류: {str(e)}")
+                insights = None
+            
+            # 실패/예외 시 Fallback (항상 유효한 insights 보장)
+            if not insights:
+                st.warning("⚠️ AI 분석 리포트 생성 실패 - 기본 피드백을 사용합니다.")
+                insights = {
+                    "one_line_feedback": "오늘 활동에 성실히 참여해서 정말 잘했어요! 다음에는 그림을 더 자세히 관찰하며 단어의 의미를 생각해보는 연습을 해보세요."
+                }
+            
+            # 분석 결과를 저장에 포함 (insights 생성 후)
+            submission_data["report_insights"] = insights
+            submission_data["report_insights_model"] = "gpt-4o-mini"
+
+            # Firestore 저장
+            with profiler.section("firestore.submission_add"):
+                tracing.firestore_call(
+                    "submission_add",
+                    lambda: db.collection("readfit_submissions").add(submission_data),
+                    feature="report",
+                    writes=1,
+                )
+            st.session_state.submission_saved = True
+            st.session_state.report_insights = insights
+            
+            # 문항 분석 집계 문서에 증분 반영
+            try:
+                tracing.firestore_call(
+                    "item_stats_increment",
+                    lambda: record_submission(db, submission_data["access_code"], quiz_bitmask, quiz_choices),
+                    feature="report",
+                    writes=1,
+                )
+            except Exception as e:
+                logger.warning("문항 분석 집계 실패: %s", e)
+            
+            assignment_info = st.session_state.get("assignment_info") or {}
+            
+            # 학생 학습 이력에 추가
+            if submission_data.get("student_id") and assignment_info.get("teacher_name"):
+                try:
+                    tracing.firestore_call(
+                        "student_progress_append",
+                        lambda: student_registry.record_progress(
+                            db,
+                            assignment_info["teacher_name"],
+                            submission_data["student_id"],
+                            dict(submission_data, unit=assignment_info.get("unit")),
+                        ),
+                        feature="report",
+                        writes=2,
+                    )
+                except Exception as e:
+                    logger.warning("학습 이력 기록 실패: %s", e)
+            
+            # 이미지 탐정 오답 유형 집계 (교사별 문서에 증분 반영)
+            if mission_id == "image_detective":
+                try:
+                    tracing.firestore_call(
+                        "error_stats_increment",
+                        lambda: error_heatmap.record_result(
+                            db,
+                            assignment_info.get("teacher_name"),
+                            submission_data["access_code"],
+                            assignment_info.get("unit"),
+                            mission_details["result_type"],
+                        ),
+                        feature="report",
+                        writes=1,
+                    )
+                except Exception as e:
+                    logger.warning("오답 유형 집계 실패: %s", e)
+            
+            st.toast("✅ 선생님께 결과가 전송되었습니다!")
         
-        st.toast("✅ 선생님께 결과가 전송되었습니다!")
-    
-    except Exception as e:
-        st.warning(f"⚠️ 결과 저장 중 오류: {str(e)}")
+        except Exception as e:
+            st.warning(f"⚠️ 결과 저장 중 오류: {str(e)}")
     
-    total_score = int((quiz_score * 0.4 + activity_score * 0.6))
+    total_score = scoring_rules.total_score(quiz_score, activity_score)
     
     col1, col2, col3 = st.columns(3)
     
@@ -1459,6 +1868,9 @@ def show_login_page():
                         st.session_state.user_role = "student"
                         st.session_state.user_name = student_name
                         st.session_state.current_access_code = access_code
+                        # 재연결/워커 변경 시 진행 상태를 이어받을 토큰 (주소창에 유지)
+                        st.session_state.resume_token = student_progress.new_token()
+                        st.query_params["resume"] = st.session_state.resume_token
                         st.success(f"{student_name}님 입장을 환영합니다!")
                         st.rerun()
                     else:
@@ -1469,6 +1881,404 @@ def show_login_page():
 # 6. TEACHER RESULTS
 # ============================================================================
 
+def show_audio_submissions(access_code):
+    """학습 코드별 쉐도잉 녹음 목록 (업로드 시 계산한 요약으로 표시 - 오디오는 내려받지 않음)"""
+    db = get_firestore_client()
+    query = db.collection(AUDIO_SUBMISSIONS_COLLECTION).where("access_code", "==", access_code)
+    with profiler.section("firestore.audio_submissions_stream"):
+        docs = tracing.firestore_call(
+            "audio_submissions_stream", lambda: list(query.stream()), feature="teacher_results"
+        )
+    if not docs:
+        return
+    
+    import pandas as pd
+    records = [doc.to_dict() for doc in docs]
+    # 서명은 로컬 계산이므로 학급 전체 URL을 한 번에 생성
+    audio_urls = get_signed_url_cache().urls(
+        (data.get("blob_path"), data.get("content_type")) for data in records
+    )
+    rows = []
+    for data in records:
+        summary = data.get("summary") or {}
+        scoring = data.get("scoring") or {}
+        submitted_at = data.get("submitted_at")
+        rows.append({
+            "학생명": data.get("student_name", "이름 없음"),
+            "점수": data.get("score"),
+            "발음": scoring.get("pronunciation_score"),
+            "유창성": scoring.get("fluency_score"),
+            "길이(초)": data.get("duration_seconds", summary.get("duration_seconds")),
+            "무음 비율": data.get("silence_ratio", summary.get("silence_ratio")),
+            "발화 구간": len(summary.get("voiced_segments", [])) if summary else None,
+            "파형": summary.get("rms_envelope") or data.get("waveform") or [],
+            "제출 시간": submitted_at.strftime("%Y-%m-%d %H:%M") if hasattr(submitted_at, "strftime") else "알 수 없음",
+            "듣기": audio_urls.get(data.get("blob_path")),
+            "content_type": data.get("content_type"),
+        })
+    df = pd.DataFrame(rows)
+    
+    st.subheader(f"🎙️ 쉐도잉 녹음 ({len(df)}건)")
+    col1, col2 = st.columns(2)
+    with col1:
+        sort_options = {
+            "제출 시간순": ("제출 시간", True),
+            "길이 긴 순": ("길이(초)", False),
+            "길이 짧은 순": ("길이(초)", True),
+            "점수 높은 순": ("점수", False),
+            "무음 비율 높은 순": ("무음 비율", False),
+        }
+        sort_choice = st.selectbox("정렬", list(sort_options), key="audio_sort")
+    durations = df["길이(초)"].dropna()
+    with col2:
+        if len(durations) and durations.max() > durations.min():
+            low, high = st.slider(
+                "길이 범위(초)",
+                min_value=float(durations.min()),
+                max_value=float(durations.max()),
+                value=(float(durations.min()), float(durations.max())),
+                key="audio_duration_range"
+            )
+            df = df[df["길이(초)"].isna() | df["길이(초)"].between(low, high)]
+    
+    sort_column, ascending = sort_options[sort_choice]
+    df = df.sort_values(sort_column, ascending=ascending, na_position="last")
+    st.dataframe(
+        df.drop(columns=["content_type"]),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "파형": st.column_config.LineChartColumn("파형", y_min=0, y_max=100),
+            "무음 비율": st.column_config.ProgressColumn("무음 비율", min_value=0.0, max_value=1.0, format="%.2f"),
+            "듣기": st.column_config.LinkColumn("듣기", display_text="▶ 재생"),
+        },
+    )
+    
+    # 선택한 녹음만 플레이어로 재생 (URL을 넘기므로 브라우저가 필요한 구간만 Range 요청)
+    playable = df[df["듣기"].notna()]
+    if len(playable):
+        labels = [f"{row['학생명']} ({row['제출 시간']})" for _, row in playable.iterrows()]
+        choice = st.selectbox("🎧 녹음 듣기", range(len(labels)), format_func=lambda i: labels[i], key="audio_play_choice")
+        selected = playable.iloc[choice]
+        st.audio(selected["듣기"], format=selected["content_type"] or "audio/wav")
+    else:
+        st.caption("재생 가능한 녹음이 없습니다 (서명 URL을 만들 수 없는 환경).")
+    st.divider()
+
+
+def show_term_analytics():
+    """교사 대시보드 - 학습 코드 전체(학기) 통계 (로컬 컬럼형 스냅샷 기준)"""
+    st.header("📈 전체 통계")
+    st.caption("모든 과제의 제출 결과를 단원·난이도·월별로 집계합니다. 새 제출은 '최신 제출 반영'으로 추가됩니다.")
+    
+    if st.button("🔄 최신 제출 반영", key="analytics_export_btn"):
+        try:
+            with st.spinner("새 제출을 내보내는 중..."):
+                added = analytics_store.export_new_submissions(get_firestore_client())
+            st.success(f"✅ 새 제출 {added}건을 반영했습니다.")
+        except Exception as e:
+            st.error(f"⚠️ 스냅샷 갱신 실패: {str(e)}")
+    
+    with profiler.section("analytics.term_summary"):
+        summary = analytics_store.term_summary(analytics_store.load_columns())
+    if not summary["total"]:
+        st.info("📌 아직 스냅샷이 없습니다. '최신 제출 반영'을 눌러주세요.")
+        return
+    
+    import pandas as pd
+    
+    def to_frame(groups, label):
+        return pd.DataFrame([
+            {label: g["key"] or "(없음)", "제출 수": g["count"], "평균": g["mean"], "최저": g["min"], "최고": g["max"]}
+            for g in groups
+        ])
+    
+    st.metric("전체 제출", f"{summary['total']}건")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("📖 단원별")
+        st.dataframe(to_frame(summary["by_unit"], "단원"), use_container_width=True, hide_index=True)
+    with col2:
+        st.subheader("📊 난이도별")
+        st.dataframe(to_frame(summary["by_difficulty"], "난이도"), use_container_width=True, hide_index=True)
+    
+    st.subheader("🗓️ 월별 추이")
+    by_month = to_frame(summary["by_month"], "월")
+    st.line_chart(by_month.set_index("월")["평균"])
+    st.dataframe(by_month, use_container_width=True, hide_index=True)
+
+
+def show_class_stats(access_code, version, submissions):
+    """학급 점수 분포/백분위수/활동별 비교 (제출이 바뀌지 않으면 캐시된 통계 사용)"""
+    with profiler.section("class_stats"):
+        stats = get_class_stats(access_code, version, lambda: [sub["data"] for sub in submissions])
+    if not stats["count"]:
+        return
+    
+    import pandas as pd
+    st.subheader("📊 학급 통계")
+    total = stats["fields"]["total_score"]
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("평균 최종 점수", f"{total['mean']}점")
+    col2.metric("중앙값", f"{total['percentiles'][50]}점")
+    col3.metric("표준편차", f"{total['std']}")
+    col4.metric("최저 / 최고", f"{total['min']} / {total['max']}")
+    
+    field_labels = {"quiz_score": "퀴즈", "activity_score": "활동", "total_score": "최종"}
+    histogram = pd.DataFrame(
+        {field_labels[field]: stats["histogram"][field] for field in field_labels},
+        index=stats["histogram"]["bins"],
+    )
+    st.bar_chart(histogram)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.caption("점수 백분위수")
+        st.dataframe(
+            pd.DataFrame({
+                field_labels[field]: {f"P{p}": v for p, v in values["percentiles"].items()}
+                for field, values in stats["fields"].items()
+            }),
+            use_container_width=True,
+        )
+    with col2:
+        st.caption("활동별 평균")
+        mission_name_map = {
+            "image_detective": "🎨 이미지 탐정",
+            "mystery_20_questions": "🕵️ 스무고개",
+            "writer": "✍️ 작가"
+        }
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "활동": mission_name_map.get(m["mission_id"], m["mission_id"]),
+                    "인원": m["count"],
+                    "퀴즈": m["quiz_score"],
+                    "활동 점수": m["activity_score"],
+                    "최종": m["total_score"],
+                }
+                for m in stats["by_mission"]
+            ]),
+            use_container_width=True,
+            hide_index=True,
+        )
+    if stats["quiz_correct"]:
+        st.caption("퀴즈 정답 수 분포: " + " · ".join(f"{k}개 {v}명" for k, v in sorted(stats["quiz_correct"].items())))
+    st.divider()
+
+
+def show_item_analysis(access_code, rollup_doc):
+    """퀴즈 문항 분석 (집계 문서는 show_teacher_results에서 읽은 것을 사용, 과제 문서 1건만 읽음)"""
+    if not rollup_doc.exists or not rollup_doc.to_dict().get("n"):
+        return
+    quiz = (load_assignment(access_code, feature="teacher_results") or {}).get("quiz", [])
+    items = analyze_items(rollup_doc.to_dict(), quiz)
+    if not items:
+        return
+    
+    import pandas as pd
+    st.subheader(f"🧪 문항 분석 (응답 {items[0]['responses']}건)")
+    rows = []
+    for item in items:
+        rows.append({
+            "문항": f"{item['index'] + 1}. {item['question']}",
+            "정답률": item["difficulty"],
+            "변별도": round(item["discrimination"], 2) if item["discrimination"] is not None else None,
+            "선택 비율": " / ".join(
+                f"{'✅' if i == item['answer'] else ''}{i + 1}번 {rate * 100:.0f}%"
+                for i, rate in enumerate(item["option_rates"])
+            ),
+            "진단": ", ".join(item["flags"]) or "-",
+        })
+    st.dataframe(
+        pd.DataFrame(rows),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "정답률": st.column_config.ProgressColumn("정답률", min_value=0.0, max_value=1.0, format="%.2f"),
+        },
+    )
+    st.caption("변별도는 문항 정답 여부와 나머지 문항 점수의 상관계수입니다 (0.2 미만이면 문항 점검 권장).")
+    st.divider()
+
+
+def show_error_heatmap():
+    """이미지 탐정 오답 유형 히트맵 (교사별 집계 문서 1건만 읽음)"""
+    st.divider()
+    st.header("🎨 이미지 탐정 오답 유형")
+    db = get_firestore_client()
+    with profiler.section("firestore.error_stats_get"):
+        doc = tracing.firestore_call(
+            "error_stats_get",
+            db.collection(error_heatmap.ROLLUP_COLLECTION).document(
+                error_heatmap.map_key(st.session_state.user_name)
+            ).get,
+            feature="teacher_results",
+        )
+    if not doc.exists:
+        st.info("📌 아직 이미지 탐정 제출이 없습니다.")
+        return
+    rollup = doc.to_dict()
+    
+    scope_labels = {"by_assignment": "과제별", "by_unit": "단원별"}
+    scope = st.radio(
+        "묶음 기준", list(scope_labels), format_func=scope_labels.get, horizontal=True, key="error_heatmap_scope"
+    )
+    confused = error_heatmap.most_confused(rollup)
+    if confused:
+        st.caption(f"학생들이 가장 많이 헷갈린 문장 성분: **{confused}**")
+    
+    import altair as alt
+    import pandas as pd
+    cells = pd.DataFrame(error_heatmap.heatmap_cells(rollup, scope))
+    role_order = [error_heatmap.ROLE_LABELS[r] for r in error_heatmap.ROLES]
+    base = alt.Chart(cells).encode(
+        x=alt.X("role:N", title="고른 문장의 유형", sort=role_order),
+        y=alt.Y("group:N", title=scope_labels[scope], sort=None),
+    )
+    heatmap = base.mark_rect().encode(
+        color=alt.Color("rate:Q", title="비율", scale=alt.Scale(scheme="oranges", domain=[0, 1])),
+        tooltip=[
+            alt.Tooltip("group:N", title=scope_labels[scope]),
+            alt.Tooltip("role:N", title="유형"),
+            alt.Tooltip("count:Q", title="횟수"),
+            alt.Tooltip("rate:Q", title="비율", format=".0%"),
+        ],
+    )
+    labels = base.mark_text(fontSize=12).encode(text=alt.Text("rate:Q", format=".0%"))
+    st.altair_chart(heatmap + labels, use_container_width=True)
+
+
+def show_student_progress():
+    """교사 대시보드 - 학생별 학습 이력 (명부 색인 기준)"""
+    st.header("🧑‍🎓 학생 진도")
+    db = get_firestore_client()
+    teacher = st.session_state.user_name
+    
+    try:
+        with profiler.section("firestore.roster_stream"):
+            students = tracing.firestore_call(
+                "roster_stream", lambda: student_registry.list_students(db, teacher), feature="teacher_results"
+            )
+    except Exception as e:
+        st.error(f"⚠️ 명부 조회 중 오류 발생: {str(e)}")
+        return
+    if not students:
+        st.info("📌 아직 명부에 등록된 학생이 없습니다. 학생이 과제에 입장하면 자동으로 등록됩니다.")
+        return
+    
+    import pandas as pd
+    
+    def format_time(value):
+        return value.strftime("%Y-%m-%d %H:%M") if hasattr(value, "strftime") else "-"
+    
+    st.subheader(f"📋 명부 ({len(students)}명)")
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "학생명": s.get("display_name", "이름 없음"),
+                "제출 수": s.get("submission_count", 0),
+                "최근 점수": s.get("last_total_score"),
+                "최근 제출": format_time(s.get("last_submission_at")),
+            }
+            for s in students
+        ]),
+        use_container_width=True,
+        hide_index=True,
+    )
+    
+    inactive_days = st.slider("제출이 끊긴 기준 (일)", 3, 60, 14, key="dropped_days")
+    dropped = tracing.firestore_call(
+        "roster_dropped", lambda: student_registry.dropped_students(db, teacher, inactive_days), feature="teacher_results"
+    )
+    if dropped:
+        st.warning(
+            f"⚠️ {inactive_days}일 넘게 제출이 없는 학생 {len(dropped)}명: "
+            + ", ".join(
+                f"{s.get('display_name')} ({format_time(s.get('last_submission_at')) if s.get('last_submission_at') else '제출 없음'})"
+                for s in dropped
+            )
+        )
+    else:
+        st.success(f"✅ 최근 {inactive_days}일 안에 모든 학생이 제출했습니다.")
+    
+    st.divider()
+    labels = {s["student_id"]: s.get("display_name", s["student_id"]) for s in students}
+    student_id = st.selectbox("학생 선택", list(labels), format_func=labels.get, key="progress_student")
+    timeline = tracing.firestore_call(
+        "student_progress_get",
+        lambda: student_registry.progress_timeline(db, teacher, student_id),
+        feature="teacher_results",
+    )
+    if not timeline:
+        st.info("제출 기록이 없습니다.")
+        return
+    df = pd.DataFrame(timeline)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    st.line_chart(df.set_index("timestamp")[["quiz_score", "activity_score", "total_score"]])
+    st.dataframe(
+        df.rename(columns={
+            "timestamp": "제출 시간", "access_code": "학습 코드", "unit": "단원", "mission_id": "활동",
+            "quiz_score": "퀴즈", "activity_score": "활동 점수", "total_score": "최종",
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
+    
+    with st.expander("다른 이름으로 입장한 기록 연결"):
+        st.caption("학생이 다른 이름(예: 띄어쓰기, 영문 이름)으로 입장했다면 그 이름을 이 학생에게 연결합니다.")
+        alias_name = st.text_input("연결할 이름", key="alias_name_input")
+        if st.button("🔗 연결", key="link_alias_btn") and alias_name:
+            student_registry.link_alias(db, teacher, alias_name, student_id)
+            st.success(f"✅ 앞으로 '{alias_name}'(으)로 입장한 제출은 {labels[student_id]} 학생으로 기록됩니다.")
+
+
+def show_submission_export(access_code):
+    """제출 결과 파일 내보내기 (Firestore를 페이지 단위로 읽어 바로 파일에 기록)"""
+    with st.expander("📥 결과 내보내기 (CSV / Excel)"):
+        columns = st.multiselect(
+            "내보낼 항목",
+            [field for field, _ in submission_export.EXPORT_COLUMNS],
+            default=submission_export.DEFAULT_COLUMNS,
+            format_func=submission_export.COLUMN_LABELS.get,
+            key="export_columns",
+        )
+        fmt = st.radio("형식", ["xlsx", "csv"], format_func=lambda f: {"xlsx": "Excel", "csv": "CSV"}[f],
+                       horizontal=True, key="export_format")
+        export_key = (access_code, fmt, tuple(columns))
+        
+        if st.button("📄 내보내기 파일 만들기", key="export_btn", disabled=not columns):
+            discard_submission_export()
+            db = get_firestore_client()
+            # 파일은 디스크에만 두고 세션에는 경로만 보관
+            with st.spinner("제출 결과를 내보내는 중..."), profiler.section("firestore.submissions_export"):
+                path = tracing.firestore_call(
+                    "submissions_export",
+                    lambda: submission_export.export_to_file(db, access_code, columns, fmt),
+                    feature="teacher_results",
+                )
+            st.session_state.submission_export = (export_key, path)
+        
+        exported = st.session_state.get("submission_export")
+        if exported and exported[0] == export_key and os.path.exists(exported[1]):
+            with open(exported[1], "rb") as f:
+                st.download_button(
+                    "⬇️ 다운로드",
+                    f,
+                    file_name=f"readfit_{access_code}_{datetime.now():%Y%m%d}.{fmt}",
+                    mime=submission_export.FORMATS[fmt],
+                    key="export_download",
+                    on_click=discard_submission_export,
+                )
+
+
+def discard_submission_export():
+    """내려받았거나 새로 만들 내보내기 파일 삭제"""
+    exported = st.session_state.pop("submission_export", None)
+    if exported:
+        submission_export.discard_file(exported[1])
+
+
 def show_teacher_results():
     """교사 대시보드 - 과제 결과 조회"""
     st.header("📊 과제 결과 조회")
@@ -1484,24 +2294,37 @@ def show_teacher_results():
         st.info("📌 과제 코드를 입력하면 학생들의 제출 결과를 조회할 수 있습니다.")
         return
     
+    tracing.update_context(access_code=access_code)
+    
     # Firestore에서 데이터 조회
     try:
         db = get_firestore_client()
         query = db.collection("readfit_submissions").where("access_code", "==", access_code)
-        docs = list(query.stream())
+        # 데이터 버전은 제출 수 집계 조회 + 문항 집계 문서로 확인 (리런마다 전체 제출을 읽지 않음)
+        with profiler.section("firestore.submissions_version"):
+            count = tracing.firestore_call(
+                "submissions_count", lambda: query.count().get()[0][0].value, feature="teacher_results"
+            )
+            rollup_doc = tracing.firestore_call(
+                "item_stats_get", db.collection(ITEM_STATS_COLLECTION).document(access_code).get, feature="teacher_results"
+            )
+        version = data_version(count, rollup_doc.update_time if rollup_doc.exists else None)
         
-        if not docs:
+        if not count:
             st.warning("제출된 과제가 없습니다.")
             return
         
-        # 데이터 정리
-        submissions = []
-        for doc in docs:
-            data = doc.to_dict()
-            submissions.append({
-                "doc_id": doc.id,
-                "data": data
-            })
+        # 제출 목록은 데이터 버전이 바뀐 경우에만 다시 조회
+        cached = st.session_state.get("teacher_submissions")
+        if cached and cached[0] == (access_code, version):
+            submissions = cached[1]
+        else:
+            with profiler.section("firestore.submissions_stream"):
+                docs = tracing.firestore_call(
+                    "submissions_stream", lambda: list(query.stream()), feature="teacher_results"
+                )
+            submissions = [{"doc_id": doc.id, "data": doc.to_dict()} for doc in docs]
+            st.session_state.teacher_submissions = ((access_code, version), submissions)
         
         # Summary 데이터프레임 생성
         import pandas as pd
@@ -1518,18 +2341,29 @@ def show_teacher_results():
             summary_data.append({
                 "학생명": data.get("student_name", "이름 없음"),
                 "활동": mission_name,
-                "퀴즈 점수": f"{data.get('quiz_score', 0)}점",
-                "활동 점수": f"{data.get('activity_score', 0)}점",
-                "최종 점수": f"{data.get('total_score', 0)}점",
+                "퀴즈 점수": data.get("quiz_score", 0),
+                "활동 점수": data.get("activity_score", 0),
+                "최종 점수": data.get("total_score", 0),
                 "제출 시간": data.get("timestamp", "알 수 없음")
             })
         
+        show_class_stats(access_code, version, submissions)
+        show_item_analysis(access_code, rollup_doc)
+        
         # 데이터프레임 표시
         st.subheader(f"📋 제출 현황 ({len(submissions)}명)")
         df = pd.DataFrame(summary_data)
-        st.dataframe(df, use_container_width=True)
+        score_column = st.column_config.NumberColumn(format="%d점")
+        st.dataframe(
+            df,
+            use_container_width=True,
+            column_config={"퀴즈 점수": score_column, "활동 점수": score_column, "최종 점수": score_column},
+        )
+        
+        show_submission_export(access_code)
         
         st.divider()
+        show_audio_submissions(access_code)
         
         # 개별 상세 정보
         st.subheader("📝 개별 결과 상세")
@@ -1561,7 +2395,18 @@ def show_teacher_results():
                         disabled=True,
                         key=f"writer_text_{idx}"
                     )
-                    
+                    analysis = mission_details.get("analysis") or {}
+                    if analysis:
+                        st.write(f"**사용한 키워드:** {', '.join(analysis.get('keywords_found', [])) or '없음'}")
+                        st.write(f"**빠진 키워드:** {', '.join(analysis.get('keywords_missing', [])) or '없음'}")
+                        misspellings = analysis.get("misspellings", [])
+                        if misspellings:
+                            st.write("**철자 의심:** " + ", ".join(f"{m['word']} → {m['suggestion']}" for m in misspellings))
+                        st.caption(
+                            f"단어 {analysis.get('word_count', 0)}개 · 문장 {analysis.get('sentence_count', 0)}개 · "
+                            f"어휘 다양도 {analysis.get('type_token_ratio', 0)} · 가독성 {analysis.get('readability', 0)}"
+                        )
+
                 elif mission_id == "mystery_20_questions":
                     st.subheader("🕵️ 스무고개 결과")
                     st.write(f"**목표 단어:** {mission_details.get('target_word', 'N/A')}")
@@ -1623,10 +2468,34 @@ def show_teacher_dashboard():
         st.write("**역할**: 교사")
         st.divider()
         
-        menu_choice = st.radio("메뉴", ["과제 생성", "결과 보기"], key="teacher_menu")
-        
+        menu_choice = st.radio("메뉴", ["과제 생성", "결과 보기", "전체 통계", "학생 진도"], key="teacher_menu")
+
         st.divider()
-        
+
+        # AI 서비스 상태 (서킷 브레이커)
+        st.write("**AI 서비스 상태**")
+        breaker_status = all_breaker_status()
+        if not breaker_status:
+            st.caption("아직 호출 기록이 없습니다.")
+        state_labels = {"closed": "🟢 정상", "half_open": "🟡 복구 확인 중", "open": "🔴 일시 차단"}
+        for status in breaker_status:
+            label = state_labels.get(status["state"], status["state"])
+            detail = f"오류율 {int(status['error_rate'] * 100)}% · 최근 {status['calls']}건"
+            if status["state"] == "open":
+                detail += f" · {status['retry_in']}초 후 재시도"
+            st.caption(f"{status['name']}: {label} ({detail})")
+        queue_metrics = get_scheduler().metrics()
+        for priority, stats in queue_metrics["queue_wait"].items():
+            if stats["count"]:
+                avg_wait = stats["sum"] / stats["count"]
+                st.caption(f"대기열({priority}): 평균 {avg_wait:.2f}초 · {stats['count']}건 · 대기 중 {queue_metrics['queued'].get(priority, 0)}건")
+        with st.expander("대기 시간 지표 (Prometheus)"):
+            st.code(get_scheduler().metrics_text(), language="text")
+
+        show_profile_panel()
+
+        st.divider()
+
         if st.button("로그아웃", use_container_width=True):
             logout()
     
@@ -1694,6 +2563,17 @@ def show_teacher_dashboard():
         
         st.divider()
         
+        # 쉐도잉 채점용 모범 낭독 (선택)
+        st.markdown("### 🎙️ 모범 낭독 녹음 (선택)")
+        st.caption("지문을 읽은 녹음을 올리면 학생 쉐도잉 녹음의 발음을 이 녹음과 비교해 채점합니다.")
+        reference_audio = st.file_uploader(
+            "모범 낭독 파일 (WAV, MP3, M4A, OGG)",
+            type=["wav", "mp3", "m4a", "ogg"],
+            key="reference_audio_file"
+        )
+        
+        st.divider()
+        
         # 과제 생성 버튼
         st.markdown("### 🚀 과제 배포")
         st.caption("위의 지문과 퀴즈를 확인하셨다면 아래 버튼을 눌러 과제를 생성하세요.")
@@ -1712,7 +2592,24 @@ def show_teacher_dashboard():
                     "teacher_name": st.session_state.user_name,
                     "created_at": datetime.now()
                 }
-                db.collection("readfit_assignments").document(access_code).set(assignment_data)
+                if reference_audio is not None:
+                    content_type, ext = content_type_for(reference_audio.name)
+                    reference_path = f"reference_audio/{access_code}.{ext}"
+                    try:
+                        reference_audio.seek(0)
+                        get_storage_bucket().blob(reference_path).upload_from_file(
+                            reference_audio, content_type=content_type
+                        )
+                        assignment_data["reference_audio_path"] = reference_path
+                    except Exception as e:
+                        st.warning(f"모범 낭독 업로드에 실패하여 유창성만 채점합니다: {e}")
+                tracing.firestore_call(
+                    "assignment_set",
+                    lambda: db.collection("readfit_assignments").document(access_code).set(assignment_data),
+                    feature="assignment",
+                    writes=1,
+                )
+                shared_cache.get_cache().delete("assignment", access_code)
                 
                 st.success(f"✅ 과제가 생성되었습니다!\n\n**학생 접근 코드: `{access_code}`**")
                 st.info(
@@ -1726,6 +2623,13 @@ def show_teacher_dashboard():
     
     elif menu_choice == "결과 보기":
         show_teacher_results()
+    
+    elif menu_choice == "전체 통계":
+        show_term_analytics()
+        show_error_heatmap()
+    
+    elif menu_choice == "학생 진도":
+        show_student_progress()
 
 
 # ============================================================================
@@ -1775,13 +2679,13 @@ def show_student_workspace():
     if 'reading_text' not in st.session_state:
         st.session_state.reading_text = ""
     
+    persist_student_progress()
+    
     # ReadFit 컬렉션에서 과제 데이터 로드
     try:
         db = get_firestore_client()
-        doc = db.collection("readfit_assignments").document(st.session_state.current_access_code).get()
-        if doc.exists:
-            assignment = doc.to_dict()
-        else:
+        assignment = load_assignment(st.session_state.current_access_code)
+        if assignment is None:
             st.error("과제를 불러올 수 없습니다.")
             return
     except Exception as e:
@@ -1791,6 +2695,26 @@ def show_student_workspace():
     if not assignment:
         st.error("과제 정보를 불러올 수 없습니다.")
         return
+    if not st.session_state.reading_text:
+        # 복원된 세션은 Step 1을 거치지 않으므로 지문을 여기서 채움
+        st.session_state.reading_text = assignment.get("text", "")
+    st.session_state.assignment_info = {
+        "unit": assignment.get("unit"),
+        "teacher_name": assignment.get("teacher_name"),
+    }
+    
+    # 교사 명부의 학생 ID 확인 (입장한 이름/교사가 바뀔 때만 조회)
+    roster_key = (assignment.get("teacher_name"), st.session_state.user_name)
+    if roster_key[0] and st.session_state.get("student_roster_key") != roster_key:
+        try:
+            st.session_state.student_id = tracing.firestore_call(
+                "student_resolve",
+                lambda: student_registry.resolve_student(db, roster_key[0], roster_key[1]),
+                feature="assignment",
+            )
+            st.session_state.student_roster_key = roster_key
+        except Exception as e:
+            logger.warning("학생 명부 조회 실패: %s", e)
     
     # 📚 지문 정보 표시
     st.markdown("<div class='card'>", unsafe_allow_html=True)
@@ -1817,6 +2741,38 @@ def show_student_workspace():
             st.session_state.activity_score,
             st.session_state.selected_mission_title
         )
+    
+    # 이번 실행에서 만든 문제/저장 결과 반영 (단계 전환은 st.rerun() 뒤 다음 실행 시작에서 반영)
+    persist_student_progress()
+
+
+def persist_student_progress():
+    """진행 상태가 바뀌었으면 공유 저장소에 기록 (워커가 바뀌어도 같은 단계에서 이어서 진행)"""
+    token = st.session_state.get("resume_token")
+    if not token:
+        return
+    progress = student_progress.from_session(st.session_state)
+    record = progress.encode()
+    if record != st.session_state.get("progress_record"):
+        student_progress.save(shared_cache.get_cache(), token, progress)
+        st.session_state.progress_record = record
+
+
+def restore_student_session():
+    """새 세션이 재개 토큰(?resume=...)을 가지고 있으면 학생 진행 상태 복원"""
+    token = st.query_params.get("resume")
+    if not token or st.session_state.is_logged_in:
+        return
+    progress = student_progress.load(shared_cache.get_cache(), token)
+    if progress is None:
+        # 만료되었거나 로그아웃한 토큰
+        del st.query_params["resume"]
+        return
+    student_progress.apply_to_session(progress, st.session_state)
+    st.session_state.is_logged_in = True
+    st.session_state.user_role = "student"
+    st.session_state.resume_token = token
+    st.session_state.progress_record = progress.encode()
 
 
 # ============================================================================
@@ -1845,15 +2801,46 @@ if "current_access_code" not in st.session_state:
 # 9. MAIN APP LOGIC
 # ============================================================================
 
+def get_session_id():
+    """현재 Streamlit 세션 ID (스크립트 실행 컨텍스트가 없으면 None)"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx else None
+    except Exception:
+        return None
+
+
+def current_page_label():
+    """프로파일 집계용 페이지/단계 이름"""
+    if not st.session_state.is_logged_in:
+        return "login"
+    if st.session_state.user_role == "teacher":
+        return f"teacher/{st.session_state.get('teacher_menu', '과제 생성')}"
+    return f"student/step{st.session_state.get('step', 1)}"
+
+
 def main():
     """메인 애플리케이션"""
-    apply_global_styles()
-    if not st.session_state.is_logged_in:
-        show_login_page()
-    elif st.session_state.user_role == "teacher":
-        show_teacher_dashboard()
-    elif st.session_state.user_role == "student":
-        show_student_workspace()
+    start_warmup()
+    profiler.start_run()
+    page = current_page_label()
+    tracing.set_context(
+        access_code=st.session_state.get("current_access_code"),
+        session=get_session_id(),
+        role=st.session_state.get("user_role"),
+    )
+    try:
+        apply_global_styles()
+        restore_student_session()
+        if not st.session_state.is_logged_in:
+            show_login_page()
+        elif st.session_state.user_role == "teacher":
+            show_teacher_dashboard()
+        elif st.session_state.user_role == "student":
+            show_student_workspace()
+    finally:
+        profiler.end_run(page)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+"""
+학생 학습 진행 상태 외부 저장
+4단계 학습 흐름의 상태(st.session_state)는 워커 프로세스의 세션에만 있어서
+웹소켓 재연결·워커 재시작·다른 워커로의 연결 시 학생이 Step 1로 돌아가고 AI 문제를 다시 생성합니다.
+
+이 모듈은 흐름 상태를 작은 레코드(StudentProgress)로 만들어 공유 캐시(shared_cache)의
+"student_progress" 네임스페이스에 저장하고, 주소창의 재개 토큰(?resume=...)으로 어느 워커에서든 복원합니다.
+- 값이 바뀐 경우에만 저장 (단계 전환, 힌트 사용, 문제 생성 직후)
+- 퀴즈 응답은 (정답 비트마스크, 선택지 번호)로 압축
+- 이미지 바이트는 저장하지 않음 (복원 시 문장으로 공유 이미지 캐시에서 다시 찾음)
+"""
+
+import secrets
+from dataclasses import astuple, dataclass, fields
+
+from item_analysis import decode_bitmask, encode_answers
+
+NAMESPACE = "student_progress"
+TTL_SECONDS = 12 * 3600
+FORMAT_VERSION = 1
+
+
+@dataclass(slots=True)
+class StudentProgress:
+    user_name: str
+    access_code: str
+    step: int = 1
+    student_id: str = None
+    quiz_bitmask: int = 0
+    quiz_choices: tuple = ()
+    quiz_score: int = 0
+    quiz_correct: int = 0
+    quiz_total: int = 0
+    submission_saved: bool = False
+    shadowing_job_id: str = None
+    selected_mission: str = None
+    selected_mission_title: str = None
+    activity_score: int = 0
+    activity_answer: str = ""
+    # 이미지 탐정: 문제 (이미지 제외) + 학생 답
+    detective_sentence: str = None
+    detective_options: tuple = ()
+    detective_option_types: tuple = ()
+    detective_image_url: str = None
+    detective_target: str = None
+    detective_answer: str = None
+    detective_answer_type: str = None
+    # 미스터리 스무고개
+    mystery_target_word: str = None
+    mystery_text_with_blank: str = ""
+    mystery_hint_level: int = 0
+    # 베스트셀러 작가
+    writer_keywords: tuple = None
+    writer_keywords_used: tuple = ()
+    writer_analysis: dict = None
+    report_insights: dict = None
+
+    def encode(self):
+        """저장용 튜플 (필드 이름 없이 값만, 맨 앞은 형식 버전)"""
+        return (FORMAT_VERSION,) + astuple(self)
+
+    @classmethod
+    def decode(cls, record):
+        """encode() 결과로 복원 (형식이 다르면 None)"""
+        if not record or record[0] != FORMAT_VERSION or len(record) != len(fields(cls)) + 1:
+            return None
+        return cls(*record[1:])
+
+
+# session_state 키를 그대로 쓰는 필드
+_PLAIN_FIELDS = (
+    "step", "student_id", "quiz_score", "quiz_correct", "quiz_total", "submission_saved", "shadowing_job_id",
+    "selected_mission", "selected_mission_title", "activity_score", "activity_answer",
+    "detective_target", "detective_answer", "detective_answer_type",
+    "mystery_target_word", "mystery_text_with_blank", "mystery_hint_level",
+    "writer_analysis", "report_insights",
+)
+
+
+def from_session(state):
+    """현재 세션 상태로 레코드 생성"""
+    progress = StudentProgress(state.get("user_name"), state.get("current_access_code"))
+    for name in _PLAIN_FIELDS:
+        value = state.get(name)
+        if value is not None:
+            setattr(progress, name, value)
+    bitmask, choices = encode_answers(state.get("quiz_answers") or [])
+    progress.quiz_bitmask, progress.quiz_choices = bitmask, tuple(choices)
+    if state.get("writer_keywords") is not None:
+        progress.writer_keywords = tuple(state.get("writer_keywords"))
+    progress.writer_keywords_used = tuple(state.get("writer_keywords_used") or ())
+    detective = state.get("detective_sentence_data")
+    if detective:
+        progress.detective_sentence = detective.get("correct_sentence")
+        progress.detective_options = tuple(detective.get("options") or ())
+        progress.detective_option_types = tuple((detective.get("option_types") or {}).items())
+        image = detective.get("image")
+        progress.detective_image_url = image if isinstance(image, str) else None
+    return progress
+
+
+def apply_to_session(progress, state):
+    """레코드를 세션 상태에 복원 (탐정 이미지는 None - 화면에서 다시 찾음)"""
+    state["user_name"] = progress.user_name
+    state["current_access_code"] = progress.access_code
+    for name in _PLAIN_FIELDS:
+        value = getattr(progress, name)
+        if value is not None:
+            state[name] = value
+    state["quiz_answers"] = [
+        {"is_correct": bool(correct), "selected_index": choice}
+        for correct, choice in zip(decode_bitmask(progress.quiz_bitmask, len(progress.quiz_choices)), progress.quiz_choices)
+    ]
+    if progress.writer_keywords is not None:
+        state["writer_keywords"] = list(progress.writer_keywords)
+    state["writer_keywords_used"] = list(progress.writer_keywords_used)
+    if progress.detective_sentence:
+        state["detective_sentence_data"] = {
+            "correct_sentence": progress.detective_sentence,
+            "image": progress.detective_image_url,
+            "options": list(progress.detective_options),
+            "option_types": dict(progress.detective_option_types),
+        }
+
+
+def new_token():
+    return secrets.token_urlsafe(12)
+
+
+def save(cache, token, progress):
+    cache.set(NAMESPACE, token, progress.encode(), ttl=TTL_SECONDS)
+
+
+def load(cache, token):
+    """재개 토큰의 레코드 (없거나 만료/형식 불일치면 None)"""
+    return StudentProgress.decode(cache.get(NAMESPACE, token))
+
+
+def discard(cache, token):
+    cache.delete(NAMESPACE, token)
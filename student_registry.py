@@ -0,0 +1,147 @@
+"""
+학생 명부 및 학습 이력 색인
+교사별 명부(readfit_rosters/{교사})에 학생을 안정적인 ID로 등록하고,
+학생마다 제출 요약을 시간순으로 추가만 하는(append-only) 이력 하위 컬렉션을 유지합니다.
+
+readfit_rosters/{교사}
+    aliases/{정규화된 이름}       → {"student_id"}   (로그인 이름 → 학생 ID, 교사가 다른 이름을 같은 학생으로 묶을 수 있음)
+    students/{학생 ID}            → {"display_name", "last_submission_at", "submission_count", ...}
+        progress/{시각_학습 코드} → 제출 요약
+
+학습 추이는 학생 이력 하위 컬렉션 조회, "최근 제출이 끊긴 학생"은
+last_submission_at 단일 필드 조회(범위 + 미제출 null)로 처리하므로 전체 제출을 훑지 않습니다.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+ROSTERS_COLLECTION = "readfit_rosters"
+PROGRESS_FIELDS = ("access_code", "unit", "mission_id", "quiz_score", "activity_score", "total_score", "timestamp")
+
+
+def normalize_name(name):
+    """이름 비교용 키 (공백 정리 + 대소문자 무시)"""
+    return " ".join((name or "").split()).casefold()
+
+
+def _doc_key(value):
+    return str(value or "N/A").replace("/", "_")
+
+
+def _roster(db, teacher):
+    return db.collection(ROSTERS_COLLECTION).document(_doc_key(teacher))
+
+
+def resolve_student(db, teacher, display_name):
+    """
+    로그인 이름을 교사 명부의 학생 ID로 변환합니다 (처음 보는 이름이면 새로 등록).
+    별칭 문서를 create()로 만들어 동시에 같은 이름으로 입장해도 학생이 하나만 생성됩니다.
+
+    Returns:
+        str: 학생 ID
+    """
+    from firebase_admin import firestore
+    from google.api_core.exceptions import AlreadyExists
+
+    roster = _roster(db, teacher)
+    name_key = normalize_name(display_name)
+    alias_ref = roster.collection("aliases").document(_doc_key(name_key))
+    alias = alias_ref.get()
+    if alias.exists:
+        return alias.to_dict()["student_id"]
+
+    student_id = uuid.uuid4().hex[:12]
+    try:
+        alias_ref.create({"student_id": student_id, "name": display_name, "created_at": firestore.SERVER_TIMESTAMP})
+    except AlreadyExists:
+        return alias_ref.get().to_dict()["student_id"]
+    roster.collection("students").document(student_id).set({
+        "display_name": display_name,
+        "name_key": name_key,
+        "created_at": firestore.SERVER_TIMESTAMP,
+        "submission_count": 0,
+        "last_submission_at": None,
+    })
+    return student_id
+
+
+def link_alias(db, teacher, display_name, student_id):
+    """다른 로그인 이름을 기존 학생 ID에 연결 (이후 제출부터 같은 학생으로 기록)"""
+    from firebase_admin import firestore
+
+    alias_ref = _roster(db, teacher).collection("aliases").document(_doc_key(normalize_name(display_name)))
+    alias_ref.set({"student_id": student_id, "name": display_name, "linked_at": firestore.SERVER_TIMESTAMP})
+
+
+def progress_ref(db, teacher, student_id, submission):
+    """제출에 대응하는 학생 이력 문서 참조 (제출 시각 + 학습 코드로 결정)"""
+    timestamp = submission.get("timestamp")
+    entry_id = f"{timestamp:%Y%m%dT%H%M%S%f}_{_doc_key(submission.get('access_code'))}"
+    return _roster(db, teacher).collection("students").document(student_id).collection("progress").document(entry_id)
+
+
+def record_progress(db, teacher, student_id, submission):
+    """
+    제출 요약을 학생 이력에 추가하고 학생 문서의 최근 제출 정보를 갱신합니다 (배치 쓰기 1회).
+
+    Args:
+        submission (dict): 제출 데이터 (PROGRESS_FIELDS만 기록)
+    """
+    from firebase_admin import firestore
+
+    timestamp = submission.get("timestamp") or datetime.now()
+    entry = {field: submission.get(field) for field in PROGRESS_FIELDS}
+    entry["timestamp"] = timestamp
+    student_ref = _roster(db, teacher).collection("students").document(student_id)
+
+    batch = db.batch()
+    batch.set(progress_ref(db, teacher, student_id, entry), entry)
+    batch.set(student_ref, {
+        "last_submission_at": timestamp,
+        "last_access_code": submission.get("access_code"),
+        "last_total_score": submission.get("total_score"),
+        "submission_count": firestore.Increment(1),
+    }, merge=True)
+    batch.commit()
+
+
+def list_students(db, teacher):
+    """명부의 학생 목록 (최근 제출 순)"""
+    students = []
+    for doc in _roster(db, teacher).collection("students").stream():
+        data = doc.to_dict()
+        data["student_id"] = doc.id
+        students.append(data)
+    # 제출 기록이 없는 학생은 맨 뒤로
+    students.sort(key=lambda s: (s.get("last_submission_at") is not None, s.get("last_submission_at") or 0), reverse=True)
+    return students
+
+
+def dropped_students(db, teacher, inactive_days):
+    """
+    마지막 제출 후 inactive_days일 넘게 제출이 없는 학생 (last_submission_at 범위 조회).
+    등록 후 inactive_days일이 지나도록 한 번도 제출하지 않은 학생(last_submission_at=None)도 포함합니다.
+    범위 조회는 null 값을 건너뛰므로 null 동등 조회를 따로 하고 등록 시각은 여기서 거릅니다.
+    """
+    cutoff = datetime.now() - timedelta(days=inactive_days)
+    students_ref = _roster(db, teacher).collection("students")
+    students = []
+    for doc in students_ref.where("last_submission_at", "<", cutoff).stream():
+        data = doc.to_dict()
+        data["student_id"] = doc.id
+        students.append(data)
+    for doc in students_ref.where("last_submission_at", "==", None).stream():
+        data = doc.to_dict()
+        created_at = data.get("created_at")
+        if created_at is not None and created_at.timestamp() >= cutoff.timestamp():
+            continue
+        data["student_id"] = doc.id
+        students.append(data)
+    return students
+
+
+def progress_timeline(db, teacher, student_id, limit=100):
+    """학생 한 명의 제출 이력 (시간순, 최근 limit건)"""
+    progress = _roster(db, teacher).collection("students").document(student_id).collection("progress")
+    docs = progress.order_by("timestamp", direction="DESCENDING").limit(limit).stream()
+    return list(reversed([doc.to_dict() for doc in docs]))
@@ -0,0 +1,291 @@
+"""
+제출 결과 내보내기 (CSV / XLSX)
+readfit_submissions를 문서 ID 순으로 페이지 단위 조회하여 한 행씩 파일에 기록합니다.
+선택한 필드만 Firestore 프로젝션(select)으로 받아오므로 작품 본문·리포트 같은 큰 필드는
+고르지 않으면 내려받지 않고, 메모리에는 한 페이지 분량만 머뭅니다.
+
+mission_details, report_insights 같은 중첩 필드는 "mission_details.target_word"처럼
+점으로 이은 경로 하나가 한 열이 됩니다.
+
+실행 예:
+    python submission_export.py ABC123 results.xlsx
+    python submission_export.py ABC123 results.csv student_name total_score mission_details.result_type
+"""
+
+import csv
+import glob
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+SUBMISSIONS_COLLECTION = "readfit_submissions"
+EXPORT_PAGE_SIZE = 500
+CSV_FLUSH_ROWS = 200
+# 교사 화면용 내보내기 파일 위치와 보관 시간 (세션 메모리에 파일 내용을 두지 않음)
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "readfit_exports")
+EXPORT_FILE_TTL_SECONDS = 3600
+
+# (필드 경로, 열 제목) - 화면에 보이는 순서
+EXPORT_COLUMNS = (
+    ("student_name", "학생명"),
+    ("student_id", "학생 ID"),
+    ("access_code", "학습 코드"),
+    ("timestamp", "제출 시간"),
+    ("mission_id", "활동"),
+    ("quiz_score", "퀴즈 점수"),
+    ("quiz_correct", "퀴즈 정답 수"),
+    ("quiz_total", "퀴즈 문항 수"),
+    ("activity_score", "활동 점수"),
+    ("total_score", "최종 점수"),
+    ("mission_details.target_word", "목표 단어"),
+    ("mission_details.student_answer", "학생 답"),
+    ("mission_details.result_type", "답변 유형"),
+    ("mission_details.hints_used", "사용한 힌트"),
+    ("mission_details.student_text", "작품"),
+    ("mission_details.keywords_used", "사용한 키워드"),
+    ("mission_details.analysis.word_count", "단어 수"),
+    ("mission_details.analysis.sentence_count", "문장 수"),
+    ("mission_details.analysis.type_token_ratio", "어휘 다양도"),
+    ("mission_details.analysis.readability", "가독성"),
+    ("report_insights.one_line_feedback", "한 줄 피드백"),
+)
+COLUMN_LABELS = dict(EXPORT_COLUMNS)
+DEFAULT_COLUMNS = [
+    "student_name", "timestamp", "mission_id", "quiz_score", "activity_score", "total_score",
+    "mission_details.target_word", "mission_details.student_answer", "mission_details.result_type",
+]
+FORMATS = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def iter_submissions(db, access_code, field_paths, page_size=EXPORT_PAGE_SIZE):
+    """
+    학습 코드의 제출을 페이지 단위로 조회하는 제너레이터.
+    문서 ID 순 정렬이라 access_code 단일 필드 색인만으로 동작합니다 (복합 색인 불필요).
+
+    Args:
+        field_paths (list): 받아올 필드 경로 (프로젝션)
+
+    Yields:
+        dict: 제출 문서 (선택한 필드만 포함)
+    """
+    from firebase_admin import firestore
+
+    query = (
+        db.collection(SUBMISSIONS_COLLECTION)
+        .where("access_code", "==", access_code)
+        .select(list(field_paths))
+        .order_by(firestore.FieldPath.document_id())
+        .limit(page_size)
+    )
+    last_doc = None
+    while True:
+        page = query.start_after(last_doc) if last_doc is not None else query
+        docs = list(page.stream())
+        for doc in docs:
+            yield doc.to_dict()
+        if len(docs) < page_size:
+            return
+        last_doc = docs[-1]
+
+
+def field_value(data, path):
+    """점으로 이은 경로의 값 (중간에 없으면 None)"""
+    value = data
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def cell_value(value):
+    """셀에 쓸 값으로 변환 (숫자는 그대로, 목록은 쉼표로 연결, 그 외는 문자열)"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "O" if value else "X"
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(cell_value(v)) for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def iter_rows(records, columns):
+    """제출 dict → 열 순서대로 정리한 셀 목록"""
+    for data in records:
+        yield [cell_value(field_value(data, path)) for path in columns]
+
+
+def _csv_safe(value):
+    # 스프레드시트가 학생 입력을 수식으로 실행하지 않도록 함
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@"):
+        return "'" + value
+    return value
+
+
+def write_csv(rows, columns, out):
+    """
+    CSV를 바이너리 파일 객체에 기록 (Excel에서 한글이 깨지지 않도록 UTF-8 BOM 포함).
+    CSV_FLUSH_ROWS행마다 버퍼를 비우므로 행 수와 무관하게 메모리 사용이 일정합니다.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([COLUMN_LABELS.get(path, path) for path in columns])
+    out.write("\ufeff".encode("utf-8"))
+    for count, row in enumerate(rows, 1):
+        writer.writerow([_csv_safe(value) for value in row])
+        if count % CSV_FLUSH_ROWS == 0:
+            out.write(buffer.getvalue().encode("utf-8"))
+            buffer.seek(0)
+            buffer.truncate()
+    out.write(buffer.getvalue().encode("utf-8"))
+
+
+# XML 1.0에서 허용되지 않는 제어 문자 (탭/줄바꿈 제외)
+_XML_INVALID_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="제출 결과" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_row(cells):
+    parts = ["<row>"]
+    for value in cells:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            parts.append(f"<c><v>{value}</v></c>")
+        else:
+            parts.append(f'<c t="inlineStr"><is><t xml:space="preserve">{escape(_XML_INVALID_CHARS.sub("", str(value)))}</t></is></c>')
+    parts.append("</row>")
+    return "".join(parts).encode("utf-8")
+
+
+def write_xlsx(rows, columns, out):
+    """
+    XLSX를 바이너리 파일 객체에 기록.
+    시트 XML을 zip 항목에 한 행씩 바로 써 넣으므로(인라인 문자열, 공유 문자열 표 없음)
+    openpyxl 없이도 행 수와 무관하게 메모리 사용이 일정합니다.
+    """
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, xml in _XLSX_PARTS.items():
+            zf.writestr(name, xml)
+        with zf.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" state="frozen"/>'
+                b'</sheetView></sheetViews><sheetData>'
+            )
+            sheet.write(_xlsx_row([COLUMN_LABELS.get(path, path) for path in columns]))
+            for row in rows:
+                sheet.write(_xlsx_row(row))
+            sheet.write(b"</sheetData></worksheet>")
+
+
+def export_submissions(db, access_code, columns, fmt, out):
+    """
+    제출 결과를 out(바이너리 파일 객체)에 내보냅니다.
+
+    Args:
+        columns (list): 내보낼 필드 경로 (EXPORT_COLUMNS 참고, 순서대로 열 생성)
+        fmt (str): "csv" 또는 "xlsx"
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"지원하지 않는 형식: {fmt}")
+    rows = iter_rows(iter_submissions(db, access_code, columns), columns)
+    if fmt == "csv":
+        write_csv(rows, columns, out)
+    else:
+        write_xlsx(rows, columns, out)
+
+
+def export_to_file(db, access_code, columns, fmt, export_dir=EXPORT_DIR):
+    """
+    제출 결과를 export_dir의 새 임시 파일로 내보내고 경로를 반환합니다.
+    보관 시간이 지난 이전 내보내기 파일은 이때 함께 지웁니다.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    cutoff = time.time() - EXPORT_FILE_TTL_SECONDS
+    for old in glob.glob(os.path.join(export_dir, "export-*")):
+        try:
+            if os.path.getmtime(old) < cutoff:
+                os.unlink(old)
+        except OSError:
+            pass
+    fd, path = tempfile.mkstemp(dir=export_dir, prefix="export-", suffix=f".{fmt}")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            export_submissions(db, access_code, columns, fmt, out)
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
+
+
+def discard_file(path):
+    """내보내기 파일 삭제 (이미 없으면 무시)"""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    from firebase_config import get_firestore_client
+
+    code, path = sys.argv[1], sys.argv[2]
+    selected = sys.argv[3:] or [field for field, _ in EXPORT_COLUMNS]
+    with open(path, "wb") as f:
+        export_submissions(get_firestore_client(), code, selected, path.rsplit(".", 1)[-1].lower(), f)
+    print(f"{path} 저장 완료")
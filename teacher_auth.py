@@ -0,0 +1,199 @@
+"""
+교사 인증 세션 캐시 모듈
+Firebase Identity Toolkit REST API 로그인 결과(idToken / refreshToken)를 사용자별로 캐시하고,
+만료가 가까워지면 Secure Token 엔드포인트로 갱신합니다.
+
+- 연결 풀을 공유하는 requests.Session + 타임아웃
+- 서버 확인 후 OFFLINE_ACCEPT_SECONDS 동안 재로그인은 네트워크 왕복 없이 처리 (비밀번호는 솔트 해시로만 보관하여 로컬 검증)
+  그 뒤에는 토큰 갱신 또는 재로그인으로 서버에 다시 확인하므로, 비밀번호 변경/계정 비활성화가 곧 반영됨
+- FIREBASE_AUTH_EMULATOR_HOST 가 설정되면 로컬 Auth 에뮬레이터로 요청
+"""
+
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# (연결, 읽기) 타임아웃 초
+REQUEST_TIMEOUT = (3.05, 10)
+# 만료 이만큼 전부터는 갱신 대상으로 간주 (초)
+REFRESH_MARGIN_SECONDS = 300
+# 서버 확인 없이 캐시된 비밀번호 해시만으로 로그인을 허용하는 시간 (초, idToken 유효 시간 1시간보다 짧게)
+OFFLINE_ACCEPT_SECONDS = 600
+# 캐시된 비밀번호와 같은 비밀번호로 이 오류가 나면 캐시가 더 이상 유효하지 않음 (비밀번호 변경/비활성화/삭제)
+STALE_CREDENTIAL_ERRORS = ("INVALID_PASSWORD", "INVALID_LOGIN_CREDENTIALS", "USER_DISABLED", "USER_NOT_FOUND")
+
+ERROR_MESSAGES = {
+    "INVALID_EMAIL": "유효하지 않은 이메일 주소입니다.",
+    "INVALID_PASSWORD": "비밀번호가 틀렸습니다.",
+    "INVALID_LOGIN_CREDENTIALS": "이메일 또는 비밀번호가 틀렸습니다.",
+    "USER_DISABLED": "비활성화된 사용자입니다.",
+    "USER_NOT_FOUND": "등록되지 않은 이메일입니다.",
+    "TOKEN_EXPIRED": "로그인이 만료되었습니다. 다시 로그인해주세요.",
+}
+
+_session = None
+_session_lock = threading.Lock()
+_cache = {}  # email -> 토큰 정보
+_cache_lock = threading.Lock()
+
+
+def get_http_session():
+    """프로세스 전역 requests.Session (연결 재사용)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _endpoints():
+    emulator = os.getenv("FIREBASE_AUTH_EMULATOR_HOST")
+    if emulator:
+        return (
+            f"http://{emulator}/identitytoolkit.googleapis.com/v1",
+            f"http://{emulator}/securetoken.googleapis.com/v1",
+        )
+    return (
+        "https://identitytoolkit.googleapis.com/v1",
+        "https://securetoken.googleapis.com/v1",
+    )
+
+
+def _hash_password(password, salt):
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, 100_000)
+
+
+def _error_code(data, default="로그인 실패"):
+    message = (data.get("error") or {}).get("message", default) if isinstance(data, dict) else default
+    # "INVALID_PASSWORD : ..." 형태로 상세 설명이 붙는 경우 코드만 사용
+    return message.split(" ")[0], message
+
+
+def _error_result(data):
+    code, message = _error_code(data)
+    return {"success": False, "error": ERROR_MESSAGES.get(code, message)}
+
+
+def _store(email, password, data):
+    salt = os.urandom(16)
+    entry = {
+        "email": data.get("email", email),
+        "user_id": data.get("localId") or data.get("user_id"),
+        "id_token": data.get("idToken") or data.get("id_token"),
+        "refresh_token": data.get("refreshToken") or data.get("refresh_token"),
+        "expires_at": time.time() + int(data.get("expiresIn") or data.get("expires_in") or 3600),
+        "verified_at": time.time(),
+        "salt": salt,
+        "password_hash": _hash_password(password, salt),
+    }
+    with _cache_lock:
+        _cache[email.strip().lower()] = entry
+    return entry
+
+
+def _success(entry):
+    return {
+        "success": True,
+        "user_email": entry["email"],
+        "user_id": entry["user_id"],
+        "id_token": entry["id_token"],
+        "expires_at": entry["expires_at"],
+    }
+
+
+def _refresh(entry, api_key):
+    """refreshToken으로 idToken 갱신 (성공 시 entry 갱신 후 True)"""
+    _, secure_token_url = _endpoints()
+    try:
+        response = get_http_session().post(
+            f"{secure_token_url}/token?key={api_key}",
+            data={"grant_type": "refresh_token", "refresh_token": entry["refresh_token"]},
+            timeout=REQUEST_TIMEOUT,
+        )
+    except requests.RequestException as e:
+        logger.warning("토큰 갱신 실패: %s", e)
+        return False
+    if response.status_code != 200:
+        return False
+    data = response.json()
+    with _cache_lock:
+        entry["id_token"] = data.get("id_token", entry["id_token"])
+        entry["refresh_token"] = data.get("refresh_token", entry["refresh_token"])
+        entry["expires_at"] = time.time() + int(data.get("expires_in") or 3600)
+        # 비밀번호 변경/비활성화 시 refreshToken이 폐기되므로 갱신 성공 = 계정이 아직 유효함
+        entry["verified_at"] = time.time()
+    return True
+
+
+def sign_in(email, password, api_key):
+    """
+    이메일/비밀번호로 교사 로그인.
+    비밀번호가 캐시와 일치하고 마지막 서버 확인이 OFFLINE_ACCEPT_SECONDS 이내이면 네트워크 호출 없이 성공을 반환하고,
+    그보다 오래되었으면 refreshToken으로 갱신(서버 확인), 그 외에는 Identity Toolkit에 로그인합니다.
+
+    Returns:
+        dict: {"success": True, "user_email", "user_id", "id_token", "expires_at"}
+              또는 {"success": False, "error": str}
+    """
+    key = email.strip().lower()
+    with _cache_lock:
+        entry = _cache.get(key)
+    matches = bool(entry) and hmac.compare_digest(entry["password_hash"], _hash_password(password, entry["salt"]))
+    if matches:
+        now = time.time()
+        if now < entry["verified_at"] + OFFLINE_ACCEPT_SECONDS and now < entry["expires_at"] - REFRESH_MARGIN_SECONDS:
+            return _success(entry)
+        if entry.get("refresh_token") and _refresh(entry, api_key):
+            return _success(entry)
+
+    identity_url, _ = _endpoints()
+    try:
+        response = get_http_session().post(
+            f"{identity_url}/accounts:signInWithPassword?key={api_key}",
+            json={"email": email, "password": password, "returnSecureToken": True},
+            timeout=REQUEST_TIMEOUT,
+        )
+        data = response.json()
+    except requests.Timeout:
+        return {"success": False, "error": "인증 서버 응답이 지연되고 있습니다. 잠시 후 다시 시도해주세요."}
+    except (requests.RequestException, ValueError) as e:
+        return {"success": False, "error": f"인증 오류: {str(e)}"}
+
+    if response.status_code != 200:
+        # 잘못 입력한 비밀번호로는 유효한 캐시를 지우지 않음 (캐시된 비밀번호 자체가 거부된 경우만 삭제)
+        if matches and _error_code(data)[0] in STALE_CREDENTIAL_ERRORS:
+            with _cache_lock:
+                _cache.pop(key, None)
+        return _error_result(data)
+    return _success(_store(email, password, data))
+
+
+def get_id_token(email, api_key):
+    """캐시된 idToken 반환 (만료가 가까우면 갱신, 불가능하면 None)"""
+    with _cache_lock:
+        entry = _cache.get(email.strip().lower())
+    if not entry:
+        return None
+    if time.time() < entry["expires_at"] - REFRESH_MARGIN_SECONDS:
+        return entry["id_token"]
+    if entry.get("refresh_token") and _refresh(entry, api_key):
+        return entry["id_token"]
+    return None
+
+
+def sign_out(email):
+    """캐시에서 사용자 토큰 제거"""
+    with _cache_lock:
+        _cache.pop(email.strip().lower(), None)
@@ -0,0 +1,38 @@
+"""writing_analyzer 원형 후보/철자 검사 테스트 (python -m pytest -q)"""
+
+import pytest
+
+from writing_analyzer import build_spell_checker, lemma_candidates
+
+
+@pytest.fixture(scope="module")
+def checker():
+    return build_spell_checker()
+
+
+@pytest.mark.parametrize("word", ["running", "stopped", "bigger", "swimming", "happily", "tried", "watches", "goes", "liked"])
+def test_inflected_forms_are_known(checker, word):
+    assert checker.is_known(word)
+
+
+@pytest.mark.parametrize("word", ["goed", "runing", "swiming", "biger", "eated", "sayed"])
+def test_malformed_inflections_are_not_known(checker, word):
+    assert not checker.is_known(word)
+
+
+@pytest.mark.parametrize("word, lemma", [
+    ("running", "run"),
+    ("hoping", "hope"),
+    ("hopping", "hop"),
+    ("beginning", "begin"),
+    ("happily", "happy"),
+    ("easier", "easy"),
+    ("studies", "study"),
+])
+def test_lemma_candidates(word, lemma):
+    assert lemma in lemma_candidates(word)
+
+
+def test_regular_past_of_irregular_verb_has_no_base():
+    assert "go" not in lemma_candidates("goed")
+    assert "run" not in lemma_candidates("runned")
@@ -0,0 +1,236 @@
+"""
+OpenAI / Firestore 호출 추적 모듈
+호출마다 지연, 재시도 횟수, 프롬프트/응답 토큰, 이미지 수, 문서 읽기/쓰기 수와 추정 비용을
+기능(feature), 학습 코드, 세션 태그와 함께 JSON lines 로그(크기 기준 로테이션)에 기록합니다.
+
+READFIT_TRACE=1 일 때만 기록합니다 (기본은 꺼짐).
+로그 경로: READFIT_TRACE_LOG (기본 logs/readfit_trace.jsonl)
+
+과제별 비용/지연 요약:
+    python tracing.py [로그 경로]
+"""
+
+import glob
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("READFIT_TRACE", "0").lower() in ("1", "true", "yes")
+LOG_PATH = os.getenv(
+    "READFIT_TRACE_LOG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "readfit_trace.jsonl"),
+)
+MAX_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 5
+
+# 모델별 단가 (USD). 토큰 단가는 100만 토큰당, 이미지 단가는 장당
+PRICING = {
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+    "dall-e-3": {"image": 0.04},
+}
+
+_local = threading.local()
+_logger = None
+_logger_lock = threading.Lock()
+
+
+def _get_logger():
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            trace_logger = logging.getLogger("readfit.trace")
+            trace_logger.setLevel(logging.INFO)
+            trace_logger.propagate = False
+            try:
+                os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+                handler = RotatingFileHandler(
+                    LOG_PATH, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding="utf-8"
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                trace_logger.addHandler(handler)
+            except OSError as e:
+                logger.warning("추적 로그 파일을 열 수 없습니다: %s", e)
+                trace_logger.addHandler(logging.NullHandler())
+            _logger = trace_logger
+        return _logger
+
+
+def set_context(**tags):
+    """현재 스크립트 실행(스레드)의 태그 설정 (access_code, session 등)"""
+    _local.tags = {k: v for k, v in tags.items() if v is not None}
+
+
+def update_context(**tags):
+    """현재 태그에 추가/변경 (예: 교사가 과제 코드를 입력한 뒤 access_code)"""
+    set_context(**dict(get_context(), **tags))
+
+
+def get_context():
+    return dict(getattr(_local, "tags", {}))
+
+
+def estimate_cost(model, prompt_tokens=0, completion_tokens=0, images=0):
+    """모델 단가표 기준 추정 비용 (USD)"""
+    price = PRICING.get(model, {})
+    cost = (prompt_tokens or 0) * price.get("input", 0) / 1_000_000
+    cost += (completion_tokens or 0) * price.get("output", 0) / 1_000_000
+    cost += (images or 0) * price.get("image", 0)
+    return round(cost, 6)
+
+
+def record(kind, **fields):
+    """추적 레코드 한 건 기록"""
+    if not ENABLED:
+        return
+    entry = {"ts": round(time.time(), 3), "kind": kind}
+    entry.update(get_context())
+    entry.update(fields)
+    _get_logger().info(json.dumps(entry, ensure_ascii=False, default=str))
+
+
+def record_openai(endpoint, model, feature, latency, retries, result=None, error=None):
+    """OpenAI 호출 결과 기록 (응답의 usage와 이미지 수로 비용 계산)"""
+    usage = getattr(result, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    images = len(getattr(result, "data", None) or []) if endpoint == "images" and result is not None else 0
+    record(
+        "openai",
+        endpoint=endpoint,
+        model=model,
+        feature=feature,
+        latency_ms=round(latency * 1000, 1),
+        retries=retries,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        images=images,
+        cost_usd=estimate_cost(model, prompt_tokens, completion_tokens, images),
+        status="error" if error else "ok",
+        error=f"{type(error).__name__}: {error}" if error else None,
+    )
+
+
+def firestore_call(op, func, feature, writes=0):
+    """
+    Firestore 호출을 실행하고 지연과 문서 읽기/쓰기 수를 기록합니다.
+
+    Args:
+        op (str): 작업 이름 (예: "assignment_get")
+        func (callable): 실행할 호출 (인자 없음)
+        feature (str): 기능 태그
+        writes (int): 쓰기 문서 수 (읽기 수는 결과에서 계산: 리스트면 길이, 아니면 1)
+
+    Returns:
+        func의 반환값
+    """
+    started = time.perf_counter()
+    error = None
+    result = None
+    try:
+        result = func()
+        return result
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        if writes:
+            reads = 0
+        elif isinstance(result, list):
+            reads = max(len(result), 1)  # 결과가 없는 쿼리도 최소 1회 읽기로 과금
+        else:
+            reads = 1
+        record(
+            "firestore",
+            op=op,
+            feature=feature,
+            latency_ms=round((time.perf_counter() - started) * 1000, 1),
+            reads=reads,
+            writes=writes,
+            status="error" if error else "ok",
+            error=f"{type(error).__name__}: {error}" if error else None,
+        )
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct / 100)))]
+
+
+def load_records(path=LOG_PATH):
+    """로테이션된 파일(.1 ~ .N)을 포함해 추적 레코드를 오래된 순서로 읽습니다."""
+    rotated = []
+    for p in glob.glob(path + ".*"):
+        suffix = p.rsplit(".", 1)[-1]
+        if suffix.isdigit():
+            rotated.append((int(suffix), p))
+    paths = [p for _, p in sorted(rotated, reverse=True)] + [path]
+    for p in paths:
+        if not os.path.exists(p):
+            continue
+        with open(p, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+
+
+def summarize(records):
+    """
+    과제(학습 코드)별, 기능별 비용과 지연 요약을 만듭니다.
+
+    Returns:
+        dict: {access_code: {feature: {calls, errors, retries, p50_ms, p95_ms, tokens, images, reads, writes, cost_usd}}}
+    """
+    groups = {}
+    for r in records:
+        code = r.get("access_code") or "N/A"
+        feature = r.get("feature") or "unknown"
+        g = groups.setdefault(code, {}).setdefault(feature, {
+            "calls": 0, "errors": 0, "retries": 0, "latencies": [],
+            "prompt_tokens": 0, "completion_tokens": 0, "images": 0,
+            "reads": 0, "writes": 0, "cost_usd": 0.0,
+        })
+        g["calls"] += 1
+        g["errors"] += r.get("status") == "error"
+        g["retries"] += r.get("retries") or 0
+        g["latencies"].append(r.get("latency_ms") or 0)
+        g["prompt_tokens"] += r.get("prompt_tokens") or 0
+        g["completion_tokens"] += r.get("completion_tokens") or 0
+        g["images"] += r.get("images") or 0
+        g["reads"] += r.get("reads") or 0
+        g["writes"] += r.get("writes") or 0
+        g["cost_usd"] += r.get("cost_usd") or 0.0
+    for features in groups.values():
+        for g in features.values():
+            latencies = g.pop("latencies")
+            g["p50_ms"] = _percentile(latencies, 50)
+            g["p95_ms"] = _percentile(latencies, 95)
+            g["cost_usd"] = round(g["cost_usd"], 6)
+    return groups
+
+
+def print_summary(summary):
+    for code, features in sorted(summary.items()):
+        total_cost = sum(g["cost_usd"] for g in features.values())
+        print(f"\n[{code}] 추정 비용 ${total_cost:.4f}")
+        print(f"  {'기능':<16}{'호출':>6}{'오류':>6}{'p50ms':>9}{'p95ms':>9}{'토큰(in/out)':>16}{'이미지':>7}{'R/W':>10}{'비용$':>10}")
+        for feature, g in sorted(features.items()):
+            tokens = f"{g['prompt_tokens']}/{g['completion_tokens']}"
+            rw = f"{g['reads']}/{g['writes']}"
+            print(f"  {feature:<16}{g['calls']:>6}{g['errors']:>6}{g['p50_ms'] or 0:>9.0f}"
+                  f"{g['p95_ms'] or 0:>9.0f}{tokens:>16}{g['images']:>7}{rw:>10}{g['cost_usd']:>10.4f}")
+
+
+if __name__ == "__main__":
+    print_summary(summarize(load_records(sys.argv[1] if len(sys.argv) > 1 else LOG_PATH)))
@@ -0,0 +1,149 @@
+"""
+서버 시작 워밍업
+배포 직후 첫 학생이 Firebase 초기화, OpenAI 첫 TLS 연결, 과제 캐시 미스, 무거운 모듈 import 비용을
+대신 치르지 않도록 워커 프로세스가 뜰 때 한 번 미리 실행합니다.
+
+- 앱 안에서는 백그라운드 스레드로 실행되어 첫 세션을 막지 않습니다 (streamlit_app.start_warmup).
+  단계 함수는 스레드에서 실행되므로 st.cache_resource/st.secrets에 기대지 않는 일반 함수여야 합니다.
+- 과제 문서는 공유 캐시(shared_cache)에 넣으므로 배포 스크립트에서 먼저 실행해 두면 모든 워커가 이어받습니다.
+
+실행 예:
+    python warmup.py            # 최근 활동 과제를 공유 캐시에 미리 적재
+"""
+
+import importlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+RECENT_DAYS = int(os.getenv("READFIT_WARMUP_DAYS", "3"))
+MAX_ASSIGNMENTS = 200
+SUBMISSION_SCAN_LIMIT = 2000
+
+_report = None
+_report_lock = threading.Lock()
+
+
+def recent_access_codes(db, days=RECENT_DAYS, limit=MAX_ASSIGNMENTS):
+    """
+    최근 활동 학습 코드 (최근 제출 순, 이어서 최근 생성된 과제).
+    두 조회 모두 단일 필드 범위 조회이며 학습 코드/문서 ID만 받아옵니다.
+    """
+    since = datetime.now() - timedelta(days=days)
+    codes = []
+    seen = set()
+    submissions = (
+        db.collection("readfit_submissions")
+        .where("timestamp", ">=", since)
+        .order_by("timestamp", direction="DESCENDING")
+        .select(["access_code"])
+        .limit(SUBMISSION_SCAN_LIMIT)
+    )
+    for doc in submissions.stream():
+        code = doc.to_dict().get("access_code")
+        if code and code not in seen:
+            seen.add(code)
+            codes.append(code)
+    created = db.collection("readfit_assignments").where("created_at", ">=", since).select([])
+    for doc in created.stream():
+        if doc.id not in seen:
+            seen.add(doc.id)
+            codes.append(doc.id)
+    return codes[:limit]
+
+
+def preload_assignments(db, cache, codes):
+    """과제 문서를 한 번의 일괄 조회(get_all)로 읽어 공유 캐시의 assignment 네임스페이스에 적재"""
+    if not codes:
+        return 0
+    refs = [db.collection("readfit_assignments").document(code) for code in codes]
+    loaded = 0
+    for snapshot in db.get_all(refs):
+        if snapshot.exists:
+            cache.set("assignment", snapshot.id, snapshot.to_dict())
+            loaded += 1
+    return loaded
+
+
+def preload_modules(names):
+    """첫 요청 때 import되는 무거운 모듈을 미리 import"""
+    loaded = []
+    for name in names:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except ImportError:
+            pass
+    return ", ".join(loaded)
+
+
+def run(steps):
+    """
+    워밍업 단계를 순서대로 실행합니다. 한 단계가 실패해도 나머지는 계속합니다.
+
+    Args:
+        steps (list): [(이름, 호출 함수)] - 함수의 반환값은 보고서의 detail로 기록
+
+    Returns:
+        dict: {"started_at", "seconds", "steps": [{"name", "seconds", "ok", "detail"}]}
+    """
+    global _report
+    started_at = datetime.now()
+    started = time.perf_counter()
+    results = []
+    for name, func in steps:
+        step_started = time.perf_counter()
+        try:
+            detail, ok = func(), True
+        except Exception as e:
+            detail, ok = f"{type(e).__name__}: {e}", False
+        results.append({
+            "name": name,
+            "seconds": round(time.perf_counter() - step_started, 3),
+            "ok": ok,
+            "detail": "" if detail is None else str(detail),
+        })
+    report = {"started_at": started_at, "seconds": round(time.perf_counter() - started, 3), "steps": results}
+    with _report_lock:
+        _report = report
+    logger.info(
+        "워밍업 완료 %s초: %s",
+        report["seconds"],
+        ", ".join(f"{r['name']} {r['seconds']}초{'' if r['ok'] else ' (실패)'}" for r in results),
+    )
+    return report
+
+
+def start_in_background(steps):
+    """워밍업을 데몬 스레드로 시작 (스레드 반환)"""
+    thread = threading.Thread(target=run, args=(steps,), name="readfit-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def last_report():
+    """가장 최근 워밍업 보고서 (아직 끝나지 않았으면 None)"""
+    with _report_lock:
+        return _report
+
+
+if __name__ == "__main__":
+    import shared_cache
+    from firebase_config import get_firestore_client
+
+    def preload():
+        db = get_firestore_client()
+        codes = recent_access_codes(db)
+        return f"{preload_assignments(db, shared_cache.get_cache(), codes)}/{len(codes)}건"
+
+    result = run([
+        ("firebase", lambda: get_firestore_client() and "ok"),
+        ("assignments", preload),
+    ])
+    for step in result["steps"]:
+        print(f"{step['name']}: {step['seconds']}초 {'ok' if step['ok'] else '실패'} {step['detail']}")
+    print(f"워밍업 완료 {result['seconds']}초")
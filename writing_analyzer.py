@@ -0,0 +1,358 @@
+"""
+작문 로컬 분석 모듈
+베스트셀러 작가 미션의 학생 작문을 LLM 호출 전에 로컬에서 분석합니다.
+키워드 포함 여부(원형/활용형 매칭), 철자 오류(삭제 인덱스 기반 철자 검사기),
+문장/단어 수, 어휘 다양도(TTR), 가독성 점수를 수 밀리초 안에 계산합니다.
+"""
+
+import re
+import time
+
+
+_WORD_RE = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?")
+_SENTENCE_RE = re.compile(r"[^.!?]+[.!?]*")
+
+# 초등 수준 작문에서 자주 쓰이는 기본 어휘 (교과서 지문 어휘와 함께 철자 사전으로 사용)
+BASE_VOCABULARY = """
+a about after again all also always am an and animal animals any are around as ask at ate away
+baby back bad bag ball be beautiful because bed been before best better big bike bird birthday
+black blue book books boy bread breakfast brother brought bus but buy by cake call came can car
+care cat catch change child children city class clean close clothes cold come computer cook could
+country cry cut dad day days dear did dinner do does dog doing done door down draw dream drink
+drive during each early eat eats egg end enjoy even evening ever every everyone everything eye
+eyes face fall family far fast father favorite feel felt few find fine finish first fish five fly
+food for forest found four free friend friends from fruit fun funny game games garden gave get
+gets girl give go goes going good got great green grow had hand happy hard has have he head healthy
+hear heard help her here him his home hope hot hour house how hungry i if important in into is
+it its jump just keep kind knew know last late laugh learn learned leave left let life like liked
+little live long look looked lost lot love lunch made make many market may me meet met milk mind
+money more morning most mother mountain much music must my name near need never new next nice night
+no not nothing now of off often old on once one only open or other our out outside over own park
+people pet picture place plan play played playing please poor pretty put rain read ready really
+red rest ride right river road room run running sad said same saw say school sea see seen she
+shop short should show sick sing sister sit sleep slow small smile so some something sometimes
+song soon sorry speak special sport sports start stay still stop story street strong student study
+summer sun sure swim table take talk tall teacher tell than thank that the their them then there
+these they thing things think this those thought three through time tired to today together told
+too took town tree tried trip try two under until up us use very visit wait walk walked want
+warm was watch water way we wear weather week well went were what when where which while white
+who why will win window winter with woman word work world would write wrong year years yellow yes
+yesterday you young your
+"""
+
+# 규칙으로 처리되지 않는 불규칙 활용형 → 원형
+IRREGULAR_LEMMAS = {
+    "am": "be", "is": "be", "are": "be", "was": "be", "were": "be", "been": "be",
+    "has": "have", "had": "have", "does": "do", "did": "do", "done": "do",
+    "went": "go", "gone": "go", "ran": "run", "ate": "eat", "eaten": "eat",
+    "saw": "see", "seen": "see", "came": "come", "took": "take", "taken": "take",
+    "made": "make", "got": "get", "gotten": "get", "gave": "give", "given": "give",
+    "knew": "know", "known": "know", "thought": "think", "bought": "buy",
+    "brought": "bring", "caught": "catch", "taught": "teach", "found": "find",
+    "told": "tell", "said": "say", "felt": "feel", "left": "leave", "met": "meet",
+    "wrote": "write", "written": "write", "drew": "draw", "drawn": "draw",
+    "swam": "swim", "sang": "sing", "began": "begin", "flew": "fly",
+    "grew": "grow", "drank": "drink", "slept": "sleep", "kept": "keep",
+    "became": "become", "won": "win", "sat": "sit", "stood": "stand",
+    "children": "child", "people": "person", "men": "man", "women": "woman",
+    "feet": "foot", "teeth": "tooth", "mice": "mouse",
+    "better": "good", "best": "good", "worse": "bad", "worst": "bad",
+}
+
+_VOWELS = "aeiouy"
+# 불규칙 활용형이 있는 원형 (규칙 -ed를 붙인 goed, runned 등은 철자 오류)
+_IRREGULAR_BASES = frozenset(IRREGULAR_LEMMAS.values())
+# -es가 붙는 어미 (watches, boxes, goes)
+_ES_ENDINGS = ("s", "x", "z", "ch", "sh", "o")
+
+
+def tokenize(text):
+    """텍스트에서 영어 단어 토큰을 소문자로 추출합니다."""
+    return [w.lower() for w in _WORD_RE.findall(text or "")]
+
+
+def split_sentences(text):
+    """마침표/느낌표/물음표 기준으로 문장을 나눕니다 (단어가 없는 조각은 제외)."""
+    return [s.strip() for s in _SENTENCE_RE.findall(text or "") if _WORD_RE.search(s)]
+
+
+def _ends_cvc(stem):
+    """자음+단모음+자음으로 끝나는지 (끝 자음 w/x/y 제외)"""
+    return (
+        len(stem) >= 3
+        and stem[-1] not in _VOWELS and stem[-1] not in "wx"
+        and stem[-2] in "aeiou" and stem[-3] not in "aeiou"
+    )
+
+
+def _doubles_final_consonant(stem):
+    """어미를 붙일 때 끝 자음을 반드시 겹쳐 쓰는 1음절 원형인지 (run → running, big → bigger)"""
+    syllables = sum(1 for i, ch in enumerate(stem) if ch in "aeiou" and (i == 0 or stem[i - 1] not in "aeiou"))
+    return _ends_cvc(stem) and syllables == 1
+
+
+def lemma_candidates(word):
+    """
+    단어의 가능한 원형 후보 집합을 반환합니다.
+    규칙 기반 어간 추출은 모호하므로 (예: "hoping" → hope/hop) 후보를 모두 돌려주고,
+    매칭 시 후보 집합이 겹치는지로 판단합니다.
+
+    Args:
+        word (str): 영어 단어
+
+    Returns:
+        set: 원형 후보 (입력 단어 자신 포함)
+    """
+    w = word.lower().strip("'")
+    if w.endswith("'s"):
+        w = w[:-2]
+    candidates = {w}
+    if w in IRREGULAR_LEMMAS:
+        candidates.add(IRREGULAR_LEMMAS[w])
+
+    def stems(stem):
+        if len(stem) < 2:
+            return set()
+        # 겹친 자음 뒤의 어미 (running → run, beginning → begin, called → call)
+        if stem[-1] == stem[-2] and stem[-1] not in _VOWELS:
+            return {stem, stem[:-1]} if _ends_cvc(stem[:-1]) else {stem}
+        # 묵음 e 복원 (making → make, liked → like)
+        found = {stem + "e"}
+        # 1음절 단모음+단자음 원형은 자음을 겹쳐 써야 하므로 그대로는 원형이 아님 (runing ≠ run)
+        if not _doubles_final_consonant(stem):
+            found.add(stem)
+        return found
+
+    if w.endswith("ies") and len(w) > 4:
+        candidates.add(w[:-3] + "y")
+    elif w.endswith("ves") and len(w) > 4:
+        candidates.add(w[:-3] + "f")
+        candidates.add(w[:-3] + "fe")
+    elif w.endswith("es") and len(w) > 3 and w[:-2].endswith(_ES_ENDINGS):
+        candidates.add(w[:-2])
+    if w.endswith("s") and not w.endswith("ss") and len(w) > 3:
+        candidates.add(w[:-1])
+    if w.endswith("ied") and len(w) > 4:
+        candidates.add(w[:-3] + "y")
+    elif w.endswith("ed") and len(w) > 3:
+        # 불규칙 동사 원형에 규칙 -ed를 붙인 형태(goed, runned)는 받지 않음
+        candidates |= stems(w[:-2]) - _IRREGULAR_BASES
+    if w.endswith("ing") and len(w) > 4:
+        candidates |= stems(w[:-3])
+    if w.endswith("ier") and len(w) > 4:
+        candidates.add(w[:-3] + "y")
+    elif w.endswith("er") and len(w) > 4:
+        candidates |= stems(w[:-2])
+    if w.endswith("iest") and len(w) > 5:
+        candidates.add(w[:-4] + "y")
+    elif w.endswith("est") and len(w) > 5:
+        candidates |= stems(w[:-3])
+    if w.endswith("ily") and len(w) > 4:
+        candidates.add(w[:-3] + "y")
+    elif w.endswith("ly") and len(w) > 4:
+        candidates.add(w[:-2])
+    return candidates
+
+
+def _damerau_levenshtein(a, b, max_distance):
+    """제한 거리 내의 Damerau-Levenshtein(OSA) 거리. 초과하면 max_distance + 1."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev_prev = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = cur[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2]
+                    and a[i - 2] == b[j - 1]):
+                cur[j] = min(cur[j], prev_prev[j - 2] + 1)
+            row_min = min(row_min, cur[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        prev_prev, prev = prev, cur
+    return prev[-1]
+
+
+class SpellChecker:
+    """
+    삭제 인덱스 기반 철자 검사기 (SymSpell 방식).
+    사전 단어마다 최대 max_distance 글자를 삭제한 변형을 미리 색인해 두고,
+    조회 시 입력 단어의 삭제 변형만 찾아보므로 사전 크기와 무관하게 빠릅니다.
+    """
+
+    def __init__(self, words=(), max_distance=2):
+        self.max_distance = max_distance
+        self.frequencies = {}
+        self.deletes = {}
+        for word in words:
+            self.add_word(word)
+
+    def _delete_variants(self, word):
+        variants = {word}
+        frontier = {word}
+        for _ in range(self.max_distance):
+            next_frontier = set()
+            for w in frontier:
+                if len(w) <= 1:
+                    continue
+                for i in range(len(w)):
+                    next_frontier.add(w[:i] + w[i + 1:])
+            variants |= next_frontier
+            frontier = next_frontier
+        return variants
+
+    def add_word(self, word):
+        """사전에 단어를 추가합니다 (이미 있으면 빈도만 증가)."""
+        word = word.lower()
+        if word in self.frequencies:
+            self.frequencies[word] += 1
+            return
+        self.frequencies[word] = 1
+        for variant in self._delete_variants(word):
+            self.deletes.setdefault(variant, set()).add(word)
+
+    def is_known(self, word):
+        """단어 또는 그 원형 후보가 사전에 있으면 True."""
+        return any(c in self.frequencies for c in lemma_candidates(word))
+
+    def suggest(self, word):
+        """
+        가장 가까운 사전 단어를 반환합니다.
+
+        Returns:
+            tuple or None: (제안 단어, 편집 거리). 후보가 없으면 None
+        """
+        word = word.lower()
+        if word in self.frequencies:
+            return word, 0
+        candidates = set()
+        for variant in self._delete_variants(word):
+            candidates |= self.deletes.get(variant, set())
+        best = None
+        for cand in candidates:
+            dist = _damerau_levenshtein(word, cand, self.max_distance)
+            if dist > self.max_distance:
+                continue
+            key = (dist, -self.frequencies[cand], cand)
+            if best is None or key < best[0]:
+                best = (key, cand, dist)
+        return (best[1], best[2]) if best else None
+
+
+def build_spell_checker(texts=(), max_distance=2):
+    """기본 어휘와 주어진 텍스트(교과서 지문 등)의 단어로 철자 검사기를 만듭니다."""
+    checker = SpellChecker(BASE_VOCABULARY.split(), max_distance=max_distance)
+    for text in texts:
+        for word in tokenize(text):
+            checker.add_word(word)
+    return checker
+
+
+def count_syllables(word):
+    """모음 그룹 기반 음절 수 추정 (최소 1)."""
+    w = word.lower()
+    count = 0
+    prev_vowel = False
+    for ch in w:
+        is_vowel = ch in _VOWELS
+        if is_vowel and not prev_vowel:
+            count += 1
+        prev_vowel = is_vowel
+    if w.endswith("e") and not w.endswith(("le", "ee")) and count > 1:
+        count -= 1
+    return max(count, 1)
+
+
+def analyze_writing(text, keywords, spell_checker=None, known_text=""):
+    """
+    학생 작문을 로컬에서 분석합니다.
+
+    Args:
+        text (str): 학생이 작성한 텍스트
+        keywords (list): 포함되어야 할 키워드 리스트
+        spell_checker (SpellChecker): 철자 검사기 (None이면 기본 어휘로 생성)
+        known_text (str): 철자 오류로 보지 않을 단어의 출처 (예: 읽은 지문)
+
+    Returns:
+        dict: 단어/문장 수, TTR, 가독성, 키워드 매칭, 철자 오류, 소요 시간(ms)
+    """
+    started = time.perf_counter()
+    checker = spell_checker or build_spell_checker()
+    tokens = tokenize(text)
+    sentences = split_sentences(text)
+    known_words = set(tokenize(known_text))
+
+    token_lemmas = set()
+    for token in tokens:
+        token_lemmas |= lemma_candidates(token)
+
+    keywords = [k for k in (keywords or []) if k]
+    keywords_found = []
+    keywords_missing = []
+    for keyword in keywords:
+        if lemma_candidates(keyword) & token_lemmas:
+            keywords_found.append(keyword)
+        else:
+            keywords_missing.append(keyword)
+
+    misspellings = []
+    checked = set()
+    for token in tokens:
+        if token in checked or "'" in token or len(token) < 3:
+            continue
+        checked.add(token)
+        if token in known_words or checker.is_known(token):
+            continue
+        suggestion = checker.suggest(token)
+        # 지문 단어가 같거나 더 가까우면 지문 단어를 우선 제안
+        for known in known_words:
+            dist = _damerau_levenshtein(token, known, checker.max_distance)
+            if dist > checker.max_distance:
+                continue
+            if suggestion is None or dist < suggestion[1] or (
+                    dist == suggestion[1] and suggestion[0] not in known_words):
+                suggestion = (known, dist)
+        if suggestion:
+            misspellings.append({"word": token, "suggestion": suggestion[0]})
+
+    word_count = len(tokens)
+    sentence_count = len(sentences)
+    type_token_ratio = len(set(tokens)) / word_count if word_count else 0.0
+    if word_count and sentence_count:
+        syllables = sum(count_syllables(t) for t in tokens)
+        readability = (206.835 - 1.015 * (word_count / sentence_count)
+                       - 84.6 * (syllables / word_count))
+        readability = max(0.0, min(100.0, readability))
+    else:
+        readability = 0.0
+
+    return {
+        "word_count": word_count,
+        "sentence_count": sentence_count,
+        "type_token_ratio": round(type_token_ratio, 3),
+        "readability": round(readability, 1),
+        "keywords_found": keywords_found,
+        "keywords_missing": keywords_missing,
+        "keyword_coverage": round(len(keywords_found) / len(keywords), 3) if keywords else 1.0,
+        "misspellings": misspellings,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def score_writing(analysis, target_words=30):
+    """
+    분석 결과로 활동 점수(0~100)를 계산합니다.
+    키워드 50점, 분량 20점, 철자 15점, 어휘 다양도 15점.
+    """
+    word_count = analysis["word_count"]
+    if word_count == 0:
+        return 0
+    keyword_points = 50 * analysis["keyword_coverage"]
+    length_points = 20 * min(word_count / target_words, 1.0)
+    misspell_ratio = len(analysis["misspellings"]) / word_count
+    spelling_points = 15 * max(0.0, 1.0 - misspell_ratio * 5)
+    variety_points = 15 * min(analysis["type_token_ratio"] / 0.6, 1.0)
+    return int(round(keyword_points + length_points + spelling_points + variety_points))